@@ -1,13 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-import json
+import tkinter.font as tkfont
 import os
+import sys
 from datetime import datetime
-from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageOps # Import Pillow libraries
 import uuid # For unique IDs
-import random # For random Aktenzeichen
-import string # For random Aktenzeichen
 import re # For regex in placeholder extraction
+import time # For search timing
+import threading # For batch report generation
+import queue # Results and errors from background threads, handed to the Tk thread
+import csv # For batch input errors
+from batch import generate_batch
+from core import DATA_FILES, DATABASE_FILE, DEFAULT_SERVER_URL, PERPETRATOR_FILES_DIR, PERPETRATOR_IMAGES_DIR, SETTINGS_FILE, AktenCore, committed_crime, create_storage, format_crime_list, generate_random_case_number, load_settings
+from images import DEFAULT_IMAGE_FORMAT, DEFAULT_THUMBNAIL_BUDGET_MB, IMAGE_FORMATS, ImageStore, PlaceholderCache, ThumbnailCache
+from photo_import import attach_photos, format_summary, match_photos, photos_from_mapping, photos_in_folder, process_photos
+from storage import write_json_file
+from templates import LiveRender
+
+SHARED_FILES_POLL_MS = 2000 # How often changes saved by other app instances are picked up
+UI_CALLS_POLL_MS = 100 # How often callbacks queued by background threads are run
+CROPPER_WORKING_SIZE = 2048 # Longest side of the copy the image cropper displays (enough for any screen)
+CROPPER_SETTLE_MS = 150 # High-quality redraw once the cropper window has not been resized for this long
 
 # Class for image cropping dialog
 class ImageCropper(tk.Toplevel):
@@ -19,8 +32,12 @@ class ImageCropper(tk.Toplevel):
         self.transient(parent) # Make dialog appear on top of parent
         self.grab_set() # Disable interaction with parent window
 
-        self.original_pil_image = pil_image
+        self.original_pil_image = pil_image # Full resolution, only read when cropping
+        self.working_pil_image = self._make_working_copy(pil_image) # Downscaled copy all display sizes are made from
         self.cropped_image = None # This will store the final cropped PIL Image
+        self._rendered_size = None # Canvas size the current display image was made for
+        self._preview_job = None
+        self._refine_job = None
 
         self.start_x = None
         self.start_y = None
@@ -47,33 +64,81 @@ class ImageCropper(tk.Toplevel):
 
         self.protocol("WM_DELETE_WINDOW", self.cancel_crop) # Handle window close button
 
+    def _make_working_copy(self, pil_image):
+        """Verkleinerte Arbeitskopie für die Anzeige; JPEGs werden dabei gleich verkleinert dekodiert (draft)."""
+        from PIL import Image # Pillow is imported on first use (faster startup)
+        working = None
+        if getattr(pil_image, "filename", None):
+            try:
+                working = Image.open(pil_image.filename) # Own handle, so the original stays undecoded
+            except OSError:
+                pass
+        if working is None:
+            working = pil_image.copy()
+        working.thumbnail((CROPPER_WORKING_SIZE, CROPPER_WORKING_SIZE), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        return working
+
     def _on_canvas_resize(self, event):
-        """Reloads and rescales the image when the canvas is resized."""
-        self._load_initial_image()
+        """Rescales the image when the canvas is resized: a fast preview now, full quality once resizing stops."""
+        if (event.width, event.height) == self._rendered_size:
+            return
+        if self._preview_job is None: # At most one preview per idle cycle, however many events arrive
+            self._preview_job = self.after_idle(self._render_preview)
+        if self._refine_job:
+            self.after_cancel(self._refine_job)
+        self._refine_job = self.after(CROPPER_SETTLE_MS, self._render_final)
+
+    def _render_preview(self):
+        from PIL import Image
+        self._preview_job = None
+        self._render(Image.Resampling.NEAREST)
+
+    def _render_final(self):
+        from PIL import Image
+        self._refine_job = None
+        self._render(Image.Resampling.LANCZOS)
 
     def _load_initial_image(self):
-        """Loads and displays the original image on the canvas, scaled to fit."""
+        """Loads and displays the image on the canvas, scaled to fit."""
+        from PIL import Image
         if self.canvas.winfo_width() <= 1 or self.canvas.winfo_height() <= 1:
             self.after(100, self._load_initial_image) # Try again if canvas not ready
             return
+        self._render(Image.Resampling.LANCZOS)
 
+    def _render(self, resample):
+        """Scales the working copy to fit the canvas with the given resampling filter."""
+        from PIL import ImageTk
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
+        if canvas_width <= 1 or canvas_height <= 1:
+            return
 
-        img_width, img_height = self.original_pil_image.size
+        img_width, img_height = self.working_pil_image.size
         
         # Calculate ratio to fit image within canvas while maintaining aspect ratio
         ratio = min(canvas_width / img_width, canvas_height / img_height)
-        display_width = int(img_width * ratio)
-        display_height = int(img_height * ratio)
+        display_width = max(1, int(img_width * ratio))
+        display_height = max(1, int(img_height * ratio))
 
-        self.display_pil_image = self.original_pil_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
+        self.display_pil_image = self.working_pil_image.resize((display_width, display_height), resample)
         self.tk_image = ImageTk.PhotoImage(self.display_pil_image)
         
-        self.canvas.delete("all") # Clear previous image and rectangle
-        self.canvas.create_image(canvas_width/2, canvas_height/2, image=self.tk_image, anchor="center")
-        self.rect_id = None # Reset rectangle ID
-        self.current_rect = None # Reset current selection
+        if (canvas_width, canvas_height) == self._rendered_size and self.canvas.find_all():
+            # Same layout (the refined version of the preview): swap the pixels, keep the selection
+            self.canvas.itemconfig(self.canvas.find_all()[0], image=self.tk_image)
+        else:
+            self.canvas.delete("all") # Clear previous image and rectangle
+            self.canvas.create_image(canvas_width/2, canvas_height/2, image=self.tk_image, anchor="center")
+            self.rect_id = None # Reset rectangle ID
+            self.current_rect = None # Reset current selection
+        self._rendered_size = (canvas_width, canvas_height)
+
+    def destroy(self):
+        for job in (self._preview_job, self._refine_job):
+            if job:
+                self.after_cancel(job)
+        super().destroy()
 
     def on_button_press(self, event):
         """Starts drawing the crop rectangle."""
@@ -98,6 +163,7 @@ class ImageCropper(tk.Toplevel):
 
     def perform_crop(self):
         """Crops the image based on the selected rectangle and resizes it to 150x150."""
+        from PIL import Image
         if not self.current_rect:
             messagebox.showwarning("Zuschneiden", "Bitte wählen Sie einen Bereich zum Zuschneiden aus.", parent=self)
             return
@@ -149,6 +215,199 @@ class ImageCropper(tk.Toplevel):
         self.destroy() # Close the dialog
 
 
+# Listbox replacement that only renders the rows currently in view
+class VirtualListbox(tk.Frame):
+    """Scrollbare Liste über einem Datenmodell, die nur die sichtbaren Zeilen zeichnet (curselection() und <<ListboxSelect>> wie tk.Listbox)."""
+
+    def __init__(self, parent, formatter, items=(), height=10, font=("Arial", 10), bg="white", fg="black", selectbackground="#5E94DA", selectforeground="white"):
+        super().__init__(parent, bg=bg)
+        self.formatter = formatter
+        self.items = items
+        self.font = tkfont.Font(root=self, font=font)
+        self.row_height = self.font.metrics("linespace") + 4
+        self.bg = bg
+        self.fg = fg
+        self.selectbackground = selectbackground
+        self.selectforeground = selectforeground
+
+        self._selected = None # Index of the selected row
+        self._top = 0 # Scroll offset in pixels
+        self._row_items = [] # Pool of (rectangle, text) canvas items, reused while scrolling
+
+        self.canvas = tk.Canvas(self, bg=bg, height=self.row_height * height, highlightthickness=0, takefocus=1)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units")) # Linux/X11 wheel
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        self.canvas.bind("<Up>", lambda e: self._move_selection(-1))
+        self.canvas.bind("<Down>", lambda e: self._move_selection(1))
+
+    # --- tk.Listbox compatible API ---
+    def configure(self, cnf=None, **kw):
+        """Nimmt zusätzlich die Farboptionen einer tk.Listbox an (für den Theme-Wechsel)."""
+        kw = dict(cnf or {}, **kw)
+        colors_changed = False
+        for option in ("bg", "fg", "selectbackground", "selectforeground"):
+            if option in kw:
+                setattr(self, option, kw.pop(option))
+                colors_changed = True
+        if colors_changed:
+            super().configure(bg=self.bg)
+            self.canvas.configure(bg=self.bg)
+            self.redraw()
+        if kw:
+            return super().configure(**kw)
+    config = configure
+
+    def curselection(self):
+        return () if self._selected is None else (self._selected,)
+
+    def selection_set(self, index):
+        self._selected = index
+        self.redraw()
+
+    def selection_clear(self, first=None, last=None):
+        self._selected = None
+        self.redraw()
+
+    def size(self):
+        return len(self.items)
+
+    def see(self, index):
+        """Scrollt so, dass die Zeile index sichtbar ist."""
+        height = self.canvas.winfo_height()
+        y = index * self.row_height
+        if y < self._top:
+            self._top = y
+        elif y + self.row_height > self._top + height:
+            self._top = y + self.row_height - height
+        self.redraw()
+
+    def yview(self, *args):
+        """Scrollbar-Protokoll (moveto/scroll) wie bei tk.Listbox."""
+        height = max(self.canvas.winfo_height(), 1)
+        if args and args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self.items) * self.row_height)
+        elif args and args[0] == "scroll":
+            step = self.row_height if args[2] == "units" else height
+            self._top += int(args[1]) * step
+        self.redraw()
+
+    # --- Model notifications ---
+    def set_items(self, items):
+        """Ersetzt das Datenmodell (z. B. nach Neuladen) und hebt die Auswahl auf."""
+        self.items = items
+        self._selected = None
+        self.redraw()
+
+    def refresh(self):
+        """Zeichnet die sichtbaren Zeilen neu."""
+        self.redraw()
+
+    def refresh_row(self, index):
+        """Zeichnet eine geänderte Zeile neu, falls sie sichtbar ist."""
+        slot = index - self._top // self.row_height
+        if self._is_visible(index) and 0 <= slot < len(self._row_items) and index < len(self.items):
+            self._render_slot(slot, index)
+
+    def refresh_where(self, predicate):
+        """Zeichnet die sichtbaren Zeilen neu, deren Eintrag predicate erfüllt."""
+        first = self._top // self.row_height
+        for slot in range(len(self._row_items)):
+            index = first + slot
+            if index < len(self.items) and self._is_visible(index) and predicate(self.items[index]):
+                self._render_slot(slot, index)
+
+    def row_inserted(self, index):
+        """Das Modell hat an index einen Eintrag erhalten."""
+        if self._selected is not None and self._selected >= index:
+            self._selected += 1
+        self._rows_shifted(index)
+
+    def row_deleted(self, index):
+        """Der Eintrag an index wurde aus dem Modell entfernt."""
+        if self._selected == index:
+            self._selected = None
+        elif self._selected is not None and self._selected > index:
+            self._selected -= 1
+        self._rows_shifted(index)
+
+    def _rows_shifted(self, index):
+        # Rows from index on moved; below the visible area only the scrollbar changes
+        if index <= (self._top + self.canvas.winfo_height()) // self.row_height:
+            self.redraw()
+        else:
+            self._update_scrollbar()
+
+    # --- Rendering ---
+    def _is_visible(self, index):
+        first = self._top // self.row_height
+        return first <= index <= first + self.canvas.winfo_height() // self.row_height + 1
+
+    def redraw(self):
+        """Zeichnet nur die Zeilen, die gerade im sichtbaren Bereich liegen."""
+        width = self.canvas.winfo_width()
+        height = max(self.canvas.winfo_height(), 1)
+        total_height = len(self.items) * self.row_height
+        self._top = max(0, min(self._top, total_height - height))
+        first = self._top // self.row_height
+        visible_rows = height // self.row_height + 2
+
+        while len(self._row_items) < visible_rows:
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, width=0)
+            text = self.canvas.create_text(0, 0, anchor="w", font=self.font)
+            self._row_items.append((rect, text))
+
+        for slot, (rect, text) in enumerate(self._row_items):
+            index = first + slot
+            if slot < visible_rows and index < len(self.items):
+                y = index * self.row_height - self._top
+                self.canvas.coords(rect, 0, y, width, y + self.row_height)
+                self.canvas.coords(text, 4, y + self.row_height / 2)
+                self._render_slot(slot, index)
+            else:
+                self.canvas.itemconfigure(rect, state="hidden")
+                self.canvas.itemconfigure(text, state="hidden")
+        self._update_scrollbar()
+
+    def _render_slot(self, slot, index):
+        rect, text = self._row_items[slot]
+        selected = index == self._selected
+        self.canvas.itemconfigure(rect, fill=self.selectbackground if selected else self.bg, state="normal")
+        self.canvas.itemconfigure(text, text=self.formatter(self.items[index]), fill=self.selectforeground if selected else self.fg, state="normal")
+
+    def _update_scrollbar(self):
+        height = max(self.canvas.winfo_height(), 1)
+        total_height = len(self.items) * self.row_height
+        if total_height > 0:
+            self.scrollbar.set(self._top / total_height, min(1.0, (self._top + height) / total_height))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        index = (self._top + event.y) // self.row_height
+        if 0 <= index < len(self.items):
+            self._selected = index
+            self.redraw()
+            self.event_generate("<<ListboxSelect>>")
+
+    def _move_selection(self, step):
+        if not self.items:
+            return
+        index = 0 if self._selected is None else max(0, min(len(self.items) - 1, self._selected + step))
+        self._selected = index
+        self.see(index)
+        self.event_generate("<<ListboxSelect>>")
+
+
 class PoliceRPApp:
     def __init__(self, root):
         self.root = root
@@ -157,87 +416,188 @@ class PoliceRPApp:
         self.root.minsize(900, 700) # Set minimum window size
 
         # --- Settings Management ---
-        self.settings_file = "settings.json"
+        self.settings_file = SETTINGS_FILE
         self.settings = self.load_settings()
         self.apply_theme()
 
         # Define file paths for different data types
-        self.notes_file = "notizen.json"
-        self.reports_file = "anzeigen.json" # Main reports that link to perpetrators
-        self.perpetrator_files_dir = "taeterakten" # Directory for perpetrator data and images
-        self.perpetrator_files_json = os.path.join(self.perpetrator_files_dir, "taeterakten.json")
-        self.perpetrator_images_dir = os.path.join(self.perpetrator_files_dir, "bilder")
-        self.report_presets_file = "anzeigen_presets.json"
-        self.predefined_crimes_file = "predefined_crimes.json" # New file for predefined crimes
+        self.notes_file = DATA_FILES["notes"]
+        self.reports_file = DATA_FILES["reports"] # Main reports that link to perpetrators
+        self.perpetrator_files_dir = PERPETRATOR_FILES_DIR # Directory for perpetrator data and images
+        self.perpetrator_files_json = DATA_FILES["perpetrator_files"]
+        self.perpetrator_images_dir = PERPETRATOR_IMAGES_DIR
+        self.report_presets_file = DATA_FILES["report_presets"]
+        self.predefined_crimes_file = DATA_FILES["predefined_crimes"]
+        self.database_file = DATABASE_FILE # Used by the SQLite storage backend
+        self.data_files = DATA_FILES
 
         # Ensure directories exist
         os.makedirs(self.perpetrator_files_dir, exist_ok=True)
         os.makedirs(self.perpetrator_images_dir, exist_ok=True)
 
-        # Load data for all sections
-        self.notes = self.load_data(self.notes_file)
-        self.reports = self.load_data(self.reports_file)
-        self.perpetrator_files = self.load_data(self.perpetrator_files_json)
-        self.report_presets = self.load_data(self.report_presets_file)
-
-        # Load or initialize predefined crimes
-        self.predefined_crimes = self.load_data(self.predefined_crimes_file)
-        if not self.predefined_crimes:
-            self.predefined_crimes = [
-                {"name": "Diebstahl", "paragraph": "§ 242 StGB", "detention_units": 5, "fine": 100},
-                {"name": "Raub", "paragraph": "§ 249 StGB", "detention_units": 10, "fine": 500},
-                {"name": "Körperverletzung", "paragraph": "§ 223 StGB", "detention_units": 7, "fine": 200},
-                {"name": "Sachbeschädigung", "paragraph": "§ 303 StGB", "detention_units": 3, "fine": 50},
-                {"name": "Einbruch", "paragraph": "§ 244 StGB", "detention_units": 8, "fine": 300},
-                {"name": "Betrug", "paragraph": "§ 263 StGB", "detention_units": 6, "fine": 250},
-                {"name": "Drogenhandel", "paragraph": "BtMG", "detention_units": 15, "fine": 1000},
-                {"name": "Widerstand gegen die Staatsgewalt", "paragraph": "§ 113 StGB", "detention_units": 4, "fine": 150},
-                {"name": "Fahren ohne Fahrerlaubnis", "paragraph": "§ 21 StVG", "detention_units": 2, "fine": 80},
-                {"name": "Verkehrsunfallflucht", "paragraph": "§ 142 StGB", "detention_units": 5, "fine": 120},
-                {"name": "Brandstiftung", "paragraph": "§ 306 StGB", "detention_units": 12, "fine": 700},
-                {"name": "Mord", "paragraph": "§ 211 StGB", "detention_units": 999, "fine": 5000}, # Example large values
-                {"name": "Totschlag", "paragraph": "§ 212 StGB", "detention_units": 999, "fine": 3000},
-                {"name": "Nötigung", "paragraph": "§ 240 StGB", "detention_units": 4, "fine": 100},
-                {"name": "Beleidigung", "paragraph": "§ 185 StGB", "detention_units": 1, "fine": 30},
-                {"name": "Hausfriedensbruch", "paragraph": "§ 123 StGB", "detention_units": 2, "fine": 40}
-            ]
-            self.save_data(self.predefined_crimes, self.predefined_crimes_file)
-
-        # Add new report presets as requested
-        # Only initialize if no presets exist (to avoid overwriting user-added ones)
-        if not self.report_presets: 
-            self.report_presets = [
-                {"name": "Standard Anzeige", "template_string": "[Herr/Frau] [name] hat am [Datum] um [uhrzeit] folgende Straftaten begangen [Straftat1,2,3,4,5, etc], laut [Gesetz] wurden [Hafteinheiten] Hafteinheiten und eine Strafe von [Strafbetrag] verhängt. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
-                {"name": "Ordnungswidrigkeit", "template_string": "Am [Datum] um [uhrzeit] wurde [Herr/Frau] [name] wegen einer Ordnungswidrigkeit ([OWI-Art]) gemäß [OWI-Gesetz] mit einem Verwarnungsgeld von [Verwarnungsgeld] € belegt. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
-                {"name": "Fahndung", "template_string": "FAHNDUNG nach [name], geboren am [Geburtsdatum] in [Geburtsort]. Beschreibung: [Beschreibung]. Letzter bekannter Aufenthaltsort: [Ort]. Grund: [Grund der Fahndung]. Bei Sichtung bitte [Maßnahme] ergreifen. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
-                {"name": "Festnahme", "template_string": "Festnahme von [Herr/Frau] [name] am [Datum] um [uhrzeit] in [Ort]. Grund der Festnahme: [Grund]. Die Person wurde zur [Ort der Verbringung] verbracht. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
-                {"name": "Verkehrsunfall/Unfallbericht", "template_string": "Verkehrsunfall am [Datum] um [uhrzeit] in [Ort]. Beteiligte Fahrzeuge: [Fahrzeug 1], [Fahrzeug 2]. Beteiligte Personen: [Personen]. Sachschaden: [Sachschaden]. Personenschaden: [Personenschaden]. Ursache: [Unfallursache]. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
-                {"name": "Zeugenvernehmung", "template_string": "Zeugenvernehmung von [Herr/Frau] [Zeugenname] am [Datum] um [uhrzeit] in [Ort]. Zum Sachverhalt: [Sachverhalt]. Aussage: [Aussage des Zeugen]. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"}
-            ]
-            self.save_data(self.report_presets, self.report_presets_file)
-
-
+        # Tk must only be used from this thread; background threads queue their callbacks here
+        self.ui_calls = queue.Queue()
+        self.root.after(UI_CALLS_POLL_MS, self.poll_ui_calls)
+
+        # Load data for all sections; the core also creates the default crimes and presets on first start
+        self.storage = create_storage(self.settings, self.data_files, self.database_file, error_callback=self.report_storage_error)
+        self.core = AktenCore(self.storage, error_callback=self.report_storage_error)
+        self.notes = self.core.notes
+        self.reports = self.core.reports
+        self.perpetrator_files = self.core.perpetrator_files
+        self.report_presets = self.core.report_presets
+        self.predefined_crimes = self.core.predefined_crimes
+        self.repository = self.core.repository # Id/name/link indexes
+        self.search_index = self.core.search_index # Built on the first search
+        self.template_cache = self.core.template_cache # Compiled report preset templates
+        self.live_preview = None # LiveRender of the report shown in generated_report_text while live preview is on
+        self.pending_search = None # after() id of the debounced search; set here because the search tab is built lazily
         self.current_perpetrator_image_path = None # To store path of current perpetrator image for display/editing
         self.perpetrator_photo_image = None # To store Tkinter PhotoImage for display
+        self.placeholder_cache = PlaceholderCache() # "Person with ?" images per (theme, size)
+        self.image_store = ImageStore(self.perpetrator_images_dir, self.settings.get("image_format", DEFAULT_IMAGE_FORMAT)) # Content-addressed photos, reference-counted
+        self.image_store.rebuild_index(self.perpetrator_files)
+        # Decoded and resized perpetrator photos, shared by the Täterakten tab and the edit window
+        self.thumbnail_cache = ThumbnailCache(self.settings.get("thumbnail_cache_mb", DEFAULT_THUMBNAIL_BUDGET_MB) * 1024 * 1024)
 
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(SHARED_FILES_POLL_MS, self.poll_shared_files)
+        if "reports" not in self.storage.lazy_collections: # Would read every report from disk; "Jetzt prüfen" still can
+            self.check_penalty_totals(on_startup=True)
+
+    def referenced_image_names(self):
+        return {pf['image_filename'] for pf in self.perpetrator_files if pf.get('image_filename')}
+
+    def collect_image_garbage(self, show_result=False):
+        """Löscht im Hintergrund Täterbilder, auf die keine Täterakte mehr verweist."""
+        if not self.core.can_collect_images():
+            # Perpetrator files missing from memory would make their photos look unused
+            if show_result:
+                messagebox.showerror("Bilder", "Die Täterakten wurden nicht vollständig aus dem gewählten Speicher geladen. Nicht verwendete Bilder werden daher nicht gelöscht.")
+            return
+        referenced = self.referenced_image_names() # Snapshot taken on the UI thread
+        def worker():
+            removed, freed = self.image_store.collect_garbage(referenced)
+            if show_result:
+                self.run_on_ui_thread(lambda: messagebox.showinfo("Bilder", f"{removed} nicht mehr verwendete Bilder gelöscht ({freed / 1024:.0f} KB freigegeben)."))
+        threading.Thread(target=worker, name="image-gc", daemon=True).start()
+
+    def discard_unsaved_image(self, image_path):
+        """Löscht einen zugeschnittenen Ausschnitt sofort, wenn er verworfen wird, bevor eine Täterakte ihn verwendet."""
+        if image_path:
+            self.image_store.discard_unsaved(os.path.basename(image_path))
+
+    def release_image(self, image_filename):
+        """Gibt den Verweis einer Täterakte auf ein Bild frei; unbenutzte Bilder räumt die Garbage Collection weg."""
+        if image_filename and self.image_store.release(image_filename) == 0:
+            self.collect_image_garbage()
+
+    def show_image_storage_report(self):
+        """Zeigt, wie viel Platz die Täterbilder belegen und wie viele davon verwaist sind."""
+        report = self.image_store.report(self.referenced_image_names())
+        missing = report["missing_files"]
+        messagebox.showinfo("Bilder", f"Dateien: {report['files']} ({report['bytes'] / 1024 / 1024:.1f} MB)\n"
+                                      f"Verwendet: {report['referenced_files']} Dateien für {report['references']} Täterakten "
+                                      f"({report['shared_files']} von mehreren Akten geteilt)\n"
+                                      f"Verwaist: {report['orphaned_files']} ({report['orphaned_bytes'] / 1024:.0f} KB)\n"
+                                      f"Alte Dateinamen (vor der Inhaltsadressierung): {report['legacy_files']}\n"
+                                      f"Fehlende Dateien: {len(missing)}" + (f" ({', '.join(missing[:5])}{' ...' if len(missing) > 5 else ''})" if missing else ""))
+
+    def reencode_images(self):
+        """Kodiert alle verwendeten Täterbilder im Hintergrund (Prozesspool) im eingestellten Format neu."""
+        referenced = self.referenced_image_names()
+        self.reencode_images_button.config(state="disabled")
+        def progress(done, total):
+            self.run_on_ui_thread(lambda: self.reencode_images_status.config(text=f"{done}/{total} Bilder"))
+        def worker():
+            try:
+                renamed, saved = self.image_store.reencode(referenced, progress=progress)
+            except (OSError, ValueError) as e:
+                self.run_on_ui_thread(lambda e=e: self.finish_reencode_images(None, 0, e)) # e is unbound once the except block ends
+                return
+            self.run_on_ui_thread(lambda: self.finish_reencode_images(renamed, saved))
+        threading.Thread(target=worker, name="image-reencode", daemon=True).start()
+
+    def finish_reencode_images(self, renamed, saved, error=None):
+        """Stellt die Täterakten auf die neuen Bilddateien um (UI-Thread) und meldet das Ergebnis."""
+        self.reencode_images_button.config(state="normal")
+        self.reencode_images_status.config(text="")
+        if error:
+            messagebox.showerror("Bilder", f"Neukodieren fehlgeschlagen: {error}")
+            return
+        self.core.rename_images(renamed)
+        self.image_store.finish_reencode(renamed, self.perpetrator_files)
+        if self.current_perpetrator_image_path and os.path.basename(self.current_perpetrator_image_path) in renamed:
+            self.current_perpetrator_image_path = self.image_store.path(renamed[os.path.basename(self.current_perpetrator_image_path)])
+        messagebox.showinfo("Bilder", f"Bilder neu kodiert: {saved / 1024:.0f} KB eingespart ({len(renamed)} Dateien umbenannt).")
+
+    def check_penalty_totals(self, on_startup=False):
+        """Prüft die Strafsummen aller Täterakten im Hintergrund gegen die verknüpften Anzeigen."""
+        def worker():
+            try:
+                drift = self.core.check_totals()
+            except Exception as e: # Would otherwise vanish with the thread
+                self.run_on_ui_thread(lambda e=e: messagebox.showerror("Strafsummen", f"Prüfung der Strafsummen fehlgeschlagen: {e}"))
+                return
+            if drift or not on_startup:
+                self.run_on_ui_thread(lambda: self.handle_penalty_drift(drift, on_startup))
+        threading.Thread(target=worker, name="totals-check", daemon=True).start()
+
+    def handle_penalty_drift(self, drift, on_startup=False):
+        """Meldet abweichende Strafsummen und korrigiert sie (automatisch oder nach Rückfrage)."""
+        if not drift:
+            messagebox.showinfo("Strafsummen", "Alle Strafsummen stimmen mit den verknüpften Anzeigen überein.")
+            return
+        lines = [f"{pf['name']}: {pf.get('total_detention_units', 0)} HE / {pf.get('total_fine', 0)} € statt {units} HE / {fine} €" for pf, units, fine in drift[:10]]
+        if len(drift) > 10:
+            lines.append(f"... und {len(drift) - 10} weitere")
+        details = "\n".join(lines)
+        if not (on_startup and self.settings.get("auto_repair_totals", False)):
+            if not messagebox.askyesno("Strafsummen", f"{len(drift)} Täterakte(n) haben falsche Strafsummen:\n\n{details}\n\nJetzt korrigieren?"):
+                return
+        repaired = self.core.repair_totals(drift)
+        if self.is_tab_built(self.perpetrator_files_frame):
+            self.populate_perpetrator_files_list()
+        if not on_startup:
+            messagebox.showinfo("Strafsummen", f"{repaired} Täterakte(n) korrigiert.")
+
+    def poll_shared_files(self):
+        """Übernimmt regelmäßig Änderungen anderer Instanzen, die dieselben Datendateien verwenden."""
+        changed = self.core.sync_all() # One stat() per file while nobody else writes
+        refreshers = {
+            "notes": (self.notes_frame, "populate_notes_list"),
+            "reports": (self.reports_frame, "populate_reports_list"),
+            "perpetrator_files": (self.perpetrator_files_frame, "populate_perpetrator_files_list"),
+            "predefined_crimes": (self.manage_crimes_frame, "populate_predefined_crimes_list"),
+            "report_presets": (self.report_presets_frame, "populate_report_presets_list"),
+        }
+        if "perpetrator_files" in changed:
+            self.image_store.rebuild_index(self.perpetrator_files)
+        for collection in changed:
+            frame, method = refreshers[collection]
+            if self.is_tab_built(frame):
+                getattr(self, method)()
+        self.root.after(SHARED_FILES_POLL_MS, self.poll_shared_files)
+
+    def on_close(self):
+        """Schließt das Speicher-Backend (wartet auf laufende Hintergrundarbeiten) und beendet die App."""
+        if self.pending_search:
+            self.root.after_cancel(self.pending_search) # Would otherwise run against destroyed widgets
+            self.pending_search = None
+        self.discard_unsaved_image(self.current_perpetrator_image_path) # Picked for a new file that was never added
+        self.core.close()
+        self.poll_ui_calls(reschedule=False) # Errors from the last saves are still shown
+        self.root.destroy()
 
     def load_settings(self):
         """Loads settings from a JSON file."""
-        if os.path.exists(self.settings_file):
-            try:
-                with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                messagebox.showerror("Fehler", f"Fehler beim Laden von {self.settings_file}. Die Datei ist möglicherweise beschädigt. Standardeinstellungen werden verwendet.")
-                return {"theme": "light"} # Fallback to default
-        return {"theme": "light"} # Default settings
+        return load_settings(self.settings_file, error_callback=lambda message: messagebox.showerror("Fehler", message))
 
     def save_settings(self):
         """Saves settings to a JSON file."""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4, ensure_ascii=False)
+            write_json_file(self.settings_file, self.settings)
         except IOError as e:
             messagebox.showerror("Speicherfehler", f"Konnte Einstellungen nicht speichern in {self.settings_file}: {e}")
 
@@ -352,7 +712,8 @@ class PoliceRPApp:
                 getattr(self, 'new_report_preset_template_text', None),
                 getattr(self, 'report_presets_listbox', None),
                 getattr(self, 'generated_report_text', None),
-                getattr(self, 'predefined_crimes_listbox', None)
+                getattr(self, 'predefined_crimes_listbox', None),
+                getattr(self, 'search_results_listbox', None)
             ]:
                 if widget:
                     try:
@@ -373,104 +734,80 @@ class PoliceRPApp:
                 self.report_presets_canvas.config(bg=bg_color)
             if hasattr(self, 'settings_canvas'):
                 self.settings_canvas.config(bg=bg_color)
+            if hasattr(self, 'search_canvas'):
+                self.search_canvas.config(bg=bg_color)
 
 
-    def load_data(self, filename):
-        """Lädt Daten aus einer JSON-Datei."""
-        if os.path.exists(filename):
+    def run_on_ui_thread(self, func):
+        """Lässt func im Tk-Thread ausführen; darf aus jedem Thread aufgerufen werden."""
+        self.ui_calls.put(func)
+
+    def poll_ui_calls(self, reschedule=True):
+        """Führt die von Hintergrund-Threads eingereihten Aufrufe aus."""
+        if reschedule:
+            self.root.after(UI_CALLS_POLL_MS, self.poll_ui_calls) # First, so a failing callback doesn't stop the polling
+        while True:
             try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Data migration for reports
-                    if filename == self.reports_file:
-                        for record in data:
-                            # Migrate old 'address' to 'birthplace' in perpetrator files if it exists
-                            if 'address' in record and 'birthplace' not in record:
-                                record['birthplace'] = record['address']
-                                del record['address'] # Remove old field
-                            
-                            # Migrate crimes_committed from list of strings to list of dicts
-                            if 'crimes_committed' in record and all(isinstance(c, str) for c in record['crimes_committed']):
-                                record['crimes_committed'] = [{"name": c, "paragraph": "", "detention_units": 0, "fine": 0, "count": 1} for c in record['crimes_committed']]
-                            
-                            # Ensure 'count' exists for all crime objects
-                            if 'crimes_committed' in record:
-                                for crime_obj in record['crimes_committed']:
-                                    if 'count' not in crime_obj:
-                                        crime_obj['count'] = 1
-
-                    
-                    # Data migration for perpetrator_files (address to birthplace)
-                    if filename == self.perpetrator_files_json:
-                        for pf_record in data:
-                            if 'address' in pf_record and 'birthplace' not in pf_record:
-                                pf_record['birthplace'] = pf_record['address']
-                                del pf_record['address']
-                    return data
-            except json.JSONDecodeError:
-                messagebox.showerror("Fehler", f"Fehler beim Laden von {filename}. Die Datei ist möglicherweise beschädigt. Eine neue leere Datei wird erstellt.")
-                return []
-        return []
-
-    def save_data(self, data, filename):
-        """Speichert Daten in einer JSON-Datei."""
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except IOError as e:
-            messagebox.showerror("Speicherfehler", f"Konnte Daten nicht speichern in {filename}: {e}")
+                func = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            func()
+
+    def report_storage_error(self, error):
+        """Zeigt Fehler aus Hintergrund-Threads (Speicher-Worker, Server) im Tk-Thread an."""
+        self.run_on_ui_thread(lambda: messagebox.showerror("Speicherfehler", str(error)))
+
+    def persist(self, collection, op, record):
+        """Schreibt eine einzelne Änderung (insert/update/delete) über das Speicher-Backend."""
+        self.core.persist(collection, op, record)
 
     def generate_random_case_number(self, length=8):
         """Generiert ein zufälliges Aktenzeichen (Buchstaben und Zahlen)."""
-        characters = string.ascii_uppercase + string.digits
-        return ''.join(random.choice(characters) for i in range(length))
+        return generate_random_case_number(length)
 
     def get_perpetrator_by_name(self, name):
         """Sucht eine Täterakte nach Namen."""
-        for pf in self.perpetrator_files:
-            if pf['name'].lower() == name.lower():
-                return pf
-        return None
+        return self.repository.get_perpetrator_by_name(name)
 
     def create_widgets(self):
         """Erstellt die GUI-Widgets und Tabs."""
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill="both", padx=10, pady=10)
 
-        # Tab Order: Notizen, Anzeigen, Täterakten, Straftaten verwalten, Anzeigen Presets, Einstellungen
-        # Notes Tab
-        self.notes_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.notes_frame, text="Notizen")
-        self.create_notes_tab(self.notes_frame)
-        
-        # Reports Tab (main entry for new cases, links to perpetrator files)
-        self.reports_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.reports_frame, text="Anzeigen")
-        self.create_reports_tab(self.reports_frame)
-
-        # Perpetrator Files Tab (cumulative records of individuals)
-        self.perpetrator_files_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.perpetrator_files_frame, text="Täterakten")
-        self.create_perpetrator_files_tab(self.perpetrator_files_frame)
-
-        # Manage Crimes Tab (new)
-        self.manage_crimes_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.manage_crimes_frame, text="Straftaten verwalten")
-        self.create_manage_crimes_tab(self.manage_crimes_frame)
-
-        # Report Presets Tab
-        self.report_presets_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.report_presets_frame, text="Bericht Presets")
-        self.create_report_presets_tab(self.report_presets_frame)
-        
-        # Settings Tab
-        self.settings_frame = ttk.Frame(self.notebook, padding="15 15 15 15")
-        self.notebook.add(self.settings_frame, text="Einstellungen")
-        self.create_settings_tab(self.settings_frame)
-        
-        # Re-apply theme after creating all widgets
-        self.apply_theme()
-
+        # Tab Order: Notizen, Anzeigen, Täterakten, Straftaten verwalten, Anzeigen Presets, Suche, Einstellungen
+        # Each tab's widgets are only created when the tab is first selected (faster startup)
+        self.tab_builders = {} # tab frame path -> builder, removed once the tab has been built
+        self.notes_frame = self.add_lazy_tab("Notizen", self.create_notes_tab)
+        self.reports_frame = self.add_lazy_tab("Anzeigen", self.create_reports_tab) # Main entry for new cases, links to perpetrator files
+        self.perpetrator_files_frame = self.add_lazy_tab("Täterakten", self.create_perpetrator_files_tab) # Cumulative records of individuals
+        self.manage_crimes_frame = self.add_lazy_tab("Straftaten verwalten", self.create_manage_crimes_tab)
+        self.report_presets_frame = self.add_lazy_tab("Bericht Presets", self.create_report_presets_tab)
+        self.search_frame = self.add_lazy_tab("Suche", self.create_search_tab) # Full-text search across notes, reports and perpetrator files
+        self.settings_frame = self.add_lazy_tab("Einstellungen", self.create_settings_tab)
+
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.ensure_tab_built(self.notes_frame) # The first tab is visible right away
+        # No second apply_theme() here: the widgets are created with the current theme colors
+
+    def add_lazy_tab(self, text, builder):
+        """Fügt einen leeren Tab hinzu; builder erstellt dessen Widgets bei der ersten Auswahl."""
+        frame = ttk.Frame(self.notebook, padding="15 15 15 15")
+        self.notebook.add(frame, text=text)
+        self.tab_builders[str(frame)] = builder
+        return frame
+
+    def on_tab_changed(self, event):
+        self.ensure_tab_built(self.notebook.nametowidget(self.notebook.select()))
+
+    def ensure_tab_built(self, frame):
+        """Erstellt die Widgets eines Tabs, falls das noch nicht geschehen ist."""
+        builder = self.tab_builders.pop(str(frame), None)
+        if builder:
+            builder(frame)
+
+    def is_tab_built(self, frame):
+        """Ob die Widgets eines Tabs schon existieren (sonst füllt der Tab seine Liste beim Erstellen selbst)."""
+        return str(frame) not in self.tab_builders
 
     def _create_scrollable_tab(self, parent_container):
         """Creates a scrollable frame within a parent container (a tab)."""
@@ -521,12 +858,9 @@ class PoliceRPApp:
         notes_list_group.grid_rowconfigure(0, weight=1)
         notes_list_group.grid_columnconfigure(0, weight=1)
 
-        self.notes_listbox = tk.Listbox(notes_list_group, selectmode=tk.SINGLE, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg, relief="flat", borderwidth=1) # Design: Listbox bg/fg/selection/relief
-        self.notes_listbox.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.notes_listbox = VirtualListbox(notes_list_group, lambda note: note['title'], font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg) # Only visible rows are drawn
+        self.notes_listbox.grid(row=0, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
         self.notes_listbox.bind('<<ListboxSelect>>', self.display_selected_note)
-        notes_scrollbar = ttk.Scrollbar(notes_list_group, orient="vertical", command=self.notes_listbox.yview)
-        notes_scrollbar.grid(row=0, column=1, sticky="ns", pady=5)
-        self.notes_listbox.config(yscrollcommand=notes_scrollbar.set)
 
         button_frame = ttk.Frame(notes_list_group)
         button_frame.grid(row=1, column=0, columnspan=2, pady=5, sticky="ew")
@@ -549,18 +883,15 @@ class PoliceRPApp:
 
     def populate_notes_list(self):
         """Populates the notes listbox with data."""
-        self.notes_listbox.delete(0, tk.END)
-        sorted_notes = sorted(self.notes, key=lambda x: x.get('timestamp', ''), reverse=True)
-        for i, note in enumerate(sorted_notes):
-            self.notes_listbox.insert(tk.END, note['title'])
+        self.sorted_notes = sorted(self.notes, key=lambda x: x.get('timestamp', ''), reverse=True) # Newest first, backs the listbox rows
+        self.notes_listbox.set_items(self.sorted_notes)
 
     def display_selected_note(self, event):
         """Displays the content of the selected note."""
         selected_indices = self.notes_listbox.curselection()
         if not selected_indices: return
         index = selected_indices[0]
-        sorted_notes = sorted(self.notes, key=lambda x: x.get('timestamp', ''), reverse=True)
-        selected_note = sorted_notes[index]
+        selected_note = self.sorted_notes[index]
         self.selected_note_content_text.config(state='normal')
         self.selected_note_content_text.delete(1.0, tk.END)
         self.selected_note_content_text.insert(tk.END, selected_note['content'])
@@ -573,9 +904,11 @@ class PoliceRPApp:
         if not title or not content:
             messagebox.showwarning("Eingabefehler", "Titel und Inhalt der Notiz dürfen nicht leer sein.")
             return
-        self.notes.append({"id": str(uuid.uuid4()), "title": title, "content": content, "timestamp": datetime.now().isoformat()})
-        self.save_data(self.notes, self.notes_file)
-        self.populate_notes_list()
+        note = {"id": str(uuid.uuid4()), "title": title, "content": content, "timestamp": datetime.now().isoformat()}
+        self.notes.append(note)
+        self.persist("notes", "insert", note)
+        self.sorted_notes.insert(0, note) # The new note is the newest one
+        self.notes_listbox.row_inserted(0)
         self.new_note_title_entry.delete(0, tk.END)
         self.new_note_content_text.delete(1.0, tk.END)
         messagebox.showinfo("Erfolg", "Notiz erfolgreich hinzugefügt!")
@@ -587,9 +920,7 @@ class PoliceRPApp:
             messagebox.showwarning("Auswahlfehler", "Bitte wählen Sie eine Notiz zum Bearbeiten aus.")
             return
         index = selected_indices[0]
-        sorted_notes = sorted(self.notes, key=lambda x: x.get('timestamp', ''), reverse=True)
-        self.editing_note_index = self.notes.index(sorted_notes[index])
-        note = self.notes[self.editing_note_index]
+        note = self.sorted_notes[index]
 
         edit_window = tk.Toplevel(self.root)
         edit_window.title("Notiz bearbeiten")
@@ -615,10 +946,10 @@ class PoliceRPApp:
             if not new_title or not new_content:
                 messagebox.showwarning("Eingabefehler", "Titel und Inhalt dürfen nicht leer sein.", parent=edit_window)
                 return
-            self.notes[self.editing_note_index]['title'] = new_title
-            self.notes[self.editing_note_index]['content'] = new_content
-            self.save_data(self.notes, self.notes_file)
-            self.populate_notes_list()
+            note['title'] = new_title
+            note['content'] = new_content
+            self.persist("notes", "update", note)
+            self.notes_listbox.refresh_row(index)
             self.display_selected_note(None)
             messagebox.showinfo("Erfolg", "Notiz erfolgreich aktualisiert!", parent=edit_window)
             edit_window.destroy()
@@ -632,12 +963,10 @@ class PoliceRPApp:
             return
         index = selected_indices[0]
         if messagebox.askyesno("Bestätigen", "Möchten Sie diese Notiz wirklich löschen?"):
-            sorted_notes = sorted(self.notes, key=lambda x: x.get('timestamp', ''), reverse=True)
-            original_note_to_delete = sorted_notes[index]
-            original_index = self.notes.index(original_note_to_delete)
-            del self.notes[original_index]
-            self.save_data(self.notes, self.notes_file)
-            self.populate_notes_list()
+            original_note_to_delete = self.sorted_notes.pop(index)
+            self.notes.remove(original_note_to_delete)
+            self.persist("notes", "delete", original_note_to_delete)
+            self.notes_listbox.row_deleted(index)
             self.selected_note_content_text.config(state='normal')
             self.selected_note_content_text.delete(1.0, tk.END)
             self.selected_note_content_text.config(state='disabled')
@@ -697,63 +1026,83 @@ class PoliceRPApp:
                 spin_var.set(0)
 
 
-        def populate_crime_widgets(filter_text=""):
-            # Clear existing widgets
-            for widget in inner_frame.winfo_children():
-                widget.destroy()
-
-            # Filter crimes based on search text
-            filtered_crimes = [
-                crime_obj for crime_obj in self.predefined_crimes
-                if filter_text.lower() in crime_obj['name'].lower() or \
-                   (crime_obj.get('paragraph') and filter_text.lower() in crime_obj['paragraph'].lower())
-            ]
+        # Rows are built once per dialog; searching only shows/hides them
+        crime_rows = [] # (widget_frame, lowercase name, lowercase paragraph)
+        preselected_crimes = {(c['name'], c.get('paragraph')): c for c in current_selection_list}
+        current_filter = None # Last applied search text
+        pending_search = None # after() id of the debounced search
+
+        def update_spinbox_state(sv, spinbox_widget):
+            spinbox_widget.config(state='normal' if sv.get() else 'readonly')
+
+        def add_crime_row(crime_obj):
+            crime_key = (crime_obj['name'], crime_obj.get('paragraph', ''))
+
+            # Check if vars already exist, otherwise create them
+            if crime_key not in all_crimes_vars:
+                check_var = tk.BooleanVar(value=False)
+                count_var = tk.IntVar(value=1)
+                all_crimes_vars[crime_key] = {'selected': check_var, 'count': count_var}
+
+                # Set initial state if the crime is already in the selection list
+                selected_crime = preselected_crimes.get((crime_obj['name'], crime_obj.get('paragraph')))
+                if selected_crime:
+                    check_var.set(True)
+                    count_var.set(selected_crime.get('count', 1))
+
+            check_var = all_crimes_vars[crime_key]['selected']
+            count_var = all_crimes_vars[crime_key]['count']
+
+            # Create widgets in a frame for better layout control
+            widget_frame = ttk.Frame(inner_frame)
+            widget_frame.grid(row=len(crime_rows), column=0, sticky="ew", padx=5, pady=1)
+            widget_frame.grid_columnconfigure(1, weight=1)
+
+            # Checkbutton
+            display_text = f"{crime_obj['name']} ({crime_obj['paragraph']})" if crime_obj.get('paragraph') else crime_obj['name']
+            cb = ttk.Checkbutton(widget_frame, text=display_text, variable=check_var, command=lambda cv=check_var, sv=count_var: on_checkbox_toggle(cv, sv))
+            cb.grid(row=0, column=0, sticky="w")
+
+            # Spinbox
+            spinbox = ttk.Spinbox(widget_frame, from_=1, to=100, textvariable=count_var, width=3, state='readonly')
+            spinbox.grid(row=0, column=2, padx=(5, 0), sticky="e")
+
+            # Link spinbox state to checkbox state (one trace per row for the lifetime of the dialog)
+            check_var.trace_add("write", lambda name, index, mode, sv=check_var, sw=spinbox: update_spinbox_state(sv, sw))
+            update_spinbox_state(check_var, spinbox) # Set initial state
+
+            crime_rows.append((widget_frame, crime_obj['name'].lower(), (crime_obj.get('paragraph') or '').lower()))
+
+        def apply_crime_filter(filter_text=""):
+            nonlocal current_filter, pending_search
+            pending_search = None
+            needle = filter_text.lower()
+            if needle == current_filter:
+                return # e.g. cursor keys, nothing to do
+            current_filter = needle
+            for widget_frame, name_lower, paragraph_lower in crime_rows:
+                if needle in name_lower or (paragraph_lower and needle in paragraph_lower):
+                    widget_frame.grid() # Restores the remembered grid position
+                else:
+                    widget_frame.grid_remove()
+            canvas_for_widgets.yview_moveto(0)
+            _on_frame_configure(None) # Update scrollregion
 
-            # Populate with new widgets
-            for i, crime_obj in enumerate(filtered_crimes):
-                crime_key = (crime_obj['name'], crime_obj.get('paragraph', ''))
-                
-                # Check if vars already exist, otherwise create them
-                if crime_key not in all_crimes_vars:
-                    check_var = tk.BooleanVar(value=False)
-                    count_var = tk.IntVar(value=1)
-                    all_crimes_vars[crime_key] = {'selected': check_var, 'count': count_var}
-                    
-                    # Set initial state if the crime is already in the selection list
-                    for selected_crime in current_selection_list:
-                        if selected_crime['name'] == crime_obj['name'] and selected_crime.get('paragraph') == crime_obj.get('paragraph'):
-                            check_var.set(True)
-                            count_var.set(selected_crime.get('count', 1))
-                            break
-
-                check_var = all_crimes_vars[crime_key]['selected']
-                count_var = all_crimes_vars[crime_key]['count']
-
-                # Create widgets in a frame for better layout control
-                widget_frame = ttk.Frame(inner_frame)
-                widget_frame.grid(row=i, column=0, sticky="ew", padx=5, pady=1)
-                widget_frame.grid_columnconfigure(1, weight=1)
-
-                # Checkbutton
-                display_text = f"{crime_obj['name']} ({crime_obj['paragraph']})" if crime_obj.get('paragraph') else crime_obj['name']
-                cb = ttk.Checkbutton(widget_frame, text=display_text, variable=check_var, command=lambda cv=check_var, sv=count_var: on_checkbox_toggle(cv, sv))
-                cb.grid(row=0, column=0, sticky="w")
-                
-                # Spinbox
-                spinbox = ttk.Spinbox(widget_frame, from_=1, to=100, textvariable=count_var, width=3, state='readonly')
-                spinbox.grid(row=0, column=2, padx=(5, 0), sticky="e")
-                
-                # Link spinbox state to checkbox state
-                def update_spinbox_state(sv, spinbox_widget):
-                    spinbox_widget.config(state='normal' if sv.get() else 'readonly')
-                
-                check_var.trace_add("write", lambda name, index, mode, sv=check_var, sw=spinbox: update_spinbox_state(sv, sw))
-                update_spinbox_state(check_var, spinbox) # Set initial state
+        def schedule_crime_filter(event=None):
+            # Debounce: filter once typing pauses instead of on every key
+            nonlocal pending_search
+            if pending_search:
+                dialog.after_cancel(pending_search)
+            pending_search = dialog.after(150, lambda: apply_crime_filter(search_entry.get()))
 
-            _on_frame_configure(None) # Update scrollregion
+        def cancel_pending_search():
+            if pending_search:
+                dialog.after_cancel(pending_search)
 
-        search_entry.bind("<KeyRelease>", lambda event: populate_crime_widgets(search_entry.get()))
-        populate_crime_widgets() # Initial population
+        for crime_obj in self.predefined_crimes: # Initial population
+            add_crime_row(crime_obj)
+        _on_frame_configure(None)
+        search_entry.bind("<KeyRelease>", schedule_crime_filter)
 
         v_scrollbar = ttk.Scrollbar(listbox_frame, orient="vertical", command=canvas_for_widgets.yview)
         v_scrollbar.grid(row=0, column=1, sticky="ns")
@@ -784,6 +1133,7 @@ class PoliceRPApp:
 
 
         def add_new_crime_to_predefined():
+            nonlocal current_filter
             name = new_crime_name_entry.get().strip()
             paragraph = new_crime_paragraph_entry.get().strip()
             detention = new_crime_detention_entry.get().strip()
@@ -800,21 +1150,21 @@ class PoliceRPApp:
                 messagebox.showwarning("Eingabefehler", "Hafteinheiten und Geldstrafe müssen Zahlen sein.", parent=dialog)
                 return
 
-            new_crime_obj = {"name": name, "paragraph": paragraph, "detention_units": detention, "fine": fine}
+            new_crime_obj = {"id": str(uuid.uuid4()), "name": name, "paragraph": paragraph, "detention_units": detention, "fine": fine}
             # Check if crime already exists (case-insensitive name match)
             if any(c['name'].lower() == name.lower() and c.get('paragraph', '').lower() == paragraph.lower() for c in self.predefined_crimes):
                 messagebox.showwarning("Warnung", "Diese Straftat existiert bereits.", parent=dialog)
                 return
 
             self.predefined_crimes.append(new_crime_obj)
-            self.save_data(self.predefined_crimes, self.predefined_crimes_file)
+            self.persist("predefined_crimes", "insert", new_crime_obj)
+            if self.is_tab_built(self.manage_crimes_frame):
+                self.predefined_crimes_listbox.row_inserted(len(self.predefined_crimes) - 1) # Keep the Straftaten tab in sync
             
-            # Add the new crime's BooleanVar to all_crimes_vars
-            new_crime_key = (new_crime_obj['name'], new_crime_obj.get('paragraph', ''))
-            all_crimes_vars[new_crime_key] = {'selected': tk.BooleanVar(value=False), 'count': tk.IntVar(value=1)} # Initially not selected
-
-            # Re-populate checkboxes to include the new crime
-            populate_crime_widgets(search_entry.get())
+            # Add a row (initially not selected) for the new crime and re-apply the search
+            add_crime_row(new_crime_obj)
+            current_filter = None
+            apply_crime_filter(search_entry.get())
 
             new_crime_name_entry.delete(0, tk.END)
             new_crime_paragraph_entry.delete(0, tk.END)
@@ -833,16 +1183,16 @@ class PoliceRPApp:
             for crime_obj_in_list in self.predefined_crimes: # Iterate through the full list of crimes
                 crime_key = (crime_obj_in_list['name'], crime_obj_in_list.get('paragraph', ''))
                 if crime_key in all_crimes_vars and all_crimes_vars[crime_key]['selected'].get():
-                    crime_copy = crime_obj_in_list.copy()
-                    crime_copy['count'] = all_crimes_vars[crime_key]['count'].get()
-                    selected_crimes_from_dialog.append(crime_copy)
+                    selected_crimes_from_dialog.append(committed_crime(crime_obj_in_list, all_crimes_vars[crime_key]['count'].get()))
             
             current_selection_list[:] = selected_crimes_from_dialog
             
             target_label_widget.config(text=self.format_crime_list(selected_crimes_from_dialog))
+            cancel_pending_search()
             dialog.destroy()
 
         def on_cancel():
+            cancel_pending_search()
             dialog.destroy()
 
         button_frame = ttk.Frame(dialog)
@@ -854,31 +1204,7 @@ class PoliceRPApp:
 
     def format_crime_list(self, crimes_list_of_dicts):
         """Formats a list of crimes (dictionaries) for display."""
-        if not crimes_list_of_dicts:
-            return "Keine Straftaten ausgewählt"
-        
-        formatted_crimes = []
-        for crime_obj in crimes_list_of_dicts:
-            # Ensure crime_obj is a dictionary. If it's a string (from old data), convert it.
-            if isinstance(crime_obj, str):
-                crime_obj = {"name": crime_obj, "paragraph": "", "detention_units": 0, "fine": 0, "count": 1}
-
-            crime_text = f"{crime_obj['name']} ({crime_obj['paragraph']})" if crime_obj.get('paragraph') else crime_obj['name']
-            
-            # Add count if it exists and is > 1
-            if crime_obj.get('count', 1) > 1:
-                formatted_crimes.append(f"{crime_obj['count']}x {crime_text}")
-            else:
-                formatted_crimes.append(crime_text)
-
-
-        if len(formatted_crimes) == 1:
-            return formatted_crimes[0]
-        if len(formatted_crimes) == 2:
-            return f"{formatted_crimes[0]} und {formatted_crimes[1]}"
-        
-        all_but_last = ", ".join(formatted_crimes[:-1])
-        return f"{all_but_last} und {formatted_crimes[-1]}"
+        return format_crime_list(crimes_list_of_dicts)
 
     # --- Reports Tab Functions ---
     def create_reports_tab(self, parent_frame):
@@ -926,12 +1252,9 @@ class PoliceRPApp:
         reports_list_group.grid_rowconfigure(0, weight=1)
         reports_list_group.grid_columnconfigure(0, weight=1)
 
-        self.reports_listbox = tk.Listbox(reports_list_group, selectmode=tk.SINGLE, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg, relief="flat", borderwidth=1) # Design: Listbox bg/fg/selection/relief
-        self.reports_listbox.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.reports_listbox = VirtualListbox(reports_list_group, self.format_report_row, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg) # Only visible rows are drawn
+        self.reports_listbox.grid(row=0, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
         self.reports_listbox.bind('<<ListboxSelect>>', self.display_selected_report)
-        reports_scrollbar = ttk.Scrollbar(reports_list_group, orient="vertical", command=self.reports_listbox.yview)
-        reports_scrollbar.grid(row=0, column=1, sticky="ns", pady=5)
-        self.reports_listbox.config(yscrollcommand=reports_scrollbar.set)
 
         button_frame = ttk.Frame(reports_list_group)
         button_frame.grid(row=1, column=0, columnspan=2, pady=5, sticky="ew")
@@ -954,26 +1277,21 @@ class PoliceRPApp:
 
     def populate_reports_list(self):
         """Populates the reports listbox with data."""
-        self.reports_listbox.delete(0, tk.END)
-        # Calculate perpetrator report counts
-        perpetrator_counts = {}
-        for report in self.reports:
-            perpetrator_name = report.get('perpetrator_name')
-            if perpetrator_name:
-                perpetrator_counts[perpetrator_name] = perpetrator_counts.get(perpetrator_name, 0) + 1
-        
-        # Populate listbox with report counts
-        for report in self.reports:
-            perpetrator_name = report.get('perpetrator_name', 'N/A')
-            count_str = f"({perpetrator_counts.get(perpetrator_name, 0)})" if perpetrator_name != 'N/A' else ""
-            self.reports_listbox.insert(tk.END, f"{report['report_id']} - {perpetrator_name} {count_str} ({report['type']})")
+        self.reports_listbox.set_items(self.reports)
+
+    def format_report_row(self, report):
+        """Formats one row of the reports list, including the perpetrator's report count."""
+        perpetrator_name = report.get('perpetrator_name', 'N/A')
+        # Counts are maintained incrementally by the repository on every add/edit/delete
+        count_str = f"({self.repository.report_counts_by_name.get(perpetrator_name, 0)})" if perpetrator_name != 'N/A' else ""
+        return f"{report['report_id']} - {perpetrator_name} {count_str} ({report['type']})"
 
     def display_selected_report(self, event):
         """Displays the content of the selected report."""
         selected_indices = self.reports_listbox.curselection()
         if not selected_indices: return
         index = selected_indices[0]
-        selected_report = self.reports[index]
+        selected_report = self.reports[index] # With lazy loading only the list fields are in memory; the rest is read here
         content = (f"Anzeigen-ID: {selected_report.get('report_id', 'N/A')}\n"
                    f"Tätername: {selected_report.get('perpetrator_name', 'N/A')}\n"
                    f"Typ: {selected_report.get('type', 'N/A')}\n"
@@ -997,48 +1315,15 @@ class PoliceRPApp:
             messagebox.showwarning("Eingabefehler", "Anzeigen-ID, Tätername, Typ und Straftaten dürfen nicht leer sein.")
             return
         
-        # Find or create perpetrator file
-        perpetrator_file = self.get_perpetrator_by_name(perpetrator_name)
-        if not perpetrator_file:
-            # Create new perpetrator file
-            perpetrator_file = {
-                "id": str(uuid.uuid4()),
-                "name": perpetrator_name,
-                "dob": "", "birthplace": "", "description": "", "image_filename": None, # Changed address to birthplace
-                "timestamp": datetime.now().isoformat(),
-                "total_detention_units": 0,
-                "total_fine": 0,
-                "linked_report_ids": []
-            }
-            self.perpetrator_files.append(perpetrator_file)
+        # Creates the perpetrator file if needed and adds the report's penalties to it
+        new_report, perpetrator_file, perpetrator_created = self.core.add_report(report_id, perpetrator_name, report_type, crimes_committed, description)
+        if perpetrator_created:
             messagebox.showinfo("Täterakte erstellt", f"Neue Täterakte für '{perpetrator_name}' wurde automatisch erstellt.")
-        
-        # Calculate penalties for this report
-        report_detention_units = sum(c.get('detention_units', 0) * c.get('count', 1) for c in crimes_committed)
-        report_fine = sum(c.get('fine', 0) * c.get('count', 1) for c in crimes_committed)
 
-        # Update perpetrator file with accumulated penalties and linked report
-        perpetrator_file['total_detention_units'] += report_detention_units
-        perpetrator_file['total_fine'] += report_fine
-        
-        new_report_id = str(uuid.uuid4()) # Generate unique ID for the report itself
-        perpetrator_file['linked_report_ids'].append(new_report_id)
-
-        self.reports.append({
-            "id": new_report_id,
-            "report_id": report_id, # The user-defined ID
-            "perpetrator_name": perpetrator_name,
-            "type": report_type,
-            "crimes_committed": crimes_committed,
-            "description": description,
-            "timestamp": datetime.now().isoformat(),
-            "linked_perpetrator_id": perpetrator_file['id']
-        })
-        self.save_data(self.reports, self.reports_file)
-        self.save_data(self.perpetrator_files, self.perpetrator_files_json) # Save updated perpetrator file
-
-        self.populate_reports_list()
-        self.populate_perpetrator_files_list() # Update perpetrator list in its tab
+        self.reports_listbox.row_inserted(len(self.reports) - 1)
+        self.reports_listbox.refresh_where(lambda r: r.get('perpetrator_name') == perpetrator_name) # Count changed
+        if perpetrator_created and self.is_tab_built(self.perpetrator_files_frame): # Update perpetrator list in its tab
+            self.perpetrator_files_listbox.row_inserted(len(self.perpetrator_files) - 1)
 
         self.new_report_id_entry.delete(0, tk.END)
         self.new_report_perpetrator_name_entry.delete(0, tk.END)
@@ -1097,9 +1382,6 @@ class PoliceRPApp:
         edit_description_text.insert(1.0, report['description'])
 
         def save_edited_report():
-            old_perpetrator_id = report.get('linked_perpetrator_id')
-            old_crimes = list(report.get('crimes_committed', [])) # Copy for comparison
-
             new_report_id = edit_report_id_entry.get().strip()
             new_perpetrator_name = edit_perpetrator_name_entry.get().strip()
             new_report_type = edit_report_type_entry.get().strip()
@@ -1110,54 +1392,13 @@ class PoliceRPApp:
                 messagebox.showwarning("Eingabefehler", "Anzeigen-ID, Tätername, Typ und Straftaten dürfen nicht leer sein.", parent=edit_window)
                 return
             
-            # --- Handle perpetrator file updates ---
-            # 1. Revert old perpetrator's penalties if perpetrator name changed or crimes changed
-            if old_perpetrator_id:
-                old_perpetrator_file = next((pf for pf in self.perpetrator_files if pf['id'] == old_perpetrator_id), None)
-                if old_perpetrator_file:
-                    old_report_detention = sum(c.get('detention_units', 0) * c.get('count', 1) for c in old_crimes)
-                    old_report_fine = sum(c.get('fine', 0) * c.get('count', 1) for c in old_crimes)
-                    old_perpetrator_file['total_detention_units'] -= old_report_detention
-                    old_perpetrator_file['total_fine'] -= old_report_fine
-                    if report['id'] in old_perpetrator_file['linked_report_ids']:
-                        old_perpetrator_file['linked_report_ids'].remove(report['id'])
-
-            # 2. Find or create new perpetrator file
-            new_perpetrator_file = self.get_perpetrator_by_name(new_perpetrator_name)
-            if not new_perpetrator_file:
-                new_perpetrator_file = {
-                    "id": str(uuid.uuid4()),
-                    "name": new_perpetrator_name,
-                    "dob": "", "birthplace": "", "description": "", "image_filename": None, # Changed address to birthplace
-                    "timestamp": datetime.now().isoformat(),
-                    "total_detention_units": 0,
-                    "total_fine": 0,
-                    "linked_report_ids": []
-                }
-                self.perpetrator_files.append(new_perpetrator_file)
-
-            # 3. Apply new report's penalties to the new/updated perpetrator file
-            new_report_detention = sum(c.get('detention_units', 0) * c.get('count', 1) for c in new_crimes_committed)
-            new_report_fine = sum(c.get('fine', 0) * c.get('count', 1) for c in new_crimes_committed)
-            new_perpetrator_file['total_detention_units'] += new_report_detention
-            new_perpetrator_file['total_fine'] += new_report_fine
-            if report['id'] not in new_perpetrator_file['linked_report_ids']:
-                new_perpetrator_file['linked_report_ids'].append(report['id'])
-
-
-            # Update report details
-            report['report_id'] = new_report_id
-            report['perpetrator_name'] = new_perpetrator_name
-            report['type'] = new_report_type
-            report['crimes_committed'] = new_crimes_committed
-            report['description'] = new_description
-            report['linked_perpetrator_id'] = new_perpetrator_file['id']
-
-            self.save_data(self.reports, self.reports_file)
-            self.save_data(self.perpetrator_files, self.perpetrator_files_json) # Save updated perpetrator files
-
-            self.populate_reports_list()
-            self.populate_perpetrator_files_list() # Refresh perpetrator list in its tab
+            # Moves the penalties from the old to the new (possibly newly created) perpetrator file
+            changed_counts, perpetrator_created = self.core.update_report(report, new_report_id, new_perpetrator_name, new_report_type, new_crimes_committed, new_description)
+            if perpetrator_created and self.is_tab_built(self.perpetrator_files_frame):
+                self.perpetrator_files_listbox.row_inserted(len(self.perpetrator_files) - 1) # Refresh perpetrator list in its tab
+
+            self.reports_listbox.refresh_row(index)
+            self.reports_listbox.refresh_where(lambda r: r.get('perpetrator_name') in changed_counts) # Only rows whose count changed
             self.display_selected_report(None)
             messagebox.showinfo("Erfolg", "Anzeige erfolgreich aktualisiert und Täterakte angepasst!", parent=edit_window)
             edit_window.destroy()
@@ -1173,23 +1414,9 @@ class PoliceRPApp:
         report_to_delete = self.reports[index]
 
         if messagebox.askyesno("Bestätigen", "Möchten Sie diese Anzeige wirklich löschen? Die zugehörigen Strafen werden von der Täterakte abgezogen."):
-            # Revert penalties from linked perpetrator file
-            perpetrator_id = report_to_delete.get('linked_perpetrator_id')
-            if perpetrator_id:
-                perpetrator_file = next((pf for pf in self.perpetrator_files if pf['id'] == perpetrator_id), None)
-                if perpetrator_file:
-                    report_detention = sum(c.get('detention_units', 0) * c.get('count', 1) for c in report_to_delete.get('crimes_committed', []))
-                    report_fine = sum(c.get('fine', 0) * c.get('count', 1) for c in report_to_delete.get('crimes_committed', []))
-                    perpetrator_file['total_detention_units'] -= report_detention
-                    perpetrator_file['total_fine'] -= report_fine
-                    if report_to_delete['id'] in perpetrator_file['linked_report_ids']:
-                        perpetrator_file['linked_report_ids'].remove(report_to_delete['id'])
-                    self.save_data(self.perpetrator_files, self.perpetrator_files_json) # Save updated perpetrator file
-
-            del self.reports[index]
-            self.save_data(self.reports, self.reports_file)
-            self.populate_reports_list()
-            self.populate_perpetrator_files_list() # Update perpetrator list in its tab
+            self.core.delete_report(report_to_delete, index) # Also reverts the penalties on the linked perpetrator file
+            self.reports_listbox.row_deleted(index)
+            self.reports_listbox.refresh_where(lambda r: r.get('perpetrator_name') == report_to_delete.get('perpetrator_name')) # Count changed
             self.selected_report_content_text.config(state='normal')
             self.selected_report_content_text.delete(1.0, tk.END)
             self.selected_report_content_text.config(state='disabled')
@@ -1239,21 +1466,21 @@ class PoliceRPApp:
         list_display_frame.grid_rowconfigure(1, weight=1)
         list_display_frame.grid_columnconfigure(0, weight=1)
 
-        self.perpetrator_files_listbox = tk.Listbox(list_display_frame, selectmode=tk.SINGLE, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg, relief="flat", borderwidth=1) # Design: Listbox bg/fg/selection/relief
-        self.perpetrator_files_listbox.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.perpetrator_files_listbox = VirtualListbox(list_display_frame, lambda pf: f"{pf['name']} ({pf.get('dob', 'N/A')})", font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg) # Only visible rows are drawn
+        self.perpetrator_files_listbox.grid(row=1, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
         self.perpetrator_files_listbox.bind('<<ListboxSelect>>', self.display_selected_perpetrator_file)
-        pf_scrollbar = ttk.Scrollbar(list_display_frame, orient="vertical", command=self.perpetrator_files_listbox.yview)
-        pf_scrollbar.grid(row=1, column=1, sticky="ns", pady=5)
-        self.perpetrator_files_listbox.config(yscrollcommand=pf_scrollbar.set)
 
         button_frame = ttk.Frame(list_display_frame)
         button_frame.grid(row=2, column=0, columnspan=2, pady=5, sticky="ew")
         button_frame.grid_columnconfigure(0, weight=1)
         button_frame.grid_columnconfigure(1, weight=1)
+        button_frame.grid_columnconfigure(2, weight=1)
         edit_pf_button = ttk.Button(button_frame, text="Täterakte bearbeiten", command=self.start_editing_perpetrator_file)
         edit_pf_button.grid(row=0, column=0, padx=5, sticky="ew")
         delete_pf_button = ttk.Button(button_frame, text="Täterakte löschen", command=self.delete_perpetrator_file)
         delete_pf_button.grid(row=0, column=1, padx=5, sticky="ew")
+        import_photos_button = ttk.Button(button_frame, text="Bilder-Massenimport", command=self.open_photo_import_dialog)
+        import_photos_button.grid(row=0, column=2, padx=5, sticky="ew")
 
         selected_pf_group = ttk.LabelFrame(content_frame, text="Ausgewählte Täterakte", padding="15 10") # Design: LabelFrame
         selected_pf_group.grid(row=2, column=0, columnspan=3, pady=10, padx=10, sticky="nsew")
@@ -1268,9 +1495,7 @@ class PoliceRPApp:
 
     def populate_perpetrator_files_list(self):
         """Populates the perpetrator files listbox with data."""
-        self.perpetrator_files_listbox.delete(0, tk.END)
-        for pf in self.perpetrator_files:
-            self.perpetrator_files_listbox.insert(tk.END, f"{pf['name']} ({pf.get('dob', 'N/A')})")
+        self.perpetrator_files_listbox.set_items(self.perpetrator_files)
 
     def display_selected_perpetrator_file(self, event):
         """Displays the content of the selected perpetrator file."""
@@ -1281,10 +1506,8 @@ class PoliceRPApp:
 
         # Get linked reports for display
         linked_reports_info = []
-        for report_id in selected_pf.get('linked_report_ids', []):
-            report = next((r for r in self.reports if r['id'] == report_id), None)
-            if report:
-                linked_reports_info.append(f"  - {report['report_id']} ({report['type']}): {self.format_crime_list(report.get('crimes_committed', []))}")
+        for report in self.repository.linked_reports(selected_pf):
+            linked_reports_info.append(f"  - {report['report_id']} ({report['type']}): {self.format_crime_list(report.get('crimes_committed', []))}")
         
         content = (f"Name: {selected_pf.get('name', 'N/A')}\n"
                    f"Geburtsdatum: {selected_pf.get('dob', 'N/A')}\n"
@@ -1302,6 +1525,7 @@ class PoliceRPApp:
 
         # Display perpetrator image
         image_filename = selected_pf.get('image_filename')
+        self.discard_unsaved_image(self.current_perpetrator_image_path) # A crop picked for a new file goes with the selection
         if image_filename:
             self.current_perpetrator_image_path = os.path.join(self.perpetrator_images_dir, image_filename)
         else:
@@ -1324,11 +1548,11 @@ class PoliceRPApp:
             return
 
         image_filename = None
-        # The image is already saved as a UUID.png in the perpetrator_images_dir by select_perpetrator_image
+        # The image is already saved in the image store by select_perpetrator_image
         if self.current_perpetrator_image_path and os.path.exists(self.current_perpetrator_image_path):
             image_filename = os.path.basename(self.current_perpetrator_image_path)
 
-        self.perpetrator_files.append({
+        new_pf = {
             "id": str(uuid.uuid4()),
             "name": name,
             "dob": dob,
@@ -1339,9 +1563,11 @@ class PoliceRPApp:
             "total_detention_units": 0, # Initialize
             "total_fine": 0, # Initialize
             "linked_report_ids": [] # Initialize
-        })
-        self.save_data(self.perpetrator_files, self.perpetrator_files_json)
-        self.populate_perpetrator_files_list()
+        }
+        self.repository.add_perpetrator(new_pf)
+        self.image_store.add_ref(image_filename)
+        self.persist("perpetrator_files", "insert", new_pf)
+        self.perpetrator_files_listbox.row_inserted(len(self.perpetrator_files) - 1)
         self.new_pf_name_entry.delete(0, tk.END)
         self.new_pf_dob_entry.delete(0, tk.END)
         self.new_pf_birthplace_entry.delete(0, tk.END) # Changed variable name
@@ -1404,6 +1630,12 @@ class PoliceRPApp:
         ttk.Button(image_edit_frame, text="Neues Bild auswählen", command=lambda: self.select_edit_perpetrator_image(pf_record)).grid(row=1, column=0, pady=2, sticky="ew")
         ttk.Button(image_edit_frame, text="Bild entfernen", command=lambda: self.clear_edit_perpetrator_image(pf_record)).grid(row=2, column=0, pady=2, sticky="ew")
 
+        def cancel_edit():
+            self.discard_unsaved_image(self.current_edit_perpetrator_image_path) # Closed without saving
+            edit_window.destroy()
+
+        edit_window.protocol("WM_DELETE_WINDOW", cancel_edit)
+
 
         def save_edited_pf():
             new_name = edit_name_entry.get().strip()
@@ -1422,11 +1654,12 @@ class PoliceRPApp:
                 return
 
             # If name changed, update linked reports
-            if new_name != pf_record['name']:
-                for report in self.reports:
-                    if report.get('linked_perpetrator_id') == pf_record['id']:
-                        report['perpetrator_name'] = new_name
-                self.save_data(self.reports, self.reports_file) # Save reports after updating
+            old_name = pf_record['name']
+            if new_name != old_name:
+                self.core.persist_updates("reports", self.repository.rename_perpetrator(pf_record, new_name)) # Save reports after updating
+                if self.is_tab_built(self.reports_frame):
+                    # Unlinked reports that keep the old name show a changed count too
+                    self.reports_listbox.refresh_where(lambda r: r.get('perpetrator_name') in (old_name, new_name))
 
             pf_record['name'] = new_name
             pf_record['dob'] = new_dob
@@ -1434,22 +1667,19 @@ class PoliceRPApp:
             pf_record['description'] = new_description
 
             # Handle image update/deletion
+            new_image_filename = None # Image was cleared or never existed
             if self.current_edit_perpetrator_image_path and os.path.exists(self.current_edit_perpetrator_image_path):
-                # If a new image was selected and cropped, its path will be different from the old one
-                if os.path.basename(self.current_edit_perpetrator_image_path) != pf_record.get('image_filename'):
-                    # Delete old image if it existed
-                    if pf_record.get('image_filename') and os.path.exists(os.path.join(self.perpetrator_images_dir, pf_record['image_filename'])):
-                        os.remove(os.path.join(self.perpetrator_images_dir, pf_record['image_filename']))
-                    # The new image is already saved by select_edit_perpetrator_image, just update the filename in record
-                    pf_record['image_filename'] = os.path.basename(self.current_edit_perpetrator_image_path)
-            else: # Image was cleared or never existed
-                if pf_record.get('image_filename') and os.path.exists(os.path.join(self.perpetrator_images_dir, pf_record['image_filename'])):
-                    os.remove(os.path.join(self.perpetrator_images_dir, pf_record['image_filename']))
-                pf_record['image_filename'] = None
-
-
-            self.save_data(self.perpetrator_files, self.perpetrator_files_json)
-            self.populate_perpetrator_files_list()
+                # The new image is already saved by select_edit_perpetrator_image
+                new_image_filename = os.path.basename(self.current_edit_perpetrator_image_path)
+            if new_image_filename != pf_record.get('image_filename'):
+                # The old file may be shared with other perpetrator files, so it is only released, not deleted
+                self.image_store.add_ref(new_image_filename)
+                self.release_image(pf_record.get('image_filename'))
+                pf_record['image_filename'] = new_image_filename
+
+
+            self.persist("perpetrator_files", "update", pf_record)
+            self.perpetrator_files_listbox.refresh_row(index)
             self.display_selected_perpetrator_file(None) # Refresh display
             messagebox.showinfo("Erfolg", "Täterakte erfolgreich aktualisiert!", parent=edit_window)
             edit_window.destroy()
@@ -1466,23 +1696,13 @@ class PoliceRPApp:
         pf_record = self.perpetrator_files[index]
 
         if messagebox.askyesno("Bestätigen", "Möchten Sie diese Täterakte wirklich löschen? Alle verknüpften Anzeigen bleiben bestehen, verlieren aber die Verknüpfung."):
-            # Remove link from reports that point to this perpetrator
-            for report in self.reports:
-                if report.get('linked_perpetrator_id') == pf_record['id']:
-                    report['linked_perpetrator_id'] = None # Break the link
-            self.save_data(self.reports, self.reports_file) # Save updated reports
-
-            # Delete associated image file if it exists
-            if pf_record.get('image_filename'):
-                image_full_path = os.path.join(self.perpetrator_images_dir, pf_record['image_filename'])
-                if os.path.exists(image_full_path):
-                    try:
-                        os.remove(image_full_path)
-                    except Exception as e:
-                        print(f"Fehler beim Löschen des Bildes: {e}")
-            del self.perpetrator_files[index]
-            self.save_data(self.perpetrator_files, self.perpetrator_files_json)
-            self.populate_perpetrator_files_list()
+            # Remove the record and break the link from reports that point to this perpetrator
+            self.core.persist_updates("reports", self.repository.remove_perpetrator(pf_record, index)) # Save updated reports
+            self.persist("perpetrator_files", "delete", pf_record)
+
+            # The image file goes once no other perpetrator file uses it
+            self.release_image(pf_record.get('image_filename'))
+            self.perpetrator_files_listbox.row_deleted(index)
             self.selected_pf_content_text.config(state='normal')
             self.selected_pf_content_text.delete(1.0, tk.END)
             self.selected_pf_content_text.config(state='disabled')
@@ -1492,6 +1712,7 @@ class PoliceRPApp:
     # Image handling for Perpetrator Files (create/view tab)
     def select_perpetrator_image(self):
         """Öffnet einen Dateidialog zur Auswahl eines Straftäterbildes für die neue Akte und startet den Zuschnitt."""
+        from PIL import Image
         file_path = filedialog.askopenfilename(
             title="Straftäterbild auswählen",
             filetypes=[("Bilddateien", "*.png *.jpg *.jpeg *.gif *.bmp"), ("Alle Dateien", "*.*")]
@@ -1503,12 +1724,11 @@ class PoliceRPApp:
                 self.root.wait_window(cropper) # Wait for cropper dialog to close
                 
                 if cropper.cropped_image:
-                    # Generate a unique filename for the cropped 150x150 image
-                    new_image_filename = f"{uuid.uuid4()}.png" # Always save as PNG for consistency
-                    destination_path = os.path.join(self.perpetrator_images_dir, new_image_filename)
-                    
-                    cropper.cropped_image.save(destination_path)
-                    self.current_perpetrator_image_path = destination_path
+                    # Named after its content, so an identical crop is stored only once
+                    new_image_path = self.image_store.path(self.image_store.put_image(cropper.cropped_image))
+                    if new_image_path != self.current_perpetrator_image_path:
+                        self.discard_unsaved_image(self.current_perpetrator_image_path) # Replaced before the file was added
+                    self.current_perpetrator_image_path = new_image_path
                     self.display_perpetrator_image()
                 else:
                     self.clear_perpetrator_image() # User cancelled cropping
@@ -1518,6 +1738,79 @@ class PoliceRPApp:
         else:
             self.clear_perpetrator_image() # User cancelled file selection
 
+    def open_photo_import_dialog(self):
+        """Importiert viele Täterbilder auf einmal aus einem Ordner oder einer CSV-Zuordnung."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Bilder-Massenimport")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.configure(bg=self.bg_color)
+
+        frame = ttk.Frame(dialog, padding="15 10")
+        frame.pack(fill="both", expand=True)
+        ttk.Label(frame, text="Bilder werden mittig auf 150x150 zugeschnitten und der Täterakte mit passendem Namen zugeordnet.\n"
+                              "Ordner: Dateiname = Tätername (z. B. Max_Mustermann.jpg). CSV: Spalten name und datei.").pack(anchor="w", pady=5)
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill="x", pady=5)
+        progress_bar = ttk.Progressbar(frame, mode="determinate", length=400)
+        progress_bar.pack(fill="x", pady=5)
+        status_label = ttk.Label(frame, text="")
+        status_label.pack(anchor="w")
+
+        def start(photos):
+            matched, unmatched = match_photos(photos, self.repository) # On the UI thread, like every other repository access
+            if not matched:
+                messagebox.showinfo("Bilder-Massenimport", format_summary({"attached": 0, "unchanged": 0, "failed": []}, unmatched), parent=dialog)
+                return
+            for child in buttons.winfo_children():
+                child.config(state="disabled")
+            dialog.protocol("WM_DELETE_WINDOW", lambda: None) # Keep the dialog until the pool is done
+            progress_bar.config(maximum=len(matched), value=0)
+            status_label.config(text=f"0/{len(matched)} Bilder")
+
+            def progress(done, total):
+                def update():
+                    if dialog.winfo_exists():
+                        progress_bar.config(value=done)
+                        status_label.config(text=f"{done}/{total} Bilder")
+                self.run_on_ui_thread(update)
+
+            def worker():
+                try:
+                    results = process_photos([path for _, path in matched], self.image_store, progress=progress)
+                except (OSError, RuntimeError) as e:
+                    results = [(None, str(e))] * len(matched) # Pool could not be started
+                self.run_on_ui_thread(lambda: finish(matched, unmatched, results))
+            threading.Thread(target=worker, name="photo-import", daemon=True).start()
+
+        def finish(matched, unmatched, results):
+            summary = attach_photos(self.core, self.image_store, matched, results)
+            dialog.destroy()
+            self.collect_image_garbage() # Replaced photos
+            if self.is_tab_built(self.perpetrator_files_frame):
+                self.display_selected_perpetrator_file(None)
+            messagebox.showinfo("Bilder-Massenimport", format_summary(summary, unmatched))
+
+        def choose_folder():
+            folder = filedialog.askdirectory(title="Ordner mit Täterbildern auswählen", parent=dialog)
+            if folder:
+                try:
+                    start(photos_in_folder(folder))
+                except OSError as e:
+                    messagebox.showerror("Bilder-Massenimport", f"Ordner konnte nicht gelesen werden: {e}", parent=dialog)
+
+        def choose_mapping():
+            mapping = filedialog.askopenfilename(title="Zuordnung auswählen", filetypes=[("CSV/JSONL", "*.csv *.jsonl *.ndjson"), ("Alle Dateien", "*.*")], parent=dialog)
+            if mapping:
+                try:
+                    start(photos_from_mapping(mapping))
+                except (OSError, ValueError) as e:
+                    messagebox.showerror("Bilder-Massenimport", f"Zuordnung konnte nicht gelesen werden: {e}", parent=dialog)
+
+        ttk.Button(buttons, text="Ordner wählen...", command=choose_folder).pack(side="left", padx=5)
+        ttk.Button(buttons, text="CSV-Zuordnung wählen...", command=choose_mapping).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Schließen", command=dialog.destroy).pack(side="right", padx=5)
+
     def display_perpetrator_image(self):
         """Zeigt das Straftäterbild oder einen Platzhalter im Erstellungs-/Anzeige-Tab an."""
         target_width = self.perpetrator_image_label.winfo_width() if self.perpetrator_image_label.winfo_width() > 0 else 150
@@ -1525,11 +1818,8 @@ class PoliceRPApp:
 
         if self.current_perpetrator_image_path and os.path.exists(self.current_perpetrator_image_path):
             try:
-                # Load the already cropped and resized image
-                display_image = Image.open(self.current_perpetrator_image_path)
-                # Ensure it's still within label bounds if label is smaller than 150x150
-                display_image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-                self.perpetrator_photo_image = ImageTk.PhotoImage(display_image)
+                # Already cropped to 150x150; only shrunk further if the label is smaller (cached per size)
+                self.perpetrator_photo_image = self.thumbnail_cache.get(self.current_perpetrator_image_path, (target_width, target_height))
                 self.perpetrator_image_label.config(image=self.perpetrator_photo_image, text="")
             except Exception as e:
                 messagebox.showerror("Bildfehler", f"Konnte Bild nicht laden: {e}. Zeige Platzhalter an.")
@@ -1540,28 +1830,8 @@ class PoliceRPApp:
     def load_placeholder_image_pf(self):
         """Lädt und zeigt ein Platzhalterbild an (Person mit ?) für den Erstellungs-/Anzeige-Tab."""
         try:
-            img = Image.new('RGB', (150, 150), color = (200, 200, 200) if self.settings.get("theme") == "light" else (60, 60, 60))
-            d = ImageDraw.Draw(img)
-            try:
-                font = ImageFont.truetype("arial.ttf", 80)
-            except IOError:
-                font = ImageFont.load_default()
-
-            fill_color = (100, 100, 100) if self.settings.get("theme") == "light" else (150, 150, 150)
-            outline_color = (50, 50, 50) if self.settings.get("theme") == "light" else (200, 200, 200)
-            text_color = (0, 0, 0) if self.settings.get("theme") == "light" else (255, 255, 255)
-
-            d.ellipse((30, 20, 120, 110), fill=fill_color, outline=outline_color, width=2)
-            d.line((75, 110, 75, 130), fill=fill_color, width=5)
-            d.arc((20, 100, 130, 180), 0, 180, fill=fill_color, width=5)
-
-            text = "?"
-            text_bbox = d.textbbox((0,0), text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            d.text(((150 - text_width) / 2, (150 - text_height) / 2), text, font=font, fill=text_color)
-
-            self.perpetrator_photo_image = ImageTk.PhotoImage(img)
+            # Drawn once per theme and size and shared with the other perpetrator image panel
+            self.perpetrator_photo_image = self.placeholder_cache.get(self.settings.get("theme", "light"))
             self.perpetrator_image_label.config(image=self.perpetrator_photo_image, text="")
         except Exception as e:
             print(f"Fehler beim Laden des Platzhalterbildes: {e}")
@@ -1573,6 +1843,7 @@ class PoliceRPApp:
 
     def clear_perpetrator_image(self):
         """Entfernt das Straftäterbild und zeigt den Platzhalter im Erstellungs-/Anzeige-Tab an."""
+        self.discard_unsaved_image(self.current_perpetrator_image_path)
         self.current_perpetrator_image_path = None
         self.perpetrator_photo_image = None
         self.load_placeholder_image_pf()
@@ -1580,6 +1851,7 @@ class PoliceRPApp:
     # Image handling for Perpetrator Files (edit window)
     def select_edit_perpetrator_image(self, pf_record):
         """Öffnet einen Dateidialog zur Auswahl eines Straftäterbildes für das Bearbeitungsfenster und startet den Zuschnitt."""
+        from PIL import Image
         file_path = filedialog.askopenfilename(
             title="Neues Straftäterbild auswählen",
             filetypes=[("Bilddateien", "*.png *.jpg *.jpeg *.gif *.bmp"), ("Alle Dateien", "*.*")]
@@ -1591,13 +1863,14 @@ class PoliceRPApp:
                 self.root.wait_window(cropper) # Wait for cropper dialog to close
                 
                 if cropper.cropped_image:
-                    new_image_filename = f"{uuid.uuid4()}.png"
-                    destination_path = os.path.join(self.perpetrator_images_dir, new_image_filename)
-                    cropper.cropped_image.save(destination_path)
-                    self.current_edit_perpetrator_image_path = destination_path
+                    new_image_path = self.image_store.path(self.image_store.put_image(cropper.cropped_image))
+                    if new_image_path != self.current_edit_perpetrator_image_path:
+                        self.discard_unsaved_image(self.current_edit_perpetrator_image_path) # Replaced before saving
+                    self.current_edit_perpetrator_image_path = new_image_path
                     self.display_edit_perpetrator_image()
                 else:
                     # If user cancelled cropping, revert to the image that was there before opening cropper
+                    self.discard_unsaved_image(self.current_edit_perpetrator_image_path)
                     current_image_filename = pf_record.get('image_filename')
                     if current_image_filename:
                         self.current_edit_perpetrator_image_path = os.path.join(self.perpetrator_images_dir, current_image_filename)
@@ -1609,6 +1882,7 @@ class PoliceRPApp:
                 self.clear_edit_perpetrator_image(pf_record)
         else:
             # If user cancelled file selection, revert to the image that was there before opening dialog
+            self.discard_unsaved_image(self.current_edit_perpetrator_image_path)
             current_image_filename = pf_record.get('image_filename')
             if current_image_filename:
                 self.current_edit_perpetrator_image_path = os.path.join(self.perpetrator_images_dir, current_image_filename)
@@ -1624,9 +1898,7 @@ class PoliceRPApp:
 
         if self.current_edit_perpetrator_image_path and os.path.exists(self.current_edit_perpetrator_image_path):
             try:
-                display_image = Image.open(self.current_edit_perpetrator_image_path)
-                display_image.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-                self.edit_perpetrator_photo_image = ImageTk.PhotoImage(display_image)
+                self.edit_perpetrator_photo_image = self.thumbnail_cache.get(self.current_edit_perpetrator_image_path, (target_width, target_height))
                 self.edit_perpetrator_image_label.config(image=self.edit_perpetrator_photo_image, text="")
             except Exception as e:
                 messagebox.showerror("Bildfehler", f"Konnte Bild nicht laden: {e}. Zeige Platzhalter an.", parent=self.edit_perpetrator_image_label.winfo_toplevel())
@@ -1637,28 +1909,8 @@ class PoliceRPApp:
     def load_placeholder_image_edit_pf(self):
         """Lädt und zeigt ein Platzhalterbild an (Person mit ?) für das Bearbeitungsfenster."""
         try:
-            img = Image.new('RGB', (150, 150), color = (200, 200, 200) if self.settings.get("theme") == "light" else (60, 60, 60))
-            d = ImageDraw.Draw(img)
-            try:
-                font = ImageFont.truetype("arial.ttf", 80)
-            except IOError:
-                font = ImageFont.load_default()
-
-            fill_color = (100, 100, 100) if self.settings.get("theme") == "light" else (150, 150, 150)
-            outline_color = (50, 50, 50) if self.settings.get("theme") == "light" else (200, 200, 200)
-            text_color = (0, 0, 0) if self.settings.get("theme") == "light" else (255, 255, 255)
-
-            d.ellipse((30, 20, 120, 110), fill=fill_color, outline=outline_color, width=2)
-            d.line((75, 110, 75, 130), fill=fill_color, width=5)
-            d.arc((20, 100, 130, 180), 0, 180, fill=fill_color, width=5)
-
-            text = "?"
-            text_bbox = d.textbbox((0,0), text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            d.text(((150 - text_width) / 2, (150 - text_height) / 2), text, font=font, fill=text_color)
-
-            self.edit_perpetrator_photo_image = ImageTk.PhotoImage(img)
+            # Drawn once per theme and size and shared with the other perpetrator image panel
+            self.edit_perpetrator_photo_image = self.placeholder_cache.get(self.settings.get("theme", "light"))
             self.edit_perpetrator_image_label.config(image=self.edit_perpetrator_photo_image, text="")
         except Exception as e:
             print(f"Fehler beim Laden des Platzhalterbildes im Bearbeitungsfenster: {e}")
@@ -1670,6 +1922,7 @@ class PoliceRPApp:
 
     def clear_edit_perpetrator_image(self, pf_record):
         """Entfernt das Straftäterbild und zeigt den Platzhalter im Bearbeitungsfenster an."""
+        self.discard_unsaved_image(self.current_edit_perpetrator_image_path)
         self.current_edit_perpetrator_image_path = None
         self.edit_perpetrator_photo_image = None
         self.load_placeholder_image_edit_pf()
@@ -1709,14 +1962,10 @@ class PoliceRPApp:
         list_crimes_frame.grid_rowconfigure(0, weight=1)
         list_crimes_frame.grid_columnconfigure(0, weight=1)
 
-        self.predefined_crimes_listbox = tk.Listbox(list_crimes_frame, selectmode=tk.SINGLE, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg, relief="flat", borderwidth=1) # Design: Listbox bg/fg/selection/relief
-        self.predefined_crimes_listbox.grid(row=0, column=0, sticky="nsew")
+        self.predefined_crimes_listbox = VirtualListbox(list_crimes_frame, self.format_predefined_crime_row, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg) # Only visible rows are drawn
+        self.predefined_crimes_listbox.grid(row=0, column=0, columnspan=2, sticky="nsew")
         self.predefined_crimes_listbox.bind('<<ListboxSelect>>', self.display_selected_predefined_crime)
 
-        crimes_scrollbar = ttk.Scrollbar(list_crimes_frame, orient="vertical", command=self.predefined_crimes_listbox.yview)
-        crimes_scrollbar.grid(row=0, column=1, sticky="ns")
-        self.predefined_crimes_listbox.config(yscrollcommand=crimes_scrollbar.set)
-
         # Buttons for editing/deleting predefined crimes
         button_frame = ttk.Frame(list_crimes_frame)
         button_frame.grid(row=1, column=0, columnspan=2, pady=5, sticky="ew")
@@ -1732,10 +1981,11 @@ class PoliceRPApp:
 
     def populate_predefined_crimes_list(self):
         """Füllt die Listbox der vordefinierten Straftaten."""
-        self.predefined_crimes_listbox.delete(0, tk.END)
-        for crime_obj in self.predefined_crimes:
-            display_text = f"{crime_obj['name']} ({crime_obj.get('paragraph', 'N/A')}) - {crime_obj.get('detention_units', 0)} HE, {crime_obj.get('fine', 0)} €"
-            self.predefined_crimes_listbox.insert(tk.END, display_text)
+        self.predefined_crimes_listbox.set_items(self.predefined_crimes)
+
+    def format_predefined_crime_row(self, crime_obj):
+        """Zeilentext einer vordefinierten Straftat."""
+        return f"{crime_obj['name']} ({crime_obj.get('paragraph', 'N/A')}) - {crime_obj.get('detention_units', 0)} HE, {crime_obj.get('fine', 0)} €"
 
     def display_selected_predefined_crime(self, event):
         """Zeigt Details der ausgewählten vordefinierten Straftat an."""
@@ -1769,14 +2019,16 @@ class PoliceRPApp:
             messagebox.showwarning("Warnung", "Diese Straftat existiert bereits.")
             return
 
-        self.predefined_crimes.append({
+        new_crime = {
+            "id": str(uuid.uuid4()),
             "name": name,
             "paragraph": paragraph,
             "detention_units": detention_units,
             "fine": fine
-        })
-        self.save_data(self.predefined_crimes, self.predefined_crimes_file)
-        self.populate_predefined_crimes_list()
+        }
+        self.predefined_crimes.append(new_crime)
+        self.persist("predefined_crimes", "insert", new_crime)
+        self.predefined_crimes_listbox.row_inserted(len(self.predefined_crimes) - 1)
         self.manage_crime_name_entry.delete(0, tk.END)
         self.manage_crime_paragraph_entry.delete(0, tk.END)
         self.manage_crime_detention_entry.delete(0, tk.END)
@@ -1848,8 +2100,8 @@ class PoliceRPApp:
             crime_obj['paragraph'] = new_paragraph
             crime_obj['detention_units'] = new_detention
             crime_obj['fine'] = new_fine
-            self.save_data(self.predefined_crimes, self.predefined_crimes_file)
-            self.populate_predefined_crimes_list()
+            self.persist("predefined_crimes", "update", crime_obj)
+            self.predefined_crimes_listbox.refresh_row(index)
             messagebox.showinfo("Erfolg", "Straftat erfolgreich aktualisiert!", parent=edit_window)
             edit_window.destroy()
 
@@ -1863,9 +2115,9 @@ class PoliceRPApp:
             return
         index = selected_indices[0]
         if messagebox.askyesno("Bestätigen", "Möchten Sie diese Straftat wirklich löschen?"):
-            del self.predefined_crimes[index]
-            self.save_data(self.predefined_crimes, self.predefined_crimes_file)
-            self.populate_predefined_crimes_list()
+            crime_to_delete = self.predefined_crimes.pop(index)
+            self.persist("predefined_crimes", "delete", crime_to_delete)
+            self.predefined_crimes_listbox.row_deleted(index)
             messagebox.showinfo("Erfolg", "Straftat erfolgreich gelöscht!")
 
     # --- Report Presets Tab Functions ---
@@ -1901,12 +2153,15 @@ class PoliceRPApp:
         button_frame.grid_columnconfigure(0, weight=1)
         button_frame.grid_columnconfigure(1, weight=1)
         button_frame.grid_columnconfigure(2, weight=1)
+        button_frame.grid_columnconfigure(3, weight=1)
         copy_template_button = ttk.Button(button_frame, text="Vorlage kopieren", command=self.copy_selected_report_preset_template)
         copy_template_button.grid(row=0, column=0, padx=5, sticky="ew")
         edit_report_preset_button = ttk.Button(button_frame, text="Preset bearbeiten", command=self.start_editing_report_preset)
         edit_report_preset_button.grid(row=0, column=1, padx=5, sticky="ew")
         delete_report_preset_button = ttk.Button(button_frame, text="Preset löschen", command=self.delete_report_preset)
         delete_report_preset_button.grid(row=0, column=2, padx=5, sticky="ew")
+        batch_report_button = ttk.Button(button_frame, text="Stapel erzeugen", command=self.batch_generate_reports)
+        batch_report_button.grid(row=0, column=3, padx=5, sticky="ew")
 
         self.fill_report_preset_frame = ttk.LabelFrame(content_frame, text="Preset ausfüllen & Bericht erstellen", padding="15 10") # Design: LabelFrame
         self.fill_report_preset_frame.pack(fill="both", expand=True, pady=10, padx=10)
@@ -1918,7 +2173,9 @@ class PoliceRPApp:
         self.dynamic_inputs_frame.grid(row=0, column=0, columnspan=3, sticky="ew", pady=5)
         self.dynamic_inputs_frame.grid_columnconfigure(1, weight=1)
 
-        ttk.Button(self.fill_report_preset_frame, text="Bericht erstellen", command=self.generate_report, style="Accent.TButton").grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
+        ttk.Button(self.fill_report_preset_frame, text="Bericht erstellen", command=self.generate_report, style="Accent.TButton").grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.live_preview_var = tk.BooleanVar(value=self.settings.get("live_preview", True))
+        ttk.Checkbutton(self.fill_report_preset_frame, text="Live-Vorschau", variable=self.live_preview_var, command=self.toggle_live_preview).grid(row=1, column=2, padx=5, pady=5, sticky="w")
         self.generated_report_text = scrolledtext.ScrolledText(self.fill_report_preset_frame, wrap=tk.WORD, height=10, state='disabled', bg=self.entry_bg, fg=self.entry_fg, insertbackground=self.entry_fg, relief="flat", borderwidth=1) # Design: ScrolledText bg/fg/relief
         self.generated_report_text.grid(row=2, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
         self.fill_report_preset_frame.grid_rowconfigure(2, weight=1)
@@ -1947,28 +2204,29 @@ class PoliceRPApp:
         for widget in self.dynamic_inputs_frame.winfo_children():
             widget.destroy()
         self.dynamic_input_widgets = {}
+        self.dynamic_input_vars = {} # Keep the StringVars alive, they drive the live preview
+        self.live_preview = None
 
-        template_string = self.selected_report_preset['template_string']
-        placeholders = self.extract_placeholders(template_string)
+        compiled_template = self.template_cache.get(self.selected_report_preset)
 
         row_idx = 0
-        unique_placeholders = []
-        for p in placeholders:
-            if p not in unique_placeholders:
-                unique_placeholders.append(p)
-
-        for placeholder in unique_placeholders:
+        for placeholder in compiled_template.placeholders: # Already unique, in order of appearance
             label_text = placeholder.replace('[', '').replace(']', '') + ":"
             ttk.Label(self.dynamic_inputs_frame, text=label_text).grid(row=row_idx, column=0, sticky="w", padx=5, pady=2)
-            entry = ttk.Entry(self.dynamic_inputs_frame)
+            input_var = tk.StringVar()
+            input_var.trace_add("write", lambda *args, p=placeholder: self.update_live_preview(p))
+            entry = ttk.Entry(self.dynamic_inputs_frame, textvariable=input_var)
             entry.grid(row=row_idx, column=1, sticky="ew", padx=5, pady=2)
             self.dynamic_input_widgets[placeholder] = entry
+            self.dynamic_input_vars[placeholder] = input_var
             row_idx += 1
 
-        if '[Datum]' in self.dynamic_input_widgets:
-            self.dynamic_input_widgets['[Datum]'].insert(0, datetime.now().strftime("%d.%m.%Y"))
-        if '[uhrzeit]' in self.dynamic_input_widgets:
-            self.dynamic_input_widgets['[uhrzeit]'].insert(0, datetime.now().strftime("%H:%M Uhr"))
+        # Keys are the placeholder names without brackets
+        if 'Datum' in self.dynamic_input_widgets:
+            self.dynamic_input_widgets['Datum'].insert(0, datetime.now().strftime("%d.%m.%Y"))
+        if 'uhrzeit' in self.dynamic_input_widgets:
+            self.dynamic_input_widgets['uhrzeit'].insert(0, datetime.now().strftime("%H:%M Uhr"))
+        self.start_live_preview()
 
     def extract_placeholders(self, template_string):
         """Extracts placeholders from the template string."""
@@ -1982,8 +2240,9 @@ class PoliceRPApp:
         if not name or not template_string:
             messagebox.showwarning("Eingabefehler", "Name und Vorlage des Presets dürfen nicht leer sein.")
             return
-        self.report_presets.append({"id": str(uuid.uuid4()), "name": name, "template_string": template_string})
-        self.save_data(self.report_presets, self.report_presets_file)
+        new_preset = {"id": str(uuid.uuid4()), "name": name, "template_string": template_string}
+        self.report_presets.append(new_preset)
+        self.persist("report_presets", "insert", new_preset)
         self.populate_report_presets_list()
         self.new_report_preset_name_entry.delete(0, tk.END)
         self.new_report_preset_template_text.delete(1.0, tk.END)
@@ -2025,7 +2284,7 @@ class PoliceRPApp:
                 return
             self.report_presets[self.editing_report_preset_index]['name'] = new_name
             self.report_presets[self.editing_report_preset_index]['template_string'] = new_template_string
-            self.save_data(self.report_presets, self.report_presets_file)
+            self.persist("report_presets", "update", self.report_presets[self.editing_report_preset_index])
             self.populate_report_presets_list()
             if hasattr(self, 'selected_report_preset') and self.selected_report_preset == preset:
                 self.display_selected_report_preset_template(None)
@@ -2041,13 +2300,15 @@ class PoliceRPApp:
             return
         index = selected_indices[0]
         if messagebox.askyesno("Bestätigen", "Möchten Sie dieses Preset wirklich löschen?"):
-            del self.report_presets[index]
-            self.save_data(self.report_presets, self.report_presets_file)
+            preset_to_delete = self.report_presets.pop(index)
+            self.persist("report_presets", "delete", preset_to_delete)
+            self.template_cache.discard(preset_to_delete.get('id'))
             self.populate_report_presets_list()
             if hasattr(self, 'selected_report_preset') and self.report_presets_listbox.curselection() == ():
                  for widget in self.dynamic_inputs_frame.winfo_children():
                      widget.destroy()
                  self.dynamic_input_widgets = {}
+                 self.live_preview = None
                  self.generated_report_text.config(state='normal')
                  self.generated_report_text.delete(1.0, tk.END)
                  self.generated_report_text.config(state='disabled')
@@ -2071,37 +2332,90 @@ class PoliceRPApp:
             messagebox.showwarning("Auswahlfehler", "Bitte wählen Sie zuerst ein Preset aus.")
             return
 
-        template_string = self.selected_report_preset['template_string']
-        generated_content = template_string
-
-        # Extract all possible placeholders from the template
-        all_placeholders_in_template = re.findall(r'\[(.*?)\]', template_string)
-        
         # Collect all placeholder values from user inputs
         placeholder_values = {}
         for placeholder_key, entry_widget in self.dynamic_input_widgets.items():
             placeholder_values[placeholder_key] = entry_widget.get().strip()
 
-        # First pass: Replace filled placeholders
-        for placeholder_key_raw, user_input in placeholder_values.items():
-            full_placeholder = f"[{placeholder_key_raw}]"
-            generated_content = generated_content.replace(full_placeholder, user_input)
-
-        # Second pass: Remove any remaining, unfilled placeholders (with their brackets)
-        # We need to iterate through the *original* placeholders from the template
-        # and check if they still exist in the generated content.
-        for placeholder_raw in all_placeholders_in_template:
-            full_placeholder = f"[{placeholder_raw}]"
-            if full_placeholder in generated_content:
-                generated_content = generated_content.replace(full_placeholder, "")
-
+        # Single pass over the precompiled template; unfilled placeholders are removed
+        compiled_template = self.template_cache.get(self.selected_report_preset)
+        generated_content = compiled_template.render(placeholder_values)
 
         self.generated_report_text.config(state='normal')
         self.generated_report_text.delete(1.0, tk.END)
         self.generated_report_text.insert(tk.END, generated_content)
         self.generated_report_text.config(state='disabled')
+        if self.live_preview_var.get(): # The widget shows exactly this rendering, keep patching it from here
+            self.live_preview = LiveRender(compiled_template, placeholder_values)
         messagebox.showinfo("Bericht erstellt", "Der Bericht wurde erfolgreich generiert!")
 
+    def batch_generate_reports(self):
+        """Erzeugt mit dem ausgewählten Preset einen Bericht pro Zeile einer CSV- oder JSONL-Datei."""
+        selected_indices = self.report_presets_listbox.curselection()
+        if not selected_indices:
+            messagebox.showwarning("Auswahlfehler", "Bitte wählen Sie ein Preset für die Stapelverarbeitung aus.")
+            return
+        template_string = self.report_presets[selected_indices[0]]['template_string']
+        input_path = filedialog.askopenfilename(
+            title="Eingabedatei auswählen (Spalten = Platzhalternamen)",
+            filetypes=[("CSV oder JSONL", "*.csv *.jsonl *.ndjson"), ("Alle Dateien", "*.*")]
+        )
+        if not input_path:
+            return
+        combined = messagebox.askyesno("Ausgabe", "Alle Berichte in eine gemeinsame Datei schreiben?\n\n(Nein = ein Ordner mit einer Datei pro Zeile)")
+        if combined:
+            output_path = filedialog.asksaveasfilename(title="Ausgabedatei", defaultextension=".txt", filetypes=[("Textdateien", "*.txt")])
+        else:
+            output_path = filedialog.askdirectory(title="Ausgabeordner")
+        if not output_path:
+            return
+
+        def run():
+            # Rows are streamed, so large input files neither block the UI nor fill the memory
+            try:
+                count = generate_batch(template_string, input_path, output_path, combined)
+                self.run_on_ui_thread(lambda: messagebox.showinfo("Stapelverarbeitung", f"{count} Berichte erstellt in {output_path}"))
+            except (OSError, ValueError, csv.Error) as e:
+                self.run_on_ui_thread(lambda e=e: messagebox.showerror("Stapelverarbeitung", f"Fehler bei der Stapelverarbeitung: {e}")) # e is unbound once the except block ends
+        threading.Thread(target=run, daemon=True).start()
+
+    def toggle_live_preview(self):
+        """Schaltet die Live-Vorschau um und speichert die Einstellung."""
+        self.settings["live_preview"] = self.live_preview_var.get()
+        self.save_settings()
+        if self.live_preview_var.get():
+            self.start_live_preview()
+        else:
+            self.live_preview = None
+
+    def start_live_preview(self):
+        """Zeigt den Bericht einmal komplett an; danach werden nur noch die geänderten Platzhalter ersetzt."""
+        self.live_preview = None
+        if not self.live_preview_var.get() or not getattr(self, 'selected_report_preset', None):
+            return
+        placeholder_values = {key: entry_widget.get().strip() for key, entry_widget in self.dynamic_input_widgets.items()}
+        self.live_preview = LiveRender(self.template_cache.get(self.selected_report_preset), placeholder_values)
+        self.generated_report_text.config(state='normal')
+        self.generated_report_text.delete(1.0, tk.END)
+        self.generated_report_text.insert(tk.END, self.live_preview.text)
+        self.generated_report_text.config(state='disabled')
+
+    def update_live_preview(self, placeholder):
+        """Ersetzt im Vorschau-Text nur die Stellen, an denen der geänderte Platzhalter steht."""
+        if not self.live_preview or placeholder not in self.dynamic_input_widgets:
+            return # Not started yet (e.g. while the default date is filled in)
+        edits = self.live_preview.update(placeholder, self.dynamic_input_widgets[placeholder].get().strip())
+        if not edits:
+            return
+        self.generated_report_text.config(state='normal')
+        for offset, old_length, new_text in edits: # Back to front, so earlier offsets stay valid
+            start = f"1.0 + {offset} chars"
+            if old_length:
+                self.generated_report_text.delete(start, f"1.0 + {offset + old_length} chars")
+            if new_text:
+                self.generated_report_text.insert(start, new_text)
+        self.generated_report_text.config(state='disabled')
+
     def copy_generated_report(self):
         """Kopiert den generierten Bericht in die Zwischenablage."""
         report_content = self.generated_report_text.get(1.0, tk.END).strip()
@@ -2114,6 +2428,7 @@ class PoliceRPApp:
 
     def export_signature_as_image(self):
         """Exportiert den Unterschriftsteil als Bild."""
+        from PIL import Image, ImageDraw, ImageFont
         report_content = self.generated_report_text.get(1.0, tk.END).strip()
         if not report_content:
             messagebox.showwarning("Fehler", "Bitte generieren Sie zuerst einen Bericht.")
@@ -2182,6 +2497,94 @@ class PoliceRPApp:
         except Exception as e:
             messagebox.showerror("Exportfehler", f"Fehler beim Exportieren der Unterschrift als Bild: {e}")
 
+    # --- Search Tab Functions ---
+    def create_search_tab(self, parent_frame):
+        """Erstellt die Widgets für den Such-Tab."""
+        content_frame, self.search_canvas = self._create_scrollable_tab(parent_frame)
+        content_frame.grid_columnconfigure(0, weight=1)
+
+        search_group = ttk.LabelFrame(content_frame, text="Alle Akten durchsuchen", padding="15 10")
+        search_group.grid(row=0, column=0, pady=10, padx=10, sticky="ew")
+        search_group.grid_columnconfigure(1, weight=1)
+
+        ttk.Label(search_group, text="Suchbegriff:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        self.search_entry = ttk.Entry(search_group)
+        self.search_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
+        self.search_entry.bind("<KeyRelease>", self.schedule_search)
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
+        self.search_status_label = ttk.Label(search_group, text="Sucht in Notizen, Anzeigen und Täterakten (auch Wortanfänge und Tippfehler).")
+        self.search_status_label.grid(row=1, column=0, columnspan=2, sticky="w", padx=5, pady=2)
+        self.search_results = [] # (collection, record) pairs backing the result list
+        self.search_result_limit = 200
+
+        results_group = ttk.LabelFrame(content_frame, text="Treffer", padding="15 10")
+        results_group.grid(row=1, column=0, pady=10, padx=10, sticky="nsew")
+        results_group.grid_rowconfigure(0, weight=1)
+        results_group.grid_columnconfigure(0, weight=1)
+
+        self.search_results_listbox = VirtualListbox(results_group, self.format_search_result, height=20, font=("Arial", 10), bg=self.entry_bg, fg=self.entry_fg, selectbackground=self.select_bg, selectforeground=self.select_fg)
+        self.search_results_listbox.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        ttk.Button(results_group, text="Im Tab anzeigen", command=self.open_selected_search_result).grid(row=1, column=0, pady=5)
+
+    def format_search_result(self, result):
+        """Formats one row of the search results."""
+        collection, record = result
+        if collection == "reports":
+            return f"[Anzeige] {record.get('report_id', 'N/A')} - {record.get('perpetrator_name', 'N/A')} ({record.get('type', 'N/A')})"
+        if collection == "perpetrator_files":
+            return f"[Täterakte] {record.get('name', 'N/A')} ({record.get('dob', 'N/A')})"
+        return f"[Notiz] {record.get('title', '')}"
+
+    def schedule_search(self, event=None):
+        """Startet die Suche erst, wenn die Eingabe kurz pausiert."""
+        if event is not None and event.keysym == "Return":
+            return # Already handled by the <Return> binding
+        if self.pending_search:
+            self.root.after_cancel(self.pending_search)
+        self.pending_search = self.root.after(200, self.run_search)
+
+    def run_search(self):
+        """Durchsucht den Volltextindex und zeigt die Treffer an."""
+        if self.pending_search:
+            self.root.after_cancel(self.pending_search)
+            self.pending_search = None
+        query = self.search_entry.get().strip()
+        start = time.perf_counter()
+        self.search_results = self.search_index.search(query, self.search_result_limit) if query else []
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.search_results_listbox.set_items(self.search_results)
+        if query:
+            shown = "Die besten " if len(self.search_results) == self.search_result_limit else ""
+            self.search_status_label.config(text=f"{shown}{len(self.search_results)} Treffer ({elapsed_ms:.1f} ms)")
+        else:
+            self.search_status_label.config(text="Sucht in Notizen, Anzeigen und Täterakten (auch Wortanfänge und Tippfehler).")
+
+    def open_selected_search_result(self):
+        """Wechselt zum Tab des ausgewählten Treffers und wählt den Datensatz dort aus."""
+        selected_indices = self.search_results_listbox.curselection()
+        if not selected_indices:
+            messagebox.showwarning("Auswahlfehler", "Bitte wählen Sie einen Treffer aus.")
+            return
+        collection, record = self.search_results[selected_indices[0]]
+        tab = {"reports": self.reports_frame, "perpetrator_files": self.perpetrator_files_frame, "notes": self.notes_frame}[collection]
+        self.ensure_tab_built(tab) # The target tab may not have been opened yet
+        if collection == "reports":
+            listbox, records, display = self.reports_listbox, self.reports, self.display_selected_report
+        elif collection == "perpetrator_files":
+            listbox, records, display = self.perpetrator_files_listbox, self.perpetrator_files, self.display_selected_perpetrator_file
+        else:
+            listbox, records, display = self.notes_listbox, self.sorted_notes, self.display_selected_note
+        try:
+            index = records.index(record)
+        except ValueError:
+            messagebox.showwarning("Nicht gefunden", "Der Datensatz existiert nicht mehr.")
+            return
+        self.notebook.select(tab)
+        listbox.selection_clear(0, tk.END)
+        listbox.selection_set(index)
+        listbox.see(index)
+        display(None)
+
     # --- Settings Tab Functions ---
     def create_settings_tab(self, parent_frame):
         """Creates widgets for the Settings tab."""
@@ -2199,20 +2602,110 @@ class PoliceRPApp:
         
         dark_mode_radio = ttk.Radiobutton(theme_group, text="Dark Mode", variable=self.theme_var, value="dark", command=self.change_theme)
         dark_mode_radio.pack(padx=10, pady=2, anchor="w")
-        
+
+        storage_group = ttk.LabelFrame(content_frame, text="Datenspeicher", padding="15 10")
+        storage_group.pack(fill="x", pady=10, padx=10)
+
+        ttk.Label(storage_group, text="Speicherformat auswählen (wird nach einem Neustart aktiv):").pack(padx=5, pady=5, anchor="w")
+
+        self.storage_backend_var = tk.StringVar(value=self.settings.get("storage_backend", "json"))
+
+        ttk.Radiobutton(storage_group, text="JSON-Dateien", variable=self.storage_backend_var, value="json", command=self.change_storage_backend).pack(padx=10, pady=2, anchor="w")
+        ttk.Radiobutton(storage_group, text="JSON-Dateien mit Änderungsjournal (schnelles Speichern bei großen Datenmengen)", variable=self.storage_backend_var, value="journal", command=self.change_storage_backend).pack(padx=10, pady=2, anchor="w")
+        ttk.Radiobutton(storage_group, text="SQLite-Datenbank (importiert vorhandene JSON-Dateien beim ersten Start)", variable=self.storage_backend_var, value="sqlite", command=self.change_storage_backend).pack(padx=10, pady=2, anchor="w")
+        ttk.Radiobutton(storage_group, text="Gemeinsamer Server (server.py, mehrere Apps teilen sich die Daten)", variable=self.storage_backend_var, value="server", command=self.change_storage_backend).pack(padx=10, pady=2, anchor="w")
+
+        self.lazy_loading_var = tk.BooleanVar(value=self.settings.get("lazy_loading", False))
+        ttk.Checkbutton(storage_group, text="Anzeigen erst beim Anzeigen vollständig laden (große Archive, nur JSON-Dateien)", variable=self.lazy_loading_var, command=self.toggle_lazy_loading).pack(padx=10, pady=2, anchor="w")
+
+        server_frame = ttk.Frame(storage_group)
+        server_frame.pack(fill="x", padx=30, pady=2)
+        ttk.Label(server_frame, text="Server-Adresse:").pack(side="left")
+        self.server_url_entry = ttk.Entry(server_frame, width=40)
+        self.server_url_entry.insert(0, self.settings.get("server_url", DEFAULT_SERVER_URL))
+        self.server_url_entry.pack(side="left", padx=5)
+        self.server_url_entry.bind("<Return>", self.change_server_url)
+        self.server_url_entry.bind("<FocusOut>", self.change_server_url)
+
+        totals_group = ttk.LabelFrame(content_frame, text="Strafsummen der Täterakten", padding="15 10")
+        totals_group.pack(fill="x", pady=10, padx=10)
+
+        ttk.Label(totals_group, text="Hafteinheiten und Geldstrafen werden beim Start im Hintergrund mit den verknüpften Anzeigen abgeglichen (nicht beim bedarfsweisen Laden der Anzeigen).").pack(padx=5, pady=5, anchor="w")
+        self.auto_repair_totals_var = tk.BooleanVar(value=self.settings.get("auto_repair_totals", False))
+        ttk.Checkbutton(totals_group, text="Abweichungen beim Start ohne Rückfrage korrigieren", variable=self.auto_repair_totals_var, command=self.toggle_auto_repair_totals).pack(padx=10, pady=2, anchor="w")
+        ttk.Button(totals_group, text="Jetzt prüfen", command=self.check_penalty_totals).pack(padx=10, pady=5, anchor="w")
+
+        images_group = ttk.LabelFrame(content_frame, text="Täterbilder", padding="15 10")
+        images_group.pack(fill="x", pady=10, padx=10)
+
+        ttk.Label(images_group, text="Gleiche Bilder werden nur einmal gespeichert; nicht mehr verwendete werden beim Ersetzen oder über \"Jetzt aufräumen\" gelöscht.").pack(padx=5, pady=5, anchor="w")
+        images_buttons = ttk.Frame(images_group)
+        images_buttons.pack(fill="x", padx=5)
+        ttk.Button(images_buttons, text="Speicherbericht", command=self.show_image_storage_report).pack(side="left", padx=5, pady=5)
+        ttk.Button(images_buttons, text="Jetzt aufräumen", command=lambda: self.collect_image_garbage(show_result=True)).pack(side="left", padx=5, pady=5)
+
+        ttk.Label(images_group, text="Format für neue Bilder (Metadaten wie EXIF werden immer entfernt):").pack(padx=5, pady=5, anchor="w")
+        self.image_format_var = tk.StringVar(value=self.settings.get("image_format", DEFAULT_IMAGE_FORMAT))
+        for image_format, (_, description) in IMAGE_FORMATS.items():
+            ttk.Radiobutton(images_group, text=description, variable=self.image_format_var, value=image_format, command=self.change_image_format).pack(padx=10, pady=2, anchor="w")
+        reencode_frame = ttk.Frame(images_group)
+        reencode_frame.pack(fill="x", padx=5)
+        self.reencode_images_button = ttk.Button(reencode_frame, text="Vorhandene Bilder neu kodieren", command=self.reencode_images)
+        self.reencode_images_button.pack(side="left", padx=5, pady=5)
+        self.reencode_images_status = ttk.Label(reencode_frame, text="")
+        self.reencode_images_status.pack(side="left", padx=5)
+
     def change_theme(self):
         """Changes the application theme and saves the setting."""
         new_theme = self.theme_var.get()
         if self.settings.get("theme") != new_theme:
             self.settings["theme"] = new_theme
             self.save_settings()
-            self.apply_theme()
-            self.populate_reports_list() # To update the count colors if needed
-            self.display_perpetrator_image() # To update placeholder image
-            self.display_edit_perpetrator_image() # To update placeholder image
+            self.apply_theme() # Also recolors the visible rows of the lists
+            if self.is_tab_built(self.perpetrator_files_frame):
+                self.display_perpetrator_image() # To update placeholder image
+            if hasattr(self, 'edit_perpetrator_image_label') and self.edit_perpetrator_image_label.winfo_exists():
+                self.display_edit_perpetrator_image() # To update placeholder image
+
+    def change_storage_backend(self):
+        """Speichert das gewählte Speicher-Backend; es wird beim nächsten Start verwendet."""
+        new_backend = self.storage_backend_var.get()
+        if self.settings.get("storage_backend", "json") != new_backend:
+            self.settings["storage_backend"] = new_backend
+            self.save_settings()
+            messagebox.showinfo("Datenspeicher", "Das neue Speicherformat wird nach einem Neustart der App verwendet.")
+
+    def toggle_lazy_loading(self):
+        """Speichert, ob Anzeigen bedarfsweise geladen werden; wirkt ab dem nächsten Start."""
+        self.settings["lazy_loading"] = self.lazy_loading_var.get()
+        self.save_settings()
+        messagebox.showinfo("Datenspeicher", "Die Einstellung wird nach einem Neustart der App verwendet.")
+
+    def toggle_auto_repair_totals(self):
+        """Speichert, ob falsche Strafsummen beim Start ohne Rückfrage korrigiert werden."""
+        self.settings["auto_repair_totals"] = self.auto_repair_totals_var.get()
+        self.save_settings()
+
+    def change_image_format(self):
+        """Speichert das Format für neu gespeicherte Täterbilder."""
+        new_format = self.image_format_var.get()
+        if self.settings.get("image_format", DEFAULT_IMAGE_FORMAT) != new_format:
+            self.settings["image_format"] = new_format
+            self.image_store.image_format = new_format
+            self.save_settings()
+
+    def change_server_url(self, event=None):
+        """Speichert die Server-Adresse; sie wird beim nächsten Start verwendet."""
+        new_url = self.server_url_entry.get().strip()
+        if new_url and self.settings.get("server_url", DEFAULT_SERVER_URL) != new_url:
+            self.settings["server_url"] = new_url
+            self.save_settings()
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "cli": # Headless: python PDApp.py cli <command> ...
+        from cli import main
+        sys.exit(main(sys.argv[2:]))
     root = tk.Tk()
     app = PoliceRPApp(root)
     root.mainloop()
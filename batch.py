@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from templates import CompiledTemplate
+
+COMBINED_SEPARATOR = "\n\n" + "-" * 40 + "\n\n" # Between reports in a combined output file
+
+
+def default_values():
+    """Vorbelegungen wie im Bericht-Presets-Tab: aktuelles Datum und Uhrzeit."""
+    now = datetime.now()
+    return {"Datum": now.strftime("%d.%m.%Y"), "uhrzeit": now.strftime("%H:%M Uhr")}
+
+
+def iter_rows(path):
+    """Liest Eingabezeilen als dicts aus einer CSV- (mit Kopfzeile) oder JSONL-Datei, eine nach der anderen."""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(f"Zeile {line_number} in {path} ist kein JSON-Objekt.")
+                yield row
+        return
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.DictReader(f, dialect=dialect)
+
+
+def row_values(row, defaults):
+    """Platzhalterwerte einer Zeile; leere Datum/uhrzeit-Felder bekommen die Vorbelegung."""
+    values = {str(key).strip(): str(value).strip() for key, value in row.items() if key is not None and value is not None}
+    for key, value in defaults.items():
+        if not values.get(key):
+            values[key] = value
+    return values
+
+
+def render_rows(template_string, rows, defaults=None):
+    """Erzeugt für jede Zeile den fertigen Bericht (Generator, hält nie alle Berichte im Speicher)."""
+    compiled = CompiledTemplate(template_string)
+    defaults = default_values() if defaults is None else defaults
+    for row in rows:
+        yield compiled.render(row_values(row, defaults))
+
+
+def write_reports_to_directory(reports, directory, prefix="bericht"):
+    """Schreibt jeden Bericht in eine eigene Textdatei. Gibt die Anzahl zurück."""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, report in enumerate(reports, 1):
+        with open(os.path.join(directory, f"{prefix}_{count:05d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(report)
+    return count
+
+
+def write_reports_to_file(reports, filename):
+    """Schreibt alle Berichte nacheinander in eine Datei (atomar ersetzt). Gibt die Anzahl zurück."""
+    temp_filename = f"{filename}.tmp"
+    count = 0
+    try:
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            for count, report in enumerate(reports, 1):
+                if count > 1:
+                    f.write(COMBINED_SEPARATOR)
+                f.write(report)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+    return count
+
+
+def generate_batch(template_string, input_path, output_path, combined=False):
+    """Erzeugt Berichte für alle Zeilen von input_path, mit combined=True in einer Datei, sonst eine Datei pro Zeile."""
+    reports = render_rows(template_string, iter_rows(input_path))
+    if combined:
+        return write_reports_to_file(reports, output_path)
+    return write_reports_to_directory(reports, output_path)
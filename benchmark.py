@@ -0,0 +1,273 @@
+"""Benchmark für PD-Akten-Helfer mit synthetischen Daten; vergleicht optional mit einem früheren Lauf (--baseline)."""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+import uuid
+from datetime import datetime, timedelta
+
+import PDApp
+import server
+from core import DATA_FILES, AktenCore, create_storage
+from storage import JsonStorage, write_json_file
+
+CRIME_NAMES = ["Diebstahl", "Raub", "Körperverletzung", "Sachbeschädigung", "Einbruch", "Betrug", "Drogenhandel", "Nötigung", "Beleidigung", "Hausfriedensbruch"]
+FIRST_NAMES = ["Max", "Erika", "Jürgen", "Hans", "Tom", "Lena", "Ali", "Sophie", "Paul", "Mia"]
+LAST_NAMES = ["Mustermann", "Musterfrau", "Özdemir", "Müller", "Berger", "Schmidt", "Weber", "Wagner", "Becker", "Hoffmann"]
+DEFAULT_SIZES = [1000, 10000, 100000]
+STORAGE_BACKENDS = ("json", "journal", "sqlite", "server") # "server" runs server.py in a thread over JSON files
+REGRESSION_THRESHOLD = 1.2 # Median may get at most 20 % slower than the baseline
+
+
+def generate_dataset(directory, size, seed=42):
+    """Schreibt synthetische Datendateien mit `size` Anzeigen, Notizen und Straftaten und size // 10 Täterakten."""
+    rng = random.Random(seed)
+    start_time = datetime(2024, 1, 1)
+
+    crimes = []
+    for i in range(size):
+        crimes.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"{rng.choice(CRIME_NAMES)} {i}", "paragraph": f"§ {rng.randint(1, 400)} StGB", "detention_units": rng.randint(1, 20), "fine": rng.randint(10, 2000)})
+
+    perpetrators = []
+    for i in range(max(1, size // 10)):
+        perpetrators.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "dob": f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2005)}",
+            "birthplace": rng.choice(["Berlin", "Hamburg", "München", "Köln", "Los Santos"]),
+            "description": "Synthetische Täterakte für den Benchmark.",
+            "image_filename": None,
+            "timestamp": (start_time + timedelta(minutes=i)).isoformat(),
+            "total_detention_units": 0,
+            "total_fine": 0,
+            "linked_report_ids": [],
+        })
+
+    reports = []
+    for i in range(size):
+        pf = rng.choice(perpetrators)
+        committed = [dict(rng.choice(crimes), count=rng.randint(1, 3)) for _ in range(rng.randint(1, 5))]
+        report = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "report_id": f"AZ{i:08d}",
+            "perpetrator_name": pf["name"],
+            "type": rng.choice(["Strafanzeige", "Ordnungswidrigkeit", "Festnahme"]),
+            "crimes_committed": committed,
+            "description": "Synthetische Anzeige für den Benchmark.",
+            "timestamp": (start_time + timedelta(minutes=i)).isoformat(),
+            "linked_perpetrator_id": pf["id"],
+        }
+        pf["linked_report_ids"].append(report["id"])
+        pf["total_detention_units"] += sum(c["detention_units"] * c["count"] for c in committed)
+        pf["total_fine"] += sum(c["fine"] * c["count"] for c in committed)
+        reports.append(report)
+
+    notes = []
+    for i in range(size):
+        notes.append({"id": str(uuid.UUID(int=rng.getrandbits(128))), "title": f"Notiz {i}", "content": "Synthetische Notiz für den Benchmark.", "timestamp": (start_time + timedelta(minutes=i)).isoformat()})
+
+    os.makedirs(os.path.join(directory, "taeterakten", "bilder"), exist_ok=True)
+    write_json_file(os.path.join(directory, "anzeigen.json"), reports)
+    write_json_file(os.path.join(directory, "taeterakten", "taeterakten.json"), perpetrators)
+    write_json_file(os.path.join(directory, "notizen.json"), notes)
+    write_json_file(os.path.join(directory, "predefined_crimes.json"), crimes)
+    # Synchronous saves make save timings comparable between runs
+    write_json_file(os.path.join(directory, "settings.json"), {"theme": "light", "storage_backend": "json", "background_saves": False})
+
+
+def measure(func, repeat):
+    """Führt func `repeat`-mal aus und gibt Minimum und Median in Millisekunden zurück."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3), "repeat": repeat}
+
+
+class SilentMessageboxes:
+    """Ersetzt die modalen Messageboxen während des Laufs, damit nichts auf einen Klick wartet."""
+    names = ("showinfo", "showwarning", "showerror", "askyesno")
+
+    def __enter__(self):
+        self.originals = {name: getattr(PDApp.messagebox, name) for name in self.names}
+        for name in self.names:
+            setattr(PDApp.messagebox, name, lambda *args, **kwargs: True)
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, func in self.originals.items():
+            setattr(PDApp.messagebox, name, func)
+
+
+def run_size(size, repeat):
+    """Misst alle Benchmarks für eine Datenmenge und gibt {Name: Messwerte} zurück."""
+    results = {}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pdakten-bench-") as directory:
+        generate_dataset(directory, size)
+        os.chdir(directory) # The app works with paths relative to the working directory
+        root = tk.Tk()
+        root.withdraw()
+        try:
+            with SilentMessageboxes():
+                start = time.perf_counter()
+                app = PDApp.PoliceRPApp(root)
+                root.update_idletasks()
+                startup_ms = round((time.perf_counter() - start) * 1000, 3)
+                results["startup"] = {"min_ms": startup_ms, "median_ms": startup_ms, "repeat": 1} # Cold start to first frame, measured once
+
+                for frame in (app.reports_frame, app.perpetrator_files_frame, app.manage_crimes_frame, app.report_presets_frame):
+                    app.ensure_tab_built(frame)
+                root.update_idletasks()
+
+                results["populate_notes_list"] = measure(app.populate_notes_list, repeat)
+                results["populate_reports_list"] = measure(app.populate_reports_list, repeat)
+                results["populate_perpetrator_files_list"] = measure(app.populate_perpetrator_files_list, repeat)
+                results["populate_predefined_crimes_list"] = measure(app.populate_predefined_crimes_list, repeat)
+                results["populate_report_presets_list"] = measure(app.populate_report_presets_list, repeat)
+
+                # Perpetrator file with the most linked reports
+                busiest = max(range(len(app.perpetrator_files)), key=lambda i: len(app.perpetrator_files[i]['linked_report_ids']))
+                app.perpetrator_files_listbox.selection_set(busiest)
+                results["display_selected_perpetrator_file"] = measure(lambda: app.display_selected_perpetrator_file(None), repeat)
+
+                # Longest preset template, every placeholder filled
+                longest = max(range(len(app.report_presets)), key=lambda i: len(app.report_presets[i]['template_string']))
+                app.report_presets_listbox.selection_set(longest)
+                app.display_selected_report_preset_template(None)
+                for entry in app.dynamic_input_widgets.values():
+                    entry.delete(0, tk.END)
+                    entry.insert(0, "Benchmark")
+                results["generate_report"] = measure(app.generate_report, repeat)
+
+                crimes = max((r['crimes_committed'] for r in app.reports), key=len)
+                calls = 1000 # A single call is far below timer resolution
+                timing = measure(lambda: [app.format_crime_list(crimes) for _ in range(calls)], repeat)
+                results["format_crime_list"] = {"min_ms": round(timing["min_ms"] / calls, 6), "median_ms": round(timing["median_ms"] / calls, 6), "repeat": repeat}
+
+                app.storage.close()
+        finally:
+            root.destroy()
+            os.chdir(previous_dir)
+        results.update(measure_storage(directory, repeat))
+    return results
+
+
+def measure_storage(data_dir, repeat):
+    """Misst für jedes Speicher-Backend das Laden der Anzeigen und eine gespeicherte Änderung (persist + flush)."""
+    results = {}
+    for backend in STORAGE_BACKENDS:
+        with tempfile.TemporaryDirectory(prefix=f"pdakten-bench-{backend}-") as directory:
+            files = {collection: os.path.join(directory, os.path.basename(filename)) for collection, filename in DATA_FILES.items()}
+            for collection, filename in DATA_FILES.items():
+                if os.path.exists(os.path.join(data_dir, filename)):
+                    shutil.copyfile(os.path.join(data_dir, filename), files[collection])
+            settings = {"storage_backend": backend, "background_saves": False}
+            stop = None
+            if backend == "server":
+                settings["server_url"], stop = server.run_in_thread(lambda: JsonStorage(files, background=False))
+            database_file = os.path.join(directory, "pdakten.db")
+            error_callback = lambda message: print(f"{backend}: {message}", file=sys.stderr)
+            try:
+                create_storage(settings, files, database_file, error_callback).close() # SQLite: the one-time JSON import is not measured
+
+                def load_reports():
+                    storage = create_storage(settings, files, database_file, error_callback)
+                    storage.load("reports")
+                    storage.close()
+
+                results[f"load_reports_{backend}"] = measure(load_reports, repeat)
+                core = AktenCore(create_storage(settings, files, database_file, error_callback), error_callback)
+                report = core.reports[0]
+
+                def persist_report():
+                    report['description'] = f"Benchmark {time.perf_counter()}"
+                    core.persist("reports", "update", report)
+                    core.storage.flush()
+
+                results[f"persist_report_{backend}"] = measure(persist_report, repeat)
+                core.close()
+            finally:
+                if stop:
+                    stop()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Vergleicht die Mediane mit einer Baseline. Gibt (Zeilen, Regressionen) zurück."""
+    rows = []
+    regressions = []
+    for size, benchmarks in results.items():
+        base_benchmarks = baseline.get("results", {}).get(size, {})
+        for name, timing in benchmarks.items():
+            base = base_benchmarks.get(name)
+            if not base or not base.get("median_ms"):
+                rows.append((size, name, timing["median_ms"], None, None))
+                continue
+            ratio = timing["median_ms"] / base["median_ms"]
+            rows.append((size, name, timing["median_ms"], base["median_ms"], ratio))
+            if ratio > threshold:
+                regressions.append(f"{name} @ {size}: {base['median_ms']:.3f} ms -> {timing['median_ms']:.3f} ms ({ratio:.2f}x)")
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für PD-Akten-Helfer mit synthetischen Daten.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Anzahl der Datensätze pro Lauf (Standard: 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen pro Messung")
+    parser.add_argument("--output", default="benchmark_results.json", help="Zieldatei für die Ergebnisse")
+    parser.add_argument("--baseline", help="Frühere Ergebnisdatei zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Erlaubter Faktor gegenüber der Baseline (Standard: 1.2)")
+    args = parser.parse_args(argv)
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"Tk kann nicht gestartet werden ({e}). Ohne Bildschirm z. B. mit 'xvfb-run python benchmark.py' starten.", file=sys.stderr)
+        return 2
+
+    results = {}
+    for size in args.sizes:
+        print(f"Benchmark mit {size} Datensätzen ...")
+        results[str(size)] = run_size(size, args.repeat)
+
+    report = {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    write_json_file(args.output, report)
+    print(f"Ergebnisse gespeichert in {args.output}")
+
+    if not args.baseline:
+        for size, benchmarks in results.items():
+            for name, timing in benchmarks.items():
+                print(f"{size:>8} {name:<36} {timing['median_ms']:>12.3f} ms")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows, regressions = compare(results, baseline, args.threshold)
+    for size, name, median, base_median, ratio in rows:
+        base_text = f"{base_median:>12.3f} ms {ratio:>6.2f}x" if ratio is not None else "      (neu)"
+        print(f"{size:>8} {name:<36} {median:>12.3f} ms {base_text}")
+    if regressions:
+        print("\nRegressionen:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nKeine Regressionen gegenüber der Baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Kommandozeile für PD-Akten-Helfer ohne GUI (python PDApp.py cli ...), mit denselben Dateien wie die App."""
+import argparse
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+from batch import default_values
+from images import DEFAULT_IMAGE_FORMAT, GC_GRACE_SECONDS, IMAGE_FORMATS, ImageStore
+from core import DATA_FILES, DATABASE_FILE, PERPETRATOR_FILES_DIR, PERPETRATOR_IMAGES_DIR, SETTINGS_FILE, AktenCore, create_storage, format_crime_list, generate_random_case_number, load_settings
+from photo_import import attach_photos, format_summary, match_photos, photos_from_mapping, photos_in_folder, process_photos
+
+
+def print_error(message):
+    print(f"Fehler: {message}", file=sys.stderr)
+
+
+def parse_crime(text):
+    """'Name' oder 'Name:Anzahl' -> (Name, Anzahl)."""
+    name, separator, count = text.rpartition(":")
+    if separator and count.strip().isdigit():
+        return name, int(count)
+    return text, 1
+
+
+def parse_assignments(assignments):
+    """['key=value', ...] -> {key: value}"""
+    values = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition("=")
+        if not separator:
+            raise ValueError(f"'{assignment}' hat nicht die Form Platzhalter=Wert.")
+        values[key.strip()] = value.strip()
+    return values
+
+
+def format_timestamp(record):
+    return datetime.fromisoformat(record['timestamp']).strftime('%d.%m.%Y %H:%M Uhr') if 'timestamp' in record else 'N/A'
+
+
+# --- Commands ---
+def report_add(core, args):
+    try:
+        crimes_committed = core.crime_selection(parse_crime(crime) for crime in args.crime)
+    except KeyError as e:
+        print_error(f"Straftat {e} ist nicht im Katalog (siehe 'crimes list').")
+        return 1
+    report_id = args.id or generate_random_case_number()
+    report, perpetrator_file, perpetrator_created = core.add_report(report_id, args.name.strip(), args.type.strip(), crimes_committed, args.description.strip())
+    if perpetrator_created:
+        print(f"Neue Täterakte für '{perpetrator_file['name']}' wurde automatisch erstellt.")
+    print(f"Anzeige {report['report_id']} angelegt: {format_crime_list(crimes_committed)}")
+    print(f"Täterakte {perpetrator_file['name']}: {perpetrator_file['total_detention_units']} Hafteinheiten, {perpetrator_file['total_fine']} €")
+    return 0
+
+
+def report_list(core, args):
+    reports = core.reports
+    if args.name:
+        perpetrator_file = core.repository.get_perpetrator_by_name(args.name)
+        reports = core.repository.linked_reports(perpetrator_file) if perpetrator_file else []
+    for report in reports:
+        print(f"{report['report_id']} - {report.get('perpetrator_name', 'N/A')} ({report['type']}): {format_crime_list(report.get('crimes_committed', []))}")
+    return 0
+
+
+def perp_show(core, args):
+    pf = core.repository.get_perpetrator_by_name(args.name)
+    if not pf:
+        print_error(f"Keine Täterakte für '{args.name}' gefunden.")
+        return 1
+    if args.json:
+        print(json.dumps(dict(pf, linked_reports=core.repository.linked_reports(pf)), ensure_ascii=False, indent=2))
+        return 0
+    linked_reports_info = [f"  - {report['report_id']} ({report['type']}): {format_crime_list(report.get('crimes_committed', []))}" for report in core.repository.linked_reports(pf)]
+    print(f"Name: {pf.get('name', 'N/A')}\n"
+          f"Geburtsdatum: {pf.get('dob', 'N/A')}\n"
+          f"Geburtsort: {pf.get('birthplace', 'N/A')}\n"
+          f"Beschreibung: {pf.get('description', 'N/A')}\n"
+          f"Gesamt-Hafteinheiten: {pf.get('total_detention_units', 0)}\n"
+          f"Gesamt-Geldstrafe: {pf.get('total_fine', 0)} €\n"
+          f"Erstellt: {format_timestamp(pf)}\n"
+          f"Zugeordnete Anzeigen:\n" + "\n".join(linked_reports_info if linked_reports_info else ["  - Keine"]))
+    return 0
+
+
+def perp_check(core, args):
+    drift = core.check_totals()
+    for pf, detention_units, fine in drift:
+        print(f"{pf['name']}: {pf.get('total_detention_units', 0)} HE / {pf.get('total_fine', 0)} € statt {detention_units} HE / {fine} €")
+    if not drift:
+        print("Alle Strafsummen stimmen mit den verknüpften Anzeigen überein.")
+        return 0
+    if args.repair:
+        print(f"{core.repair_totals(drift)} Täterakte(n) korrigiert.")
+        return 0
+    return 1 # Drift found but not repaired
+
+
+def preset_list(core, args):
+    for preset in core.report_presets:
+        placeholders = ", ".join(core.template_cache.get(preset).placeholders)
+        print(f"{preset['name']}: {placeholders}")
+    return 0
+
+
+def preset_render(core, args):
+    preset = core.find_preset(args.preset)
+    if not preset:
+        print_error(f"Preset '{args.preset}' nicht gefunden (siehe 'preset list').")
+        return 1
+    try:
+        values = parse_assignments(args.set)
+    except ValueError as e:
+        print_error(e)
+        return 1
+    for key, value in default_values().items(): # Same Datum/uhrzeit defaults as the presets tab
+        values.setdefault(key, value)
+    print(core.render_preset(preset, values))
+    return 0
+
+
+def crimes_list(core, args):
+    for crime in core.predefined_crimes:
+        paragraph = f" ({crime['paragraph']})" if crime.get('paragraph') else ""
+        print(f"{crime['name']}{paragraph}: {crime.get('detention_units', 0)} HE, {crime.get('fine', 0)} €")
+    return 0
+
+
+def crimes_add(core, args):
+    name = args.name.strip()
+    if not name:
+        print_error("Der Name der Straftat darf nicht leer sein.")
+        return 1
+    if core.find_crime(name):
+        print_error(f"Die Straftat '{name}' existiert bereits.")
+        return 1
+    new_crime = {"id": str(uuid.uuid4()), "name": name, "paragraph": args.paragraph.strip(), "detention_units": args.units, "fine": args.fine}
+    core.predefined_crimes.append(new_crime)
+    core.persist("predefined_crimes", "insert", new_crime)
+    print(f"Straftat '{new_crime['name']}' hinzugefügt.")
+    return 0
+
+
+def image_store(core):
+    store = ImageStore(PERPETRATOR_IMAGES_DIR)
+    store.rebuild_index(core.perpetrator_files)
+    return store, {pf['image_filename'] for pf in core.perpetrator_files if pf.get('image_filename')}
+
+
+def images_report(core, args):
+    store, referenced = image_store(core)
+    report = store.report(referenced)
+    print(f"Dateien: {report['files']} ({report['bytes'] / 1024 / 1024:.1f} MB)")
+    print(f"Verwendet: {report['referenced_files']} Dateien für {report['references']} Täterakten ({report['shared_files']} geteilt)")
+    print(f"Verwaist: {report['orphaned_files']} ({report['orphaned_bytes'] / 1024:.0f} KB)")
+    print(f"Alte Dateinamen: {report['legacy_files']}")
+    print(f"Fehlende Dateien: {len(report['missing_files'])}")
+    for name in report['missing_files']:
+        print(f"  - {name}")
+    return 0
+
+
+def images_gc(core, args):
+    if not core.can_collect_images():
+        print_error("Die Täterakten wurden nicht vollständig aus dem gewählten Speicher geladen; es wird nichts gelöscht.")
+        return 1
+    store, referenced = image_store(core)
+    removed, freed = store.collect_garbage(referenced, args.grace)
+    print(f"{removed} nicht mehr verwendete Bilder gelöscht ({freed / 1024:.0f} KB freigegeben).")
+    return 0
+
+
+def images_reencode(core, args):
+    store, referenced = image_store(core)
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    renamed, saved = store.reencode(referenced, args.format, args.workers, progress)
+    print(file=sys.stderr)
+    core.rename_images(renamed)
+    store.finish_reencode(renamed, core.perpetrator_files)
+    print(f"Bilder als {IMAGE_FORMATS[args.format][1]} gespeichert, {saved / 1024:.0f} KB eingespart ({len(renamed)} Dateien umbenannt).")
+    return 0
+
+
+def images_import(core, args):
+    try:
+        photos = photos_in_folder(args.source) if os.path.isdir(args.source) else photos_from_mapping(args.source)
+    except (OSError, ValueError) as e:
+        print_error(e)
+        return 1
+    store, _ = image_store(core)
+    store.image_format = args.format
+    matched, unmatched = match_photos(photos, core.repository)
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+    results = process_photos([path for _, path in matched], store, args.workers, progress)
+    print(file=sys.stderr)
+    summary = attach_photos(core, store, matched, results)
+    print(format_summary(summary, unmatched))
+    return 1 if summary["failed"] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="PDApp.py cli", description="PD-Akten-Helfer ohne GUI.")
+    parser.add_argument("--data-dir", help="Ordner mit den Datendateien (Standard: aktueller Ordner)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="Anzeigen").add_subparsers(dest="action", required=True)
+    add = report.add_parser("add", help="Anzeige anlegen und Strafen in die Täterakte übernehmen")
+    add.add_argument("--id", help="Anzeigen-ID (Standard: zufälliges Aktenzeichen)")
+    add.add_argument("--name", required=True, help="Tätername")
+    add.add_argument("--type", required=True, help="Typ der Anzeige")
+    add.add_argument("--crime", action="append", required=True, help="Straftat aus dem Katalog, optional mit Anzahl: 'Raub:2' (mehrfach angeben)")
+    add.add_argument("--description", default="", help="Beschreibung")
+    add.set_defaults(func=report_add)
+    listing = report.add_parser("list", help="Anzeigen auflisten")
+    listing.add_argument("--name", help="Nur Anzeigen dieser Täterakte")
+    listing.set_defaults(func=report_list)
+
+    perp = commands.add_parser("perp", help="Täterakten").add_subparsers(dest="action", required=True)
+    show = perp.add_parser("show", help="Täterakte mit verknüpften Anzeigen anzeigen")
+    show.add_argument("name", help="Name des Täters")
+    show.add_argument("--json", action="store_true", help="Als JSON ausgeben")
+    show.set_defaults(func=perp_show)
+    check = perp.add_parser("check", help="Strafsummen aller Täterakten mit den verknüpften Anzeigen abgleichen")
+    check.add_argument("--repair", action="store_true", help="Abweichungen korrigieren")
+    check.set_defaults(func=perp_check)
+
+    preset = commands.add_parser("preset", help="Bericht-Presets").add_subparsers(dest="action", required=True)
+    preset.add_parser("list", help="Presets mit ihren Platzhaltern auflisten").set_defaults(func=preset_list)
+    render = preset.add_parser("render", help="Bericht aus einem Preset erzeugen")
+    render.add_argument("preset", help="Name oder ID des Presets")
+    render.add_argument("--set", action="append", default=[], metavar="PLATZHALTER=WERT", help="Wert für einen Platzhalter (mehrfach angeben)")
+    render.set_defaults(func=preset_render)
+
+    crimes = commands.add_parser("crimes", help="Straftatenkatalog").add_subparsers(dest="action", required=True)
+    crimes.add_parser("list", help="Straftaten auflisten").set_defaults(func=crimes_list)
+    crime_add = crimes.add_parser("add", help="Straftat zum Katalog hinzufügen")
+    crime_add.add_argument("--name", required=True)
+    crime_add.add_argument("--paragraph", default="")
+    crime_add.add_argument("--units", type=int, default=0, help="Hafteinheiten")
+    crime_add.add_argument("--fine", type=int, default=0, help="Geldstrafe in €")
+    crime_add.set_defaults(func=crimes_add)
+
+    images = commands.add_parser("images", help="Täterbilder").add_subparsers(dest="action", required=True)
+    images.add_parser("report", help="Speicherbericht der Bildablage").set_defaults(func=images_report)
+    gc = images.add_parser("gc", help="Bilder löschen, auf die keine Täterakte verweist")
+    gc.add_argument("--grace", type=int, default=GC_GRACE_SECONDS, help="Nur Dateien löschen, die älter als so viele Sekunden sind")
+    gc.set_defaults(func=images_gc)
+    reencode = images.add_parser("reencode", help="Alle verwendeten Bilder ohne Metadaten neu kodieren (Metadaten werden immer entfernt, sonst nur wenn sie kleiner werden)")
+    reencode.add_argument("--format", choices=list(IMAGE_FORMATS), default=DEFAULT_IMAGE_FORMAT, help="Zielformat (Standard: png)")
+    reencode.add_argument("--workers", type=int, help="Anzahl paralleler Prozesse (Standard: alle Kerne)")
+    reencode.set_defaults(func=images_reencode)
+    photo_import = images.add_parser("import", help="Bilder gesammelt den Täterakten zuordnen (mittig auf 150x150 zugeschnitten)")
+    photo_import.add_argument("source", help="Ordner mit Bildern, die nach den Tätern benannt sind, oder CSV/JSONL mit den Spalten name und datei")
+    photo_import.add_argument("--format", choices=list(IMAGE_FORMATS), default=DEFAULT_IMAGE_FORMAT, help="Format der gespeicherten Bilder (Standard: png)")
+    photo_import.add_argument("--workers", type=int, help="Anzahl paralleler Prozesse (Standard: alle Kerne)")
+    photo_import.set_defaults(func=images_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.data_dir:
+        os.chdir(args.data_dir) # Paths are relative to the data directory, like in the app
+    os.makedirs(PERPETRATOR_FILES_DIR, exist_ok=True)
+    os.makedirs(PERPETRATOR_IMAGES_DIR, exist_ok=True)
+    settings = load_settings(SETTINGS_FILE, error_callback=print_error)
+    core = AktenCore(create_storage(settings, DATA_FILES, DATABASE_FILE, error_callback=print_error), error_callback=print_error)
+    try:
+        return args.func(core, args)
+    finally:
+        core.close() # Flushes pending background saves
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,529 @@
+import json
+import os
+import random
+import string
+import uuid
+from datetime import datetime
+
+from records import RecordPool, crime_penalty
+from repository import AktenRepository
+from search import SearchIndex
+from storage import COLLECTIONS, LAZY_FIELDS, JournalJsonStorage, JsonStorage, RemoteStorage, SQLiteStorage, StorageError, import_json_to_sqlite, migrate_records
+from templates import TemplateCache
+
+SETTINGS_FILE = "settings.json"
+DATABASE_FILE = "pdakten.db" # Used by the SQLite storage backend
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765" # server.py on this machine
+PERPETRATOR_FILES_DIR = "taeterakten" # Directory for perpetrator data and images
+PERPETRATOR_IMAGES_DIR = os.path.join(PERPETRATOR_FILES_DIR, "bilder")
+DATA_FILES = {
+    "notes": "notizen.json",
+    "reports": "anzeigen.json", # Main reports that link to perpetrators
+    "perpetrator_files": os.path.join(PERPETRATOR_FILES_DIR, "taeterakten.json"),
+    "report_presets": "anzeigen_presets.json",
+    "predefined_crimes": "predefined_crimes.json",
+}
+COMMITTED_CRIME_FIELDS = ("name", "paragraph", "detention_units", "fine") # Copied from the catalogue into a report's crimes_committed
+
+DEFAULT_PREDEFINED_CRIMES = [
+    {"name": "Diebstahl", "paragraph": "§ 242 StGB", "detention_units": 5, "fine": 100},
+    {"name": "Raub", "paragraph": "§ 249 StGB", "detention_units": 10, "fine": 500},
+    {"name": "Körperverletzung", "paragraph": "§ 223 StGB", "detention_units": 7, "fine": 200},
+    {"name": "Sachbeschädigung", "paragraph": "§ 303 StGB", "detention_units": 3, "fine": 50},
+    {"name": "Einbruch", "paragraph": "§ 244 StGB", "detention_units": 8, "fine": 300},
+    {"name": "Betrug", "paragraph": "§ 263 StGB", "detention_units": 6, "fine": 250},
+    {"name": "Drogenhandel", "paragraph": "BtMG", "detention_units": 15, "fine": 1000},
+    {"name": "Widerstand gegen die Staatsgewalt", "paragraph": "§ 113 StGB", "detention_units": 4, "fine": 150},
+    {"name": "Fahren ohne Fahrerlaubnis", "paragraph": "§ 21 StVG", "detention_units": 2, "fine": 80},
+    {"name": "Verkehrsunfallflucht", "paragraph": "§ 142 StGB", "detention_units": 5, "fine": 120},
+    {"name": "Brandstiftung", "paragraph": "§ 306 StGB", "detention_units": 12, "fine": 700},
+    {"name": "Mord", "paragraph": "§ 211 StGB", "detention_units": 999, "fine": 5000}, # Example large values
+    {"name": "Totschlag", "paragraph": "§ 212 StGB", "detention_units": 999, "fine": 3000},
+    {"name": "Nötigung", "paragraph": "§ 240 StGB", "detention_units": 4, "fine": 100},
+    {"name": "Beleidigung", "paragraph": "§ 185 StGB", "detention_units": 1, "fine": 30},
+    {"name": "Hausfriedensbruch", "paragraph": "§ 123 StGB", "detention_units": 2, "fine": 40}
+]
+
+DEFAULT_REPORT_PRESETS = [
+    {"name": "Standard Anzeige", "template_string": "[Herr/Frau] [name] hat am [Datum] um [uhrzeit] folgende Straftaten begangen [Straftat1,2,3,4,5, etc], laut [Gesetz] wurden [Hafteinheiten] Hafteinheiten und eine Strafe von [Strafbetrag] verhängt. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
+    {"name": "Ordnungswidrigkeit", "template_string": "Am [Datum] um [uhrzeit] wurde [Herr/Frau] [name] wegen einer Ordnungswidrigkeit ([OWI-Art]) gemäß [OWI-Gesetz] mit einem Verwarnungsgeld von [Verwarnungsgeld] € belegt. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
+    {"name": "Fahndung", "template_string": "FAHNDUNG nach [name], geboren am [Geburtsdatum] in [Geburtsort]. Beschreibung: [Beschreibung]. Letzter bekannter Aufenthaltsort: [Ort]. Grund: [Grund der Fahndung]. Bei Sichtung bitte [Maßnahme] ergreifen. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
+    {"name": "Festnahme", "template_string": "Festnahme von [Herr/Frau] [name] am [Datum] um [uhrzeit] in [Ort]. Grund der Festnahme: [Grund]. Die Person wurde zur [Ort der Verbringung] verbracht. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
+    {"name": "Verkehrsunfall/Unfallbericht", "template_string": "Verkehrsunfall am [Datum] um [uhrzeit] in [Ort]. Beteiligte Fahrzeuge: [Fahrzeug 1], [Fahrzeug 2]. Beteiligte Personen: [Personen]. Sachschaden: [Sachschaden]. Personenschaden: [Personenschaden]. Ursache: [Unfallursache]. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"},
+    {"name": "Zeugenvernehmung", "template_string": "Zeugenvernehmung von [Herr/Frau] [Zeugenname] am [Datum] um [uhrzeit] in [Ort]. Zum Sachverhalt: [Sachverhalt]. Aussage: [Aussage des Zeugen]. Aktenzeichen: [Aktenzeichen]. Unterschrift [Officer Name]: Unterschrift [Unterschrift Officer Name (Cursiv)]"}
+]
+
+
+def create_storage(settings, data_files=DATA_FILES, database_file=DATABASE_FILE, error_callback=None):
+    """Erstellt das gewählte Speicher-Backend; ist es nicht verfügbar, die lokalen JSON-Dateien mit fallback=True."""
+    fallback = False
+    if settings.get("storage_backend") == "server":
+        storage = None
+        try:
+            storage = RemoteStorage(settings.get("server_url", DEFAULT_SERVER_URL), error_callback=error_callback)
+            storage.ping()
+            return storage
+        except StorageError as e:
+            if storage:
+                storage.close()
+            fallback = True
+            if error_callback:
+                error_callback(f"{e}. Die lokalen JSON-Dateien werden verwendet.")
+    if settings.get("storage_backend") == "sqlite":
+        try:
+            storage = SQLiteStorage(database_file)
+            if storage.is_empty():
+                # One-time import of the existing JSON files
+                import_json_to_sqlite(data_files, storage)
+            return storage
+        except StorageError as e:
+            fallback = True
+            if error_callback:
+                error_callback(f"{e}. Die JSON-Dateien werden verwendet.")
+    if settings.get("storage_backend") == "journal":
+        return JournalJsonStorage(data_files, settings.get("journal_compact_bytes", 1024 * 1024), error_callback=error_callback)
+    # Whole-file JSON writes happen on a worker thread so the caller stays responsive
+    lazy_collections = tuple(LAZY_FIELDS) if settings.get("lazy_loading", False) else () # Large archives: records read on demand
+    storage = JsonStorage(data_files, background=settings.get("background_saves", True), error_callback=error_callback, lazy_collections=lazy_collections)
+    storage.fallback = fallback
+    return storage
+
+
+def load_settings(filename=SETTINGS_FILE, error_callback=None):
+    """Lädt die Einstellungen; bei fehlender oder beschädigter Datei gelten die Standardeinstellungen."""
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            if error_callback:
+                error_callback(f"Fehler beim Laden von {filename}. Die Datei ist möglicherweise beschädigt. Standardeinstellungen werden verwendet.")
+            return {"theme": "light"} # Fallback to default
+    return {"theme": "light"} # Default settings
+
+
+def generate_random_case_number(length=8):
+    """Generiert ein zufälliges Aktenzeichen (Buchstaben und Zahlen)."""
+    characters = string.ascii_uppercase + string.digits
+    return ''.join(random.choice(characters) for i in range(length))
+
+
+def format_crime_list(crimes_list_of_dicts):
+    """Formats a list of crimes (dictionaries) for display."""
+    if not crimes_list_of_dicts:
+        return "Keine Straftaten ausgewählt"
+    
+    formatted_crimes = []
+    for crime_obj in crimes_list_of_dicts:
+        # Ensure crime_obj is a dictionary. If it's a string (from old data), convert it.
+        if isinstance(crime_obj, str):
+            crime_obj = {"name": crime_obj, "paragraph": "", "detention_units": 0, "fine": 0, "count": 1}
+
+        crime_text = f"{crime_obj['name']} ({crime_obj['paragraph']})" if crime_obj.get('paragraph') else crime_obj['name']
+        
+        # Add count if it exists and is > 1
+        if crime_obj.get('count', 1) > 1:
+            formatted_crimes.append(f"{crime_obj['count']}x {crime_text}")
+        else:
+            formatted_crimes.append(crime_text)
+
+
+    if len(formatted_crimes) == 1:
+        return formatted_crimes[0]
+    if len(formatted_crimes) == 2:
+        return f"{formatted_crimes[0]} und {formatted_crimes[1]}"
+    
+    all_but_last = ", ".join(formatted_crimes[:-1])
+    return f"{all_but_last} und {formatted_crimes[-1]}"
+
+
+def committed_crime(crime, count):
+    """Eintrag für crimes_committed: Name, Paragraph und Strafen der Katalog-Straftat plus Anzahl (ohne id/version des Katalogs)."""
+    entry = {field: crime[field] for field in COMMITTED_CRIME_FIELDS if field in crime}
+    entry['count'] = count
+    return entry
+
+
+def report_penalties(crimes_committed):
+    """Hafteinheiten und Geldstrafe einer Anzeige (Summe über Straftaten mal Anzahl)."""
+    detention_units = fine = 0
+    for crime in crimes_committed:
+        crime_units, crime_fine = crime_penalty(crime)
+        detention_units += crime_units
+        fine += crime_fine
+    return detention_units, fine
+
+
+def compute_totals(reports):
+    """Summiert die Strafen aller Anzeigen pro Täterakte: {Täterakten-ID: [Hafteinheiten, Geldstrafe]}."""
+    totals = {}
+    for report in reports:
+        perpetrator_id = report.get('linked_perpetrator_id')
+        if not perpetrator_id:
+            continue
+        detention_units, fine = report_penalties(report.get('crimes_committed', ()))
+        total = totals.get(perpetrator_id)
+        if total is None:
+            totals[perpetrator_id] = [detention_units, fine]
+        else:
+            total[0] += detention_units
+            total[1] += fine
+    return totals
+
+
+def new_perpetrator_file(name):
+    """Eine leere Täterakte, wie sie beim Anlegen einer Anzeige automatisch entsteht."""
+    return {
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "dob": "", "birthplace": "", "description": "", "image_filename": None,
+        "timestamp": datetime.now().isoformat(),
+        "total_detention_units": 0,
+        "total_fine": 0,
+        "linked_report_ids": []
+    }
+
+
+class AktenCore:
+    """Daten und Geschäftslogik der App ohne GUI, für die Tk-App, die Kommandozeile und den Server."""
+
+    def __init__(self, storage, error_callback=None):
+        self.storage = storage
+        self.error_callback = error_callback
+        self.failed_collections = set() # Could not be loaded and start out empty
+        self.notes = self.load_collection("notes")
+        self.reports = self.load_collection("reports")
+        self.perpetrator_files = self.load_collection("perpetrator_files")
+        self.report_presets = self.load_collection("report_presets")
+        self.predefined_crimes = self.load_collection("predefined_crimes")
+        self.record_pool = RecordPool() # Identical crime entries and repeated strings are stored once
+        for report in self.reports:
+            self.record_pool.compact_report(report)
+        for pf in self.perpetrator_files:
+            self.record_pool.compact_perpetrator(pf)
+        self.repository = AktenRepository(self.reports, self.perpetrator_files) # Id/name/link indexes
+        self.search_index = SearchIndex({"notes": self.notes, "reports": self.reports, "perpetrator_files": self.perpetrator_files}) # Built on the first search
+        self.template_cache = TemplateCache() # Compiled report preset templates
+
+        if not self.predefined_crimes:
+            self.predefined_crimes = [dict(crime) for crime in DEFAULT_PREDEFINED_CRIMES]
+            migrate_records("predefined_crimes", self.predefined_crimes) # Assign ids
+            self.save_collection("predefined_crimes", self.predefined_crimes)
+        # Only initialize if no presets exist (to avoid overwriting user-added ones)
+        if not self.report_presets:
+            self.report_presets = [dict(preset) for preset in DEFAULT_REPORT_PRESETS]
+            migrate_records("report_presets", self.report_presets) # Assign ids
+            self.save_collection("report_presets", self.report_presets)
+
+    def report_error(self, message):
+        if self.error_callback:
+            self.error_callback(message)
+
+    def close(self):
+        """Schließt das Speicher-Backend (wartet auf laufende Hintergrundarbeiten)."""
+        for attempt in range(3):
+            try:
+                self.storage.flush()
+            except StorageError as e:
+                self.report_error(str(e)) # Server unreachable: close anyway instead of hanging
+                break
+            stale = self.storage.stale_collections()
+            if not stale:
+                break
+            for collection in stale: # Writes refused because another instance changed the file: merge, write again
+                self.sync(collection)
+        self.storage.close()
+
+    # --- Persistence ---
+    def load_collection(self, collection):
+        try:
+            return self.storage.load(collection)
+        except StorageError as e:
+            self.report_error(f"{e}. Die Datei ist möglicherweise beschädigt. Eine neue leere Datei wird erstellt.")
+            self.failed_collections.add(collection)
+            return []
+
+    def save_collection(self, collection, records):
+        try:
+            self.storage.save_all(collection, records)
+        except StorageError as e:
+            self.report_error(str(e))
+
+    def persist(self, collection, op, record):
+        """Schreibt eine einzelne Änderung (insert/update/delete) über das Speicher-Backend."""
+        if op != "delete":
+            record['version'] = record.get('version', 0) + 1 # Lets other instances sharing the files detect the change
+        self.sync(collection)
+        self.search_index.update(collection, op, record) # Keep the full-text index in step with every change
+        try:
+            if op == "insert":
+                self.storage.insert(collection, record)
+            elif op == "update":
+                self.storage.update(collection, record)
+            elif op == "delete":
+                self.storage.delete(collection, record['id'])
+        except StorageError as e:
+            self.report_error(str(e))
+
+    def persist_updates(self, collection, records):
+        """Wie persist(collection, "update", ...) für mehrere Datensätze, aber in einem Schreibvorgang."""
+        if not records:
+            return
+        for record in records:
+            record['version'] = record.get('version', 0) + 1
+        self.sync(collection)
+        for record in records:
+            self.search_index.update(collection, "update", record)
+        try:
+            self.storage.update_many(collection, records)
+        except StorageError as e:
+            self.report_error(str(e))
+
+    def sync(self, collection):
+        """Übernimmt Änderungen anderer Instanzen und gibt ihre Anzahl zurück."""
+        try:
+            changes = self.storage.sync(collection)
+        except StorageError as e:
+            self.report_error(str(e))
+            return 0
+        if not changes:
+            return 0
+        records = getattr(self, collection)
+        by_id = {} if collection in ("reports", "perpetrator_files") else {record['id']: record for record in records}
+        merged = []
+        duplicates = [] # (our file, their file) created for the same name at the same time
+        for op, data in changes:
+            if collection == "reports":
+                record = self.repository.get_report(data['id'])
+            elif collection == "perpetrator_files":
+                record = self.repository.get_perpetrator(data['id'])
+            else:
+                record = by_id.get(data['id'])
+            if collection == "reports":
+                self.record_pool.compact_report(data)
+            elif collection == "perpetrator_files":
+                self.record_pool.compact_perpetrator(data)
+            if op == "insert":
+                if collection == "reports":
+                    self.repository.add_report(data)
+                elif collection == "perpetrator_files":
+                    duplicate = self.repository.get_perpetrator_by_name(data.get('name'))
+                    self.repository.add_perpetrator(data)
+                    if duplicate is not None:
+                        duplicates.append((duplicate, data))
+                else:
+                    records.append(data)
+                self.search_index.update(collection, "insert", data)
+            elif op == "delete":
+                if collection == "reports":
+                    self.repository.remove_report(record)
+                elif collection == "perpetrator_files":
+                    self.repository.remove_perpetrator(record)
+                else:
+                    records.remove(record)
+                self.search_index.update(collection, "delete", record)
+            else:
+                # Update in place so references held elsewhere (selection, dialogs) see the new state
+                if collection == "reports":
+                    self.repository.replace_report_data(record, data)
+                elif collection == "perpetrator_files":
+                    self.repository.replace_perpetrator_data(record, data)
+                else:
+                    record.clear()
+                    record.update(data)
+                self.search_index.update(collection, "update", record)
+                if op == "merge":
+                    merged.append(record)
+        self.persist_updates(collection, merged)
+        self.storage.commit_sync(collection)
+        for duplicate, pf in duplicates:
+            self.absorb_perpetrator(duplicate, pf)
+        return len(changes)
+
+    def absorb_perpetrator(self, duplicate, pf):
+        """Überträgt Anzeigen, Strafen und fehlende Angaben einer doppelt angelegten Täterakte auf pf und löscht sie."""
+        pf['total_detention_units'] += duplicate.get('total_detention_units', 0)
+        pf['total_fine'] += duplicate.get('total_fine', 0)
+        pf['linked_report_ids'].extend(report_id for report_id in duplicate.get('linked_report_ids', []) if report_id not in pf['linked_report_ids'])
+        for key in ("dob", "birthplace", "description", "image_filename"):
+            if not pf.get(key) and duplicate.get(key):
+                pf[key] = duplicate[key]
+        moved_reports = self.repository.reports_for_perpetrator(duplicate['id'])
+        for report in moved_reports:
+            self.repository.link_report(report, pf['id'])
+        self.repository.remove_perpetrator(duplicate)
+        self.persist("perpetrator_files", "delete", duplicate)
+        self.persist("perpetrator_files", "update", pf)
+        self.persist_updates("reports", moved_reports)
+
+    def sync_all(self):
+        """sync() für alle Sammlungen. Gibt {Sammlung: Anzahl Änderungen} für geänderte Sammlungen zurück."""
+        changed = {}
+        for collection in COLLECTIONS:
+            count = self.sync(collection)
+            if count:
+                changed[collection] = count
+        return changed
+
+    # --- Reports ---
+    def add_report(self, report_id, perpetrator_name, report_type, crimes_committed, description=""):
+        """Legt eine Anzeige an und addiert die Strafen. Gibt (Anzeige, Täterakte, ob sie neu angelegt wurde) zurück."""
+        crimes_committed = self.record_pool.crimes(crimes_committed)
+        self.sync("perpetrator_files") # A file another instance just created for this name is used, not duplicated
+        perpetrator_file = self.repository.get_perpetrator_by_name(perpetrator_name)
+        perpetrator_created = not perpetrator_file
+        if perpetrator_created:
+            perpetrator_file = new_perpetrator_file(perpetrator_name)
+            self.repository.add_perpetrator(perpetrator_file)
+            self.persist("perpetrator_files", "insert", perpetrator_file)
+
+        detention_units, fine = report_penalties(crimes_committed)
+        perpetrator_file['total_detention_units'] += detention_units
+        perpetrator_file['total_fine'] += fine
+
+        new_report_id = str(uuid.uuid4()) # Unique ID for the report itself
+        perpetrator_file['linked_report_ids'].append(new_report_id)
+        report = {
+            "id": new_report_id,
+            "report_id": report_id, # The user-defined ID
+            "perpetrator_name": perpetrator_name,
+            "type": report_type,
+            "crimes_committed": crimes_committed,
+            "description": description,
+            "timestamp": datetime.now().isoformat(),
+            "linked_perpetrator_id": perpetrator_file['id']
+        }
+        self.repository.add_report(report)
+        self.persist("reports", "insert", report)
+        self.persist("perpetrator_files", "update", perpetrator_file)
+        return report, perpetrator_file, perpetrator_created
+
+    def update_report(self, report, report_id, perpetrator_name, report_type, crimes_committed, description):
+        """Ändert eine Anzeige und überträgt die Strafen. Gibt (Namen mit geänderter Anzeigenzahl, ob eine Täterakte neu ist) zurück."""
+        crimes_committed = self.record_pool.crimes(crimes_committed)
+        changed_perpetrator_files = []
+        # 1. Revert the penalties on the previously linked perpetrator file
+        old_perpetrator_file = self.repository.get_perpetrator(report.get('linked_perpetrator_id'))
+        if old_perpetrator_file:
+            detention_units, fine = report_penalties(report.get('crimes_committed', []))
+            old_perpetrator_file['total_detention_units'] -= detention_units
+            old_perpetrator_file['total_fine'] -= fine
+            if report['id'] in old_perpetrator_file['linked_report_ids']:
+                old_perpetrator_file['linked_report_ids'].remove(report['id'])
+            changed_perpetrator_files.append(old_perpetrator_file)
+
+        # 2. Find or create the new perpetrator file
+        self.sync("perpetrator_files")
+        perpetrator_file = self.repository.get_perpetrator_by_name(perpetrator_name)
+        perpetrator_created = not perpetrator_file
+        if perpetrator_created:
+            perpetrator_file = new_perpetrator_file(perpetrator_name)
+            self.repository.add_perpetrator(perpetrator_file)
+            self.persist("perpetrator_files", "insert", perpetrator_file)
+
+        # 3. Apply the new penalties
+        detention_units, fine = report_penalties(crimes_committed)
+        perpetrator_file['total_detention_units'] += detention_units
+        perpetrator_file['total_fine'] += fine
+        if report['id'] not in perpetrator_file['linked_report_ids']:
+            perpetrator_file['linked_report_ids'].append(report['id'])
+        if perpetrator_file is not old_perpetrator_file:
+            changed_perpetrator_files.append(perpetrator_file)
+
+        report['report_id'] = report_id
+        changed_counts = self.repository.set_report_perpetrator_name(report, perpetrator_name)
+        report['type'] = report_type
+        report['crimes_committed'] = crimes_committed
+        report['description'] = description
+        self.repository.link_report(report, perpetrator_file['id'])
+
+        self.persist("reports", "update", report)
+        for changed_pf in changed_perpetrator_files:
+            self.persist("perpetrator_files", "update", changed_pf)
+        return changed_counts, perpetrator_created
+
+    def delete_report(self, report, index=None):
+        """Löscht eine Anzeige und zieht ihre Strafen von der verknüpften Täterakte ab."""
+        perpetrator_file = self.repository.get_perpetrator(report.get('linked_perpetrator_id'))
+        if perpetrator_file:
+            detention_units, fine = report_penalties(report.get('crimes_committed', []))
+            perpetrator_file['total_detention_units'] -= detention_units
+            perpetrator_file['total_fine'] -= fine
+            if report['id'] in perpetrator_file['linked_report_ids']:
+                perpetrator_file['linked_report_ids'].remove(report['id'])
+            self.persist("perpetrator_files", "update", perpetrator_file)
+        self.repository.remove_report(report, index)
+        self.persist("reports", "delete", report)
+
+    # --- Penalty totals ---
+    def check_totals(self):
+        """Rechnet die Strafsummen aller Täterakten nach. Gibt [(Täterakte, Hafteinheiten, Geldstrafe)] der abweichenden zurück."""
+        totals = compute_totals(list(self.reports)) # Snapshot: the UI thread may append meanwhile
+        drift = []
+        for pf in list(self.perpetrator_files):
+            detention_units, fine = totals.get(pf['id'], (0, 0))
+            if pf.get('total_detention_units', 0) != detention_units or pf.get('total_fine', 0) != fine:
+                drift.append((pf, detention_units, fine))
+        return drift
+
+    def repair_totals(self, drift=None):
+        """Setzt die Strafsummen abweichender Täterakten neu. Gibt die Anzahl korrigierter Akten zurück."""
+        repaired = []
+        for pf, _, _ in (self.check_totals() if drift is None else drift):
+            if self.repository.get_perpetrator(pf['id']) is not pf:
+                continue # Deleted meanwhile
+            detention_units, fine = compute_totals(self.repository.reports_for_perpetrator(pf['id'])).get(pf['id'], (0, 0))
+            if pf.get('total_detention_units', 0) == detention_units and pf.get('total_fine', 0) == fine:
+                continue
+            pf['total_detention_units'] = detention_units
+            pf['total_fine'] = fine
+            repaired.append(pf)
+        self.persist_updates("perpetrator_files", repaired)
+        return len(repaired)
+
+    # --- Perpetrator photos ---
+    def can_collect_images(self):
+        """False, wenn Bildverweise fehlen könnten (Sammlung nicht geladen oder lokale Dateien als Ersatz)."""
+        return not self.failed_collections and not self.storage.fallback
+
+    def rename_images(self, renamed):
+        """Stellt image_filename aller Täterakten nach {alter Name: neuer Name} um. Gibt die Anzahl geänderter Akten zurück."""
+        changed = []
+        for pf in self.perpetrator_files:
+            new_name = renamed.get(pf.get('image_filename'))
+            if new_name:
+                pf['image_filename'] = new_name
+                changed.append(pf)
+        self.persist_updates("perpetrator_files", changed)
+        return len(changed)
+
+    # --- Crime catalogue ---
+    def find_crime(self, name):
+        """Sucht eine Straftat im Katalog nach Name oder Paragraph (ohne Groß-/Kleinschreibung)."""
+        key = name.strip().casefold()
+        for crime in self.predefined_crimes:
+            if crime['name'].casefold() == key or (crime.get('paragraph') or '').casefold() == key:
+                return crime
+        return None
+
+    def crime_selection(self, names_with_counts):
+        """Baut die crimes_committed-Liste aus (Name, Anzahl)-Paaren. Unbekannte Namen lösen KeyError aus."""
+        selection = []
+        for name, count in names_with_counts:
+            crime = self.find_crime(name)
+            if not crime:
+                raise KeyError(name)
+            selection.append(committed_crime(crime, count))
+        return selection
+
+    # --- Report presets ---
+    def find_preset(self, name_or_id):
+        key = name_or_id.strip().casefold()
+        for preset in self.report_presets:
+            if preset.get('id') == name_or_id or preset['name'].casefold() == key:
+                return preset
+        return None
+
+    def render_preset(self, preset, values):
+        """Füllt ein Preset mit den Werten aus; nicht angegebene Platzhalter werden entfernt."""
+        return self.template_cache.get(preset).render(values)
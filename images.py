@@ -0,0 +1,416 @@
+import hashlib
+import io
+import os
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+DEFAULT_THUMBNAIL_BUDGET_MB = 32 # Default memory budget of the thumbnail cache
+PLACEHOLDER_SIZE = 150 # Same size as the cropped perpetrator photos
+GC_GRACE_SECONDS = 3600 # Unreferenced images younger than this may belong to a form that is still open
+# Encodings for perpetrator photos: setting value -> (file extension, description)
+IMAGE_FORMATS = {
+    "png": (".png", "PNG, verlustfrei optimiert"),
+    "png-palette": (".png", "PNG mit 256-Farben-Palette (klein, leichte Farbverluste)"),
+    "webp": (".webp", "WebP, verlustfrei"),
+    "webp-lossy": (".webp", "WebP, Qualität 85 (am kleinsten)"),
+}
+DEFAULT_IMAGE_FORMAT = "png"
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "icc_profile", "comment", "photoshop") # Image.info keys re-encoding removes
+WEBP_METADATA_CHUNKS = (b"EXIF", b"XMP ", b"ICCP")
+PLACEHOLDER_COLORS = { # background, figure, outline, "?" text
+    "light": ((200, 200, 200), (100, 100, 100), (50, 50, 50), (0, 0, 0)),
+    "dark": ((60, 60, 60), (150, 150, 150), (200, 200, 200), (255, 255, 255)),
+}
+
+
+class ThumbnailCache:
+    """LRU-Zwischenspeicher für verkleinerte Täterbilder (PhotoImages und dekodierte Originale) mit Speicherbudget."""
+
+    def __init__(self, budget_bytes=DEFAULT_THUMBNAIL_BUDGET_MB * 1024 * 1024, photo_factory=None):
+        self.budget_bytes = budget_bytes
+        self.photo_factory = photo_factory # PIL image -> displayable image; ImageTk.PhotoImage by default
+        self.entries = OrderedDict() # key -> (image, estimated bytes); most recently used last
+        self.sizes = {} # (path, mtime) -> size of the original, so a cached thumbnail is found without decoding
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, box):
+        """Gibt das Bild verkleinert auf höchstens box=(Breite, Höhe) zurück (wie Image.thumbnail mit LANCZOS)."""
+        from PIL import Image
+        mtime = os.stat(path).st_mtime_ns # Raises OSError for a missing file, like Image.open did
+        size = self.sizes.get((path, mtime))
+        if size is not None:
+            photo = self._lookup((path, self._clamp(box, size), mtime))
+            if photo is not None:
+                self.hits += 1
+                return photo
+        source = self._lookup(("source", path, mtime))
+        if source is None:
+            with Image.open(path) as opened:
+                opened.load()
+                source = opened.copy() if opened.mode in ("RGB", "RGBA", "L", "LA") else opened.convert("RGBA")
+            self.sizes[(path, mtime)] = source.size
+            source_bytes = source.width * source.height * 4
+            if source_bytes <= self.budget_bytes: # A larger one would push every thumbnail out
+                self._store(("source", path, mtime), source, source_bytes)
+        key = (path, self._clamp(box, source.size), mtime)
+        photo = self._lookup(key)
+        if photo is not None:
+            self.hits += 1
+            return photo
+        self.misses += 1
+        thumbnail = source.copy()
+        thumbnail.thumbnail(key[1], Image.Resampling.LANCZOS)
+        photo = self._make_photo(thumbnail)
+        self._store(key, photo, thumbnail.width * thumbnail.height * 4)
+        return photo
+
+    @staticmethod
+    def _clamp(box, size):
+        # Boxes at least as large as the image give the same result, so they share one entry
+        return (min(box[0], size[0]), min(box[1], size[1]))
+
+    def _make_photo(self, image):
+        if self.photo_factory:
+            return self.photo_factory(image)
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(image)
+
+    def _lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, key, image, size):
+        old = self.entries.pop(key, None)
+        if old:
+            self.used_bytes -= old[1]
+        self.entries[key] = (image, size)
+        self.used_bytes += size
+        self._evict()
+
+    def _evict(self):
+        # The newest entry always stays, even if it alone exceeds the budget
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.used_bytes -= size
+
+
+@lru_cache(maxsize=None)
+def placeholder_font(pixel_size):
+    """Schrift für das "?" im Platzhalter; die Suche nach einer TrueType-Schrift passiert nur einmal pro Größe."""
+    from PIL import ImageFont
+    for font_name in ("arial.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(font_name, pixel_size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(pixel_size) # Scalable default font (Pillow 10.1+)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def draw_placeholder_avatar(theme, size=PLACEHOLDER_SIZE):
+    """Zeichnet das Platzhalterbild (graue Person mit ?) für ein Farbschema als PIL-Bild."""
+    from PIL import Image, ImageDraw
+    background, fill_color, outline_color, text_color = PLACEHOLDER_COLORS["light" if theme == "light" else "dark"]
+    scale = size / PLACEHOLDER_SIZE
+    def box(*coords):
+        return tuple(round(c * scale) for c in coords)
+
+    img = Image.new('RGB', (size, size), color=background)
+    d = ImageDraw.Draw(img)
+    d.ellipse(box(30, 20, 120, 110), fill=fill_color, outline=outline_color, width=max(1, round(2 * scale)))
+    d.line(box(75, 110, 75, 130), fill=fill_color, width=max(1, round(5 * scale)))
+    d.arc(box(20, 100, 130, 180), 0, 180, fill=fill_color, width=max(1, round(5 * scale)))
+
+    font = placeholder_font(max(1, round(80 * scale)))
+    text_bbox = d.textbbox((0, 0), "?", font=font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    d.text(((size - text_width) / 2, (size - text_height) / 2), "?", font=font, fill=text_color)
+    return img
+
+
+class PlaceholderCache:
+    """Fertig gezeichnete Platzhalterbilder, einmal pro (Farbschema, Größe) erzeugt und überall gemeinsam genutzt."""
+
+    def __init__(self, photo_factory=None):
+        self.photo_factory = photo_factory # PIL image -> displayable image; ImageTk.PhotoImage by default
+        self.images = {} # (theme, size) -> image
+
+    def get(self, theme, size=PLACEHOLDER_SIZE):
+        key = (theme, size)
+        image = self.images.get(key)
+        if image is None:
+            avatar = draw_placeholder_avatar(theme, size)
+            if self.photo_factory:
+                image = self.photo_factory(avatar)
+            else:
+                from PIL import ImageTk
+                image = ImageTk.PhotoImage(avatar)
+            self.images[key] = image
+        return image
+
+
+def encode_image(image, image_format=DEFAULT_IMAGE_FORMAT):
+    """Kodiert ein Bild im gewählten Format ohne Metadaten (EXIF, Kommentare). Gibt die Bytes zurück."""
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unbekanntes Bildformat: {image_format}")
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {} # Strip EXIF and other metadata that Pillow would otherwise write back
+    buffer = io.BytesIO()
+    if image_format == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    elif image_format == "png-palette":
+        from PIL import Image
+        # Median cut gives the better palette but cannot handle alpha
+        method = Image.Quantize.FASTOCTREE if has_alpha else Image.Quantize.MEDIANCUT
+        image.quantize(colors=256, method=method).save(buffer, format="PNG", optimize=True)
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", lossless=True, method=6)
+    else:
+        image.save(buffer, format="WEBP", quality=85, method=6)
+    return buffer.getvalue()
+
+
+def has_metadata(image):
+    """True, wenn ein geöffnetes Bild EXIF, XMP, ein Farbprofil, Kommentare oder PNG-Textfelder mitbringt."""
+    return any(key in image.info for key in METADATA_KEYS) or bool(getattr(image, "text", None))
+
+
+def _webp_chunks(data):
+    """(FourCC, Inhalt) der Chunks einer WebP-Datei (RIFF-Container)."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WEBP":
+        raise ValueError("Keine WebP-Datei")
+    position = 12
+    while position + 8 <= len(data):
+        size = int.from_bytes(data[position + 4:position + 8], "little")
+        yield data[position:position + 4], data[position + 8:position + 8 + size]
+        position += 8 + size + (size & 1) # Chunks are padded to an even length
+
+
+def strip_webp_metadata(data):
+    """Entfernt EXIF-, XMP- und ICC-Chunks aus einer WebP-Datei, ohne die Bilddaten neu zu kodieren."""
+    chunks = []
+    for fourcc, payload in _webp_chunks(data):
+        if fourcc in WEBP_METADATA_CHUNKS:
+            continue
+        if fourcc == b"VP8X":
+            payload = bytes([payload[0] & ~0x2C]) + payload[1:] # Clear the ICC (0x20), EXIF (0x08) and XMP (0x04) flags
+        chunks.append(fourcc + len(payload).to_bytes(4, "little") + payload + b"\0" * (len(payload) & 1))
+    body = b"WEBP" + b"".join(chunks)
+    return b"RIFF" + len(body).to_bytes(4, "little") + body
+
+
+def _already_lossy(image, data, image_format):
+    """True, wenn die Datei schon im verlustbehafteten Zielformat vorliegt; erneutes Kodieren würde nur Qualität kosten."""
+    if image_format == "webp-lossy":
+        return image.format == "WEBP" and any(fourcc == b"VP8 " for fourcc, _ in _webp_chunks(data))
+    if image_format == "png-palette":
+        return image.format == "PNG" and image.mode == "P"
+    return False
+
+
+def _without_metadata(image, data):
+    """Die Datei eines schon verlustbehaftet kodierten Bildes ohne Metadaten, Bildpunkte unverändert."""
+    if image.format == "WEBP":
+        return strip_webp_metadata(data)
+    clean = image.copy() # Palette PNG: saving again is lossless
+    clean.info = {key: image.info[key] for key in ("transparency",) if key in image.info}
+    buffer = io.BytesIO()
+    clean.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def write_image_file(path, data):
+    """Schreibt eine Bilddatei atomar; hat ein anderer Prozess dasselbe Bild schon geschrieben, gilt das als Erfolg."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp" # Unique per writer; mkstemp would create it readable by the owner only
+    try:
+        with open(tmp_path, 'xb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        if not os.path.exists(path):
+            raise
+
+
+def _reencode_file(task):
+    """Prozess-Worker für reencode_directory: (Verzeichnis, Dateiname, Format) -> (alter Name, neuer Name, alte Bytes, neue Bytes) oder None."""
+    from PIL import Image
+    directory, filename, image_format = task
+    path = os.path.join(directory, filename)
+    try:
+        with open(path, 'rb') as f:
+            old_data = f.read()
+        with Image.open(io.BytesIO(old_data)) as image:
+            image.load()
+            new_name = ImageStore.content_hash(image) + IMAGE_FORMATS[image_format][0]
+            metadata = has_metadata(image)
+            if _already_lossy(image, old_data, image_format):
+                if not metadata:
+                    return None # Encoding lossy pixels again would only lose more quality
+                data = _without_metadata(image, old_data)
+            else:
+                data = encode_image(image, image_format)
+    except (OSError, ValueError):
+        return None # Not a readable image; left alone
+    old_size = len(old_data)
+    if len(data) >= old_size and not metadata:
+        return None # Only worth it if the file gets smaller; metadata is removed in any case
+    new_path = os.path.join(directory, new_name)
+    if new_name == filename or not os.path.exists(new_path): # Otherwise the same picture is already stored
+        write_image_file(new_path, data)
+    return filename, new_name, old_size, len(data)
+
+
+def reencode_directory(directory, filenames, image_format=DEFAULT_IMAGE_FORMAT, workers=None, progress=None):
+    """Kodiert Bilder parallel neu. Gibt ({alter Name: neuer Name}, eingesparte Bytes) zurück."""
+    renamed = {}
+    saved = 0
+    tasks = [(directory, filename, image_format) for filename in filenames]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, result in enumerate(pool.map(_reencode_file, tasks, chunksize=16), 1):
+            if result:
+                old_name, new_name, old_size, new_size = result
+                if new_name != old_name:
+                    renamed[old_name] = new_name
+                saved += old_size - new_size
+            if progress:
+                progress(done, len(tasks))
+    return renamed, saved
+
+
+class ImageStore:
+    """Inhaltsadressierte Ablage der Täterbilder mit Verweiszählung; gelöscht wird nur von collect_garbage()."""
+
+    def __init__(self, directory, image_format=DEFAULT_IMAGE_FORMAT):
+        self.directory = directory
+        self.image_format = image_format # Encoding for new images, see IMAGE_FORMATS
+        self.refcounts = Counter() # filename -> number of perpetrator files using it
+        self.unsaved = {} # filename -> mtime_ns of images put_image wrote that no perpetrator file uses yet
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    @staticmethod
+    def content_hash(image):
+        """SHA-256 über Modus, Größe und Bildpunkte (unabhängig von der Kodierung der Datei)."""
+        digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode("ascii"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def put_image(self, image):
+        """Speichert ein Bild (falls noch nicht vorhanden) und gibt seinen Dateinamen zurück."""
+        content_hash = self.content_hash(image)
+        for extension in dict.fromkeys(extension for extension, _ in IMAGE_FORMATS.values()):
+            path = self.path(content_hash + extension)
+            if os.path.exists(path): # Same picture already stored, in whatever format
+                os.utime(path) # Reused: restart the grace period so a running collection keeps it
+                if content_hash + extension in self.unsaved: # Our own unsaved crop again
+                    self.unsaved[content_hash + extension] = os.stat(path).st_mtime_ns
+                return content_hash + extension
+        filename = content_hash + IMAGE_FORMATS[self.image_format][0]
+        write_image_file(self.path(filename), encode_image(image, self.image_format)) # Safe if other processes store the same picture
+        try:
+            self.unsaved[filename] = os.stat(self.path(filename)).st_mtime_ns
+        except OSError:
+            pass
+        return filename
+
+    def discard_unsaved(self, filename):
+        """Löscht ein von put_image neu gespeichertes Bild, das doch keine Täterakte bekommen hat (Zuschnitt verworfen)."""
+        mtime = self.unsaved.pop(filename, None)
+        if mtime is None or self.refcounts.get(filename):
+            return
+        try:
+            if os.stat(self.path(filename)).st_mtime_ns == mtime: # Touched since: another instance reuses it, collect_garbage decides
+                os.remove(self.path(filename))
+        except OSError:
+            pass
+
+    # --- Reference index ---
+    def rebuild_index(self, records):
+        self.refcounts = Counter(record['image_filename'] for record in records if record.get('image_filename'))
+
+    def add_ref(self, filename):
+        if filename:
+            self.refcounts[filename] += 1
+            self.unsaved.pop(filename, None)
+
+    def release(self, filename):
+        """Gibt einen Verweis frei. Gibt die Anzahl verbleibender Verweise zurück (0: Kandidat fürs Aufräumen)."""
+        if not filename:
+            return 0
+        self.refcounts[filename] -= 1
+        if self.refcounts[filename] <= 0:
+            del self.refcounts[filename]
+            return 0
+        return self.refcounts[filename]
+
+    # --- Maintenance (safe to run in a background thread with a snapshot of the referenced names) ---
+    def _files(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [(entry.name, entry.stat()) for entry in entries if entry.is_file() and not entry.name.endswith(".tmp")]
+        except FileNotFoundError:
+            return []
+
+    def collect_garbage(self, referenced, grace_seconds=GC_GRACE_SECONDS):
+        """Löscht Bilder, auf die keine Täterakte verweist. Gibt (Anzahl, freigegebene Bytes) zurück."""
+        cutoff = time.time() - grace_seconds
+        removed = freed = 0
+        for name, stat in self._files():
+            if name in referenced or stat.st_mtime > cutoff:
+                continue
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                continue
+            removed += 1
+            freed += stat.st_size
+        return removed, freed
+
+    def reencode(self, referenced, image_format=None, workers=None, progress=None):
+        """Kodiert alle verwendeten Bilder neu; danach Täterakten umstellen und finish_reencode aufrufen."""
+        names = sorted(name for name in referenced if os.path.exists(self.path(name)))
+        return reencode_directory(self.directory, names, image_format or self.image_format, workers, progress)
+
+    def finish_reencode(self, renamed, records):
+        """Zählt die Verweise neu und löscht die ersetzten Dateien, sofern sie niemand mehr verwendet."""
+        self.rebuild_index(records)
+        for old_name in renamed:
+            if not self.refcounts[old_name]:
+                try:
+                    os.remove(self.path(old_name))
+                except OSError:
+                    pass # Left for the next garbage collection
+
+    def report(self, referenced):
+        """Kennzahlen der Bildablage als dict (Dateien, Bytes, verwaiste und fehlende Bilder)."""
+        files = self._files()
+        names = {name for name, _ in files}
+        orphaned = [(name, stat) for name, stat in files if name not in referenced]
+        return {
+            "files": len(files),
+            "bytes": sum(stat.st_size for _, stat in files),
+            "referenced_files": len(names & set(referenced)),
+            "references": sum(self.refcounts.values()),
+            "shared_files": sum(1 for count in self.refcounts.values() if count > 1),
+            "orphaned_files": len(orphaned),
+            "orphaned_bytes": sum(stat.st_size for _, stat in orphaned),
+            "missing_files": sorted(set(referenced) - names),
+            "legacy_files": sum(1 for name in names if len(os.path.splitext(name)[0]) != 64), # Saved before content addressing
+        }
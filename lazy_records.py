@@ -0,0 +1,265 @@
+"""Bedarfsweises Laden großer JSON-Sammlungen über einen per mmap aufgebauten Offset-Index."""
+import json
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+
+RECORD_START = b"\n    {" # Only files as the app writes them (json.dump with indent=4); others are loaded normally
+RECORD_END = b"\n    }"
+READ_CACHE_SIZE = 256 # Fully parsed records kept for repeated reads (e.g. selecting the same report again)
+
+
+class LazyRecord(dict):
+    """Datensatz, von dem zunächst nur einige Felder im Speicher liegen; jede Änderung lädt ihn vollständig."""
+
+    __slots__ = ("_source",)
+
+    def __init__(self, fields, source):
+        dict.__init__(self, fields)
+        self._source = source # RecordFile; None once fully loaded
+
+    @property
+    def loaded(self):
+        return self._source is None
+
+    def load(self):
+        """Lädt den Datensatz vollständig in den Speicher."""
+        if self._source is not None:
+            data = self._source.take(dict.__getitem__(self, 'id'))
+            self._source = None
+            if data:
+                dict.update(self, data)
+
+    def _full(self):
+        if self._source is None:
+            return self
+        return self._source.read(dict.__getitem__(self, 'id')) or dict(dict.items(self)) # Gone from the file: what we know
+
+    # --- Reads ---
+    def __getitem__(self, key):
+        if self._source is None or dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        return self._full()[key]
+
+    def get(self, key, default=None):
+        if self._source is None or dict.__contains__(self, key):
+            return dict.get(self, key, default)
+        return self._full().get(key, default)
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (self._source is not None and key in self._full())
+
+    def __iter__(self):
+        return dict.__iter__(self) if self._source is None else iter(self._full())
+
+    def __len__(self):
+        return dict.__len__(self) if self._source is None else len(self._full())
+
+    def keys(self):
+        return dict.keys(self) if self._source is None else self._full().keys()
+
+    def values(self):
+        return dict.values(self) if self._source is None else self._full().values()
+
+    def items(self):
+        return dict.items(self) if self._source is None else self._full().items()
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, dict) and other.get('id') != dict.get(self, 'id'):
+            return False # Different ids: no need to read either record
+        return dict.__eq__(self._full(), dict(other.items()) if isinstance(other, LazyRecord) else other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+    # --- Writes: load everything first, then behave like a plain dict ---
+    def __setitem__(self, key, value):
+        self.load()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.load()
+        dict.__delitem__(self, key)
+
+    def pop(self, *args):
+        self.load()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.load()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self.load()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        self.load()
+        dict.update(self, *args, **kwargs)
+
+    def clear(self):
+        self._source = None # Nothing of the old content survives, so no need to read it
+        dict.clear(self)
+
+
+def _decode_value(raw):
+    """JSON-Wert einer Zeile; einfache Zeichenketten und Zahlen ohne den (langsameren) JSON-Parser."""
+    if raw[:1] == b'"' and raw[-1:] == b'"' and b"\\" not in raw:
+        return raw[1:-1].decode('utf-8')
+    if raw.isdigit():
+        return int(raw)
+    return json.loads(raw)
+
+
+def _file_stamp(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class RecordFile:
+    """Offset-Index über eine JSON-Datei mit einer Liste von Datensätzen, neu aufgebaut, wenn sich die Datei ändert."""
+
+    def __init__(self, filename, prepare=None):
+        self.filename = filename
+        self.prepare = prepare # Called with every record read from the file (e.g. migrations)
+        self.lock = threading.RLock()
+        self._offsets = {} # id -> (start, end) byte offsets of the record's JSON text
+        self._stamp = None
+        self._cache = OrderedDict()
+
+    def load_records(self, fields, defaults=None):
+        """Baut den Index auf und gibt die Datensätze mit nur den Feldern fields zurück (None bei fremdem Format)."""
+        with self.lock:
+            records = []
+            for record_id, start, end, values in self._scan(fields):
+                if record_id is None:
+                    records.append(self._parse(start, end))
+                else:
+                    if defaults:
+                        for field, value in defaults.items():
+                            values.setdefault(field, value)
+                    records.append(LazyRecord(values, self))
+            return records if self._stamp is not None else None
+
+    def refresh(self):
+        """Baut den Index neu auf, falls sich die Datei geändert hat."""
+        with self.lock:
+            if _file_stamp(self.filename) != self._stamp:
+                for _ in self._scan(()):
+                    pass
+
+    def read(self, record_id):
+        """Der vollständige Datensatz (zwischengespeichert) oder None, wenn er nicht mehr in der Datei steht."""
+        with self.lock:
+            record = self._cache.get(record_id)
+            if record is not None:
+                self._cache.move_to_end(record_id)
+                return record
+            record = self._read(record_id)
+            if record is not None:
+                self._cache[record_id] = record
+                if len(self._cache) > READ_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            return record
+
+    def take(self, record_id):
+        """Wie read(), aber der Datensatz gehört danach dem Aufrufer (wird nicht mehr zwischengespeichert)."""
+        with self.lock:
+            record = self._cache.pop(record_id, None)
+            return record if record is not None else self._read(record_id)
+
+    def spans(self):
+        """{id: (Start, Ende)} der Datensätze in der Datei oder None, wenn sie nicht im erwarteten Format ist."""
+        with self.lock:
+            self.refresh()
+            return self._offsets if self._stamp is not None else None
+
+    def replaced(self, offsets):
+        """Übernimmt den Offset-Index einer gerade selbst geschriebenen Datei, statt sie neu zu durchsuchen."""
+        with self.lock:
+            self._offsets = offsets
+            self._cache.clear()
+            self._stamp = _file_stamp(self.filename)
+
+    def _read(self, record_id):
+        for attempt in range(2):
+            self.refresh()
+            span = self._offsets.get(record_id)
+            if span is None:
+                return None
+            try:
+                record = self._parse(*span)
+            except (OSError, ValueError):
+                record = None
+            if isinstance(record, dict) and record.get('id') == record_id:
+                return record
+            self._stamp = None # Replaced between stat() and read(): rescan once
+        return None
+
+    def _parse(self, start, end):
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            record = json.loads(f.read(end - start))
+        if self.prepare:
+            self.prepare(record)
+        return record
+
+    def _scan(self, fields):
+        """Durchsucht die Datei; erzeugt (id, Start, Ende, {Feld: Wert}) je Datensatz."""
+        self._offsets = {}
+        self._cache.clear()
+        self._stamp = None
+        stamp = _file_stamp(self.filename)
+        wanted = {field.encode(): field for field in ("id",) + tuple(fields)}
+        # One line per top-level field: exactly eight spaces, "key": value, optional comma. Starting
+        # with a literal lets the regex engine skip ahead quickly over long description lines.
+        pattern = re.compile(rb'\n        "(' + b"|".join(re.escape(field) for field in wanted) + rb')": ([^\n]*?),?(?=\n)')
+        with open(self.filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < 2:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:2] == b"[]" and not data[2:].strip():
+                    self._stamp = stamp
+                    return
+                if data[:len(RECORD_START) + 1] != b"[" + RECORD_START:
+                    return # Not written by the app (e.g. compact JSON): caller falls back to a full load
+                position = 0
+                while True:
+                    start = data.find(RECORD_START, position)
+                    if start < 0:
+                        break
+                    end = data.find(RECORD_END, start + 1)
+                    if end < 0:
+                        self._offsets = {}
+                        return
+                    start += 5 # Skip "\n    " up to the opening brace
+                    end += len(RECORD_END)
+                    values = {}
+                    for field, raw in pattern.findall(data, start, end):
+                        try:
+                            values[wanted[field]] = _decode_value(raw)
+                        except ValueError:
+                            pass # Not a one-line value; read with the full record
+                    record_id = values.get('id')
+                    if record_id is not None:
+                        self._offsets[record_id] = (start, end)
+                    yield record_id, start, end, values
+                    position = end
+        self._stamp = stamp
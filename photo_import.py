@@ -0,0 +1,114 @@
+"""Massenimport von Täterbildern aus einem nach Tätern benannten Ordner oder einer CSV-/JSONL-Zuordnung."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import iter_rows
+from images import PLACEHOLDER_SIZE, ImageStore
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff")
+FILE_COLUMNS = ("datei", "file", "bild", "image", "pfad", "path") # Accepted names of the file column in a mapping
+
+
+def photos_in_folder(folder):
+    """[(Tätername, Pfad), ...] für alle Bilddateien eines Ordners; der Name ist der Dateiname ohne Endung."""
+    photos = []
+    for filename in sorted(os.listdir(folder)):
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() in IMAGE_EXTENSIONS:
+            photos.append((stem.replace("_", " ").strip(), os.path.join(folder, filename)))
+    return photos
+
+
+def photos_from_mapping(path):
+    """[(Tätername, Pfad), ...] aus einer CSV-/JSONL-Datei; relative Pfade gelten ab dem Ordner der Datei."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    photos = []
+    for line_number, row in enumerate(iter_rows(path), 2): # Line 1 is the header
+        row = {str(key).strip().lower(): str(value).strip() for key, value in row.items() if key is not None and value is not None}
+        filename = next((row[column] for column in FILE_COLUMNS if row.get(column)), None)
+        if not row.get("name") or not filename:
+            raise ValueError(f"Zeile {line_number} in {path} braucht die Spalten 'name' und 'datei'.")
+        photos.append((row["name"], os.path.join(base_dir, filename)))
+    return photos
+
+
+def center_crop(image, size=PLACEHOLDER_SIZE):
+    """Schneidet das größte mittige Quadrat aus und verkleinert es wie perform_crop (LANCZOS)."""
+    from PIL import Image
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    return image.crop((left, top, left + side, top + side)).resize((size, size), Image.Resampling.LANCZOS)
+
+
+def _import_photo(task):
+    """Prozess-Worker: (Pfad, Bildablage, Format) -> (Dateiname in der Ablage, None) oder (None, Fehlertext)."""
+    from PIL import Image, ImageOps
+    path, directory, image_format = task
+    try:
+        with Image.open(path) as image:
+            image.draft("RGB", (PLACEHOLDER_SIZE * 2, PLACEHOLDER_SIZE * 2)) # JPEG: decode at reduced scale, much faster for camera photos
+            image = ImageOps.exif_transpose(image) # Phone photos are often stored rotated
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB") # Palette images would otherwise be resized with NEAREST
+            return ImageStore(directory, image_format).put_image(center_crop(image)), None
+    except (OSError, ValueError) as e:
+        return None, str(e)
+
+
+def match_photos(photos, repository):
+    """Ordnet die Bilder Täterakten zu. Gibt ([(Täterakte, Pfad), ...], [nicht gefundene Namen]) zurück."""
+    matched, unmatched = [], []
+    for name, path in photos:
+        pf = repository.get_perpetrator_by_name(name)
+        if pf:
+            matched.append((pf, path))
+        else:
+            unmatched.append(name)
+    return matched, unmatched
+
+
+def process_photos(paths, store, workers=None, progress=None):
+    """Schneidet und speichert die Bilder parallel. Gibt [(Dateiname, Fehler), ...] in der Reihenfolge von paths zurück."""
+    results = []
+    tasks = [(path, store.directory, store.image_format) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, result in enumerate(pool.map(_import_photo, tasks, chunksize=8), 1):
+            results.append(result)
+            if progress:
+                progress(done, len(tasks))
+    return results
+
+
+def attach_photos(core, store, matched, results):
+    """Hängt die gespeicherten Bilder an die Täterakten. Gibt {"attached", "unchanged", "failed"} zurück."""
+    summary = {"attached": 0, "unchanged": 0, "failed": []}
+    for (pf, path), (filename, error) in zip(matched, results):
+        if error:
+            summary["failed"].append((pf['name'], f"{os.path.basename(path)}: {error}"))
+            continue
+        if core.repository.get_perpetrator(pf['id']) is not pf:
+            summary["failed"].append((pf['name'], "Täterakte wurde inzwischen gelöscht."))
+            continue
+        if pf.get('image_filename') == filename:
+            summary["unchanged"] += 1
+            continue
+        store.add_ref(filename)
+        store.release(pf.get('image_filename'))
+        pf['image_filename'] = filename
+        core.persist("perpetrator_files", "update", pf)
+        summary["attached"] += 1
+    return summary
+
+
+def format_summary(summary, unmatched):
+    """Kurze Zusammenfassung eines Imports für Meldungen und die Kommandozeile."""
+    lines = [f"{summary['attached']} Bilder zugeordnet, {summary['unchanged']} unverändert."]
+    if unmatched:
+        lines.append(f"Keine Täterakte für {len(unmatched)} Bilder: {', '.join(unmatched[:10])}{' ...' if len(unmatched) > 10 else ''}")
+    if summary["failed"]:
+        lines.append(f"{len(summary['failed'])} Bilder fehlgeschlagen:")
+        lines.extend(f"  - {name}: {error}" for name, error in summary["failed"][:10])
+        if len(summary["failed"]) > 10:
+            lines.append(f"  ... und {len(summary['failed']) - 10} weitere")
+    return "\n".join(lines)
@@ -0,0 +1,82 @@
+"""Gemeinsam genutzte Straftateneinträge und Zeichenketten für Anzeigen und Täterakten; die Datensätze bleiben dicts."""
+import sys
+
+from lazy_records import LazyRecord
+
+INTERNED_REPORT_FIELDS = ("id", "type", "perpetrator_name", "linked_perpetrator_id") # Repeated across reports or shared with perpetrator files
+
+
+class CrimeEntry(dict):
+    """Unveränderliche, von allen Anzeigen mit gleichem Inhalt geteilte Straftat mit vorberechneter penalty."""
+
+    __slots__ = ("penalty",)
+
+    def __init__(self, crime):
+        dict.__init__(self, crime)
+        count = crime.get('count', 1)
+        self.penalty = (crime.get('detention_units', 0) * count, crime.get('fine', 0) * count)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Straftaten einer Anzeige werden geteilt und nicht verändert; bitte eine Kopie ändern.")
+
+    __setitem__ = __delitem__ = pop = popitem = setdefault = update = clear = __ior__ = _read_only
+
+    def __reduce__(self):
+        return dict, (dict(self),) # copy/deepcopy/pickle give a plain, changeable dict
+
+
+def crime_penalty(crime):
+    """(Hafteinheiten, Geldstrafe) einer Straftat mal Anzahl."""
+    if type(crime) is CrimeEntry:
+        return crime.penalty
+    count = crime.get('count', 1)
+    return crime.get('detention_units', 0) * count, crime.get('fine', 0) * count
+
+
+class RecordPool:
+    """Teilt gleiche Straftaten-Einträge und wiederkehrende Zeichenketten zwischen Datensätzen."""
+
+    def __init__(self):
+        self._crimes = {} # tuple of items -> CrimeEntry
+
+    def crime(self, crime):
+        if type(crime) is CrimeEntry or not isinstance(crime, dict):
+            return crime # Already shared, or an old plain-string entry
+        try:
+            key = tuple(crime.items()) # Keeps the key order, so files are written byte for byte as before
+            entry = self._crimes.get(key)
+            if entry is None:
+                entry = self._crimes[key] = CrimeEntry(crime)
+        except TypeError:
+            return crime # Unhashable or non-numeric values (hand-edited file): keep it as it is
+        return entry
+
+    def crimes(self, crimes_committed):
+        shared = []
+        pool = self._crimes
+        for crime in crimes_committed: # Runs for every crime of every report at startup, hence the inlined fast path
+            try:
+                entry = pool.get(tuple(crime.items())) if type(crime) is dict else None
+            except TypeError:
+                entry = None # Unhashable value, see crime()
+            shared.append(entry if entry is not None else self.crime(crime))
+        return shared
+
+    def compact_report(self, report):
+        if isinstance(report, LazyRecord) and not report.loaded:
+            return # Only the list fields are in memory anyway
+        crimes_committed = report.get('crimes_committed')
+        if isinstance(crimes_committed, list):
+            report['crimes_committed'] = self.crimes(crimes_committed)
+        for field in INTERNED_REPORT_FIELDS:
+            value = report.get(field)
+            if type(value) is str:
+                report[field] = sys.intern(value)
+
+    def compact_perpetrator(self, pf):
+        if type(pf.get('id')) is str:
+            pf['id'] = sys.intern(pf['id'])
+        linked_report_ids = pf.get('linked_report_ids')
+        if isinstance(linked_report_ids, list):
+            # Same string objects as the reports' ids
+            pf['linked_report_ids'] = [sys.intern(report_id) if type(report_id) is str else report_id for report_id in linked_report_ids]
@@ -0,0 +1,164 @@
+class AktenRepository:
+    """Hält Anzeigen und Täterakten im Speicher und pflegt Indizes nach ID, Name und Verknüpfung."""
+
+    def __init__(self, reports, perpetrator_files):
+        self.reports = reports
+        self.perpetrator_files = perpetrator_files
+        self.rebuild()
+
+    def rebuild(self):
+        """Baut alle Indizes aus den Listen neu auf."""
+        self.reports_by_id = {} # report id -> report
+        self.perpetrators_by_id = {} # perpetrator id -> perpetrator file
+        self.perpetrators_by_name = {} # casefolded name -> perpetrator file
+        self.report_ids_by_perpetrator = {} # perpetrator id -> {report id: None} (ordered set)
+        self.report_counts_by_name = {} # perpetrator_name -> number of reports (shown in the reports list)
+        for pf in self.perpetrator_files:
+            self._index_perpetrator(pf)
+        for report in self.reports:
+            self._index_report(report)
+
+    @staticmethod
+    def name_key(name):
+        """Normalisierter Schlüssel für Namensvergleiche ohne Beachtung der Groß-/Kleinschreibung."""
+        return (name or "").strip().casefold()
+
+    # --- Lookups ---
+    def get_report(self, report_id):
+        return self.reports_by_id.get(report_id)
+
+    def get_perpetrator(self, perpetrator_id):
+        return self.perpetrators_by_id.get(perpetrator_id)
+
+    def get_perpetrator_by_name(self, name):
+        return self.perpetrators_by_name.get(self.name_key(name))
+
+    def linked_reports(self, pf):
+        """Die in einer Täterakte verknüpften Anzeigen, in der Reihenfolge von linked_report_ids."""
+        reports = []
+        for report_id in pf.get('linked_report_ids', []):
+            report = self.reports_by_id.get(report_id)
+            if report:
+                reports.append(report)
+        return reports
+
+    def reports_for_perpetrator(self, perpetrator_id):
+        """Alle Anzeigen, deren linked_perpetrator_id auf die Täterakte zeigt."""
+        return [self.reports_by_id[report_id] for report_id in self.report_ids_by_perpetrator.get(perpetrator_id, ())]
+
+    # --- Mutations ---
+    def add_report(self, report):
+        self.reports.append(report)
+        self._index_report(report)
+
+    def remove_report(self, report, index=None):
+        """Entfernt eine Anzeige; mit bekanntem Listenindex ohne Suche in der Liste."""
+        if index is not None and index < len(self.reports) and self.reports[index] is report:
+            del self.reports[index]
+        else:
+            self.reports.remove(report)
+        self._unindex_report(report)
+
+    def set_report_perpetrator_name(self, report, new_name):
+        """Ändert den Täternamen einer Anzeige. Gibt die Namen zurück, deren Anzeigenzahl sich geändert hat."""
+        old_name = report.get('perpetrator_name')
+        if old_name == new_name:
+            return set()
+        self._count_report(old_name, -1)
+        report['perpetrator_name'] = new_name
+        self._count_report(new_name, 1)
+        return {name for name in (old_name, new_name) if name}
+
+    def link_report(self, report, perpetrator_id):
+        """Setzt linked_perpetrator_id einer Anzeige (None trennt die Verknüpfung)."""
+        self._unlink_report(report)
+        report['linked_perpetrator_id'] = perpetrator_id
+        if perpetrator_id:
+            self.report_ids_by_perpetrator.setdefault(perpetrator_id, {})[report['id']] = None
+
+    def add_perpetrator(self, pf):
+        self.perpetrator_files.append(pf)
+        self._index_perpetrator(pf)
+
+    def remove_perpetrator(self, pf, index=None):
+        """Entfernt eine Täterakte; die Anzeigen bleiben erhalten, verlieren aber die Verknüpfung."""
+        if index is not None and index < len(self.perpetrator_files) and self.perpetrator_files[index] is pf:
+            del self.perpetrator_files[index]
+        else:
+            self.perpetrator_files.remove(pf)
+        unlinked_reports = self.reports_for_perpetrator(pf['id'])
+        for report in unlinked_reports:
+            report['linked_perpetrator_id'] = None
+        self.report_ids_by_perpetrator.pop(pf['id'], None)
+        self.perpetrators_by_id.pop(pf['id'], None)
+        self._unindex_perpetrator_name(pf)
+        return unlinked_reports
+
+    def rename_perpetrator(self, pf, new_name):
+        """Benennt eine Täterakte um und übernimmt den Namen in alle verknüpften Anzeigen."""
+        self._unindex_perpetrator_name(pf)
+        pf['name'] = new_name
+        self.perpetrators_by_name.setdefault(self.name_key(new_name), pf) # A file that already has the name keeps it, as in _index_perpetrator
+        renamed_reports = self.reports_for_perpetrator(pf['id'])
+        for report in renamed_reports:
+            self.set_report_perpetrator_name(report, new_name)
+        return renamed_reports
+
+    def replace_report_data(self, report, data):
+        """Übernimmt einen neuen Stand einer Anzeige (z. B. von einer anderen Instanz) an Ort und Stelle."""
+        self._unindex_report(report)
+        report.clear()
+        report.update(data)
+        self._index_report(report)
+
+    def replace_perpetrator_data(self, pf, data):
+        """Übernimmt einen neuen Stand einer Täterakte an Ort und Stelle; Verknüpfungen der Anzeigen bleiben."""
+        self.perpetrators_by_id.pop(pf['id'], None)
+        if self.name_key(data.get('name')) != self.name_key(pf['name']):
+            self._unindex_perpetrator_name(pf)
+        pf.clear()
+        pf.update(data)
+        self._index_perpetrator(pf)
+
+    # --- Index maintenance ---
+    def _count_report(self, perpetrator_name, delta):
+        if not perpetrator_name:
+            return
+        count = self.report_counts_by_name.get(perpetrator_name, 0) + delta
+        if count > 0:
+            self.report_counts_by_name[perpetrator_name] = count
+        else:
+            self.report_counts_by_name.pop(perpetrator_name, None)
+
+    def _index_report(self, report):
+        self.reports_by_id[report['id']] = report
+        self._count_report(report.get('perpetrator_name'), 1)
+        perpetrator_id = report.get('linked_perpetrator_id')
+        if perpetrator_id:
+            self.report_ids_by_perpetrator.setdefault(perpetrator_id, {})[report['id']] = None
+
+    def _unindex_report(self, report):
+        self.reports_by_id.pop(report['id'], None)
+        self._count_report(report.get('perpetrator_name'), -1)
+        self._unlink_report(report)
+
+    def _unlink_report(self, report):
+        linked = self.report_ids_by_perpetrator.get(report.get('linked_perpetrator_id'))
+        if linked is not None:
+            linked.pop(report['id'], None)
+
+    def _index_perpetrator(self, pf):
+        self.perpetrators_by_id[pf['id']] = pf
+        # First record wins, like the linear search this index replaces
+        self.perpetrators_by_name.setdefault(self.name_key(pf['name']), pf)
+
+    def _unindex_perpetrator_name(self, pf):
+        key = self.name_key(pf['name'])
+        if self.perpetrators_by_name.get(key) is not pf:
+            return
+        del self.perpetrators_by_name[key]
+        # Another record with the same name takes over, again the first one in the list
+        for other in self.perpetrator_files:
+            if other is not pf and self.name_key(other['name']) == key:
+                self.perpetrators_by_name[key] = other
+                break
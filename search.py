@@ -0,0 +1,154 @@
+import bisect
+import heapq
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_FUZZY_SIMILARITY = 0.4 # Share of common trigrams a misspelt word needs to still count as a hit
+COLLECTION_RANK = {"perpetrator_files": 0, "reports": 1, "notes": 2} # Tie-break: perpetrator files first
+
+
+def tokenize(text):
+    """Zerlegt einen Text in kleingeschriebene Wörter (Unicode-fähig, z. B. Umlaute)."""
+    return TOKEN_PATTERN.findall(str(text or "").casefold())
+
+
+def trigrams(token):
+    """Trigramme eines Wortes, mit Randmarkierung, damit auch kurze Wörter welche haben."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def note_text(note):
+    return (note.get('title'), note.get('content'))
+
+
+def report_text(report):
+    crime_names = [c.get('name') if isinstance(c, dict) else c for c in report.get('crimes_committed', [])]
+    return (report.get('report_id'), report.get('perpetrator_name'), report.get('type'), report.get('description'), *crime_names)
+
+
+def perpetrator_text(pf):
+    return (pf.get('name'), pf.get('dob'), pf.get('birthplace'), pf.get('description'))
+
+
+# Collection -> function returning the searchable fields of a record
+SEARCH_FIELDS = {
+    "notes": note_text,
+    "reports": report_text,
+    "perpetrator_files": perpetrator_text,
+}
+
+
+class SearchIndex:
+    """Invertierter Index über Notizen, Anzeigen und Täterakten, beim ersten Suchen aufgebaut und danach je Datensatz gepflegt."""
+
+    def __init__(self, sources):
+        self.sources = sources # collection -> live list of records
+        self.built = False
+
+    def build(self):
+        """Baut den Index komplett aus den Listen auf."""
+        self.records = {} # (collection, id) -> record
+        self.doc_tokens = {} # (collection, id) -> set of tokens, needed to unindex on edits
+        self.postings = {} # token -> {(collection, id): None} (ordered set)
+        self.vocabulary = [] # Sorted tokens for prefix lookups via bisect
+        self.trigram_tokens = None # trigram -> set of tokens for typo-tolerant lookups, built on the first fuzzy lookup
+        for collection, records in self.sources.items():
+            for record in records:
+                self._add(collection, record, sort_vocabulary=False)
+        self.vocabulary.sort() # Once, instead of an insort per new word
+        self.built = True
+
+    def update(self, collection, op, record):
+        """Übernimmt eine einzelne Änderung (insert/update/delete). Vor dem ersten Aufbau ist nichts zu tun."""
+        if not self.built or collection not in SEARCH_FIELDS:
+            return
+        self._remove(collection, record['id'])
+        if op != "delete":
+            self._add(collection, record)
+
+    def search(self, query, limit=200):
+        """Datensätze mit allen Wörtern der Anfrage (exakt, als Präfix oder unscharf) als [(Sammlung, Datensatz)] nach Relevanz."""
+        if not self.built:
+            self.build()
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, weight in self._matching_tokens(term):
+                for key in self.postings[token]:
+                    if weight > term_scores.get(key, 0):
+                        term_scores[key] = weight
+            if scores is None:
+                scores = term_scores
+            else: # Every term has to match
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return []
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], COLLECTION_RANK[item[0][0]]))
+        return [(key[0], self.records[key]) for key, score in ranked]
+
+    def _matching_tokens(self, term):
+        """Wörter des Index, die zu einem Suchwort passen, mit Gewichtung (exakt > Präfix > unscharf)."""
+        matches = []
+        start = bisect.bisect_left(self.vocabulary, term)
+        for position in range(start, len(self.vocabulary)):
+            token = self.vocabulary[position]
+            if not token.startswith(term):
+                break
+            matches.append((token, 3.0 if token == term else 2.0))
+        if matches or len(term) < 3:
+            return matches
+        # No exact/prefix hit: fall back to tokens sharing enough trigrams (typos, missing letters)
+        if self.trigram_tokens is None:
+            self.trigram_tokens = {}
+            for token in self.vocabulary:
+                self._index_trigrams(token)
+        term_trigrams = trigrams(term)
+        shared = {}
+        for trigram in term_trigrams:
+            for token in self.trigram_tokens.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        for token, common in shared.items():
+            similarity = common / len(term_trigrams | trigrams(token))
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                matches.append((token, similarity))
+        return matches
+
+    def _add(self, collection, record, sort_vocabulary=True):
+        key = (collection, record['id'])
+        tokens = set(tokenize(" ".join(str(field) for field in SEARCH_FIELDS[collection](record) if field)))
+        self.records[key] = record
+        self.doc_tokens[key] = tokens
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = {}
+                if sort_vocabulary:
+                    bisect.insort(self.vocabulary, token)
+                else:
+                    self.vocabulary.append(token)
+                if self.trigram_tokens is not None:
+                    self._index_trigrams(token)
+            docs[key] = None
+
+    def _index_trigrams(self, token):
+        for trigram in trigrams(token):
+            self.trigram_tokens.setdefault(trigram, set()).add(token)
+
+    def _remove(self, collection, record_id):
+        key = (collection, record_id)
+        self.records.pop(key, None)
+        for token in self.doc_tokens.pop(key, ()):
+            docs = self.postings[token]
+            docs.pop(key, None)
+            if not docs: # Last document with this word: drop it from the vocabulary
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+                for trigram in trigrams(token) if self.trigram_tokens is not None else ():
+                    trigram_set = self.trigram_tokens[trigram]
+                    trigram_set.discard(token)
+                    if not trigram_set:
+                        del self.trigram_tokens[trigram]
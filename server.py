@@ -0,0 +1,342 @@
+"""Lokaler HTTP/JSON-Server, über den mehrere Apps (Speicher-Backend "Server") dieselben PD-Akten teilen."""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import urllib.parse
+import uuid
+from collections import OrderedDict
+
+from repository import AktenRepository
+from storage import COLLECTIONS, StorageError, record_version
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """Fehlerhafte Anfrage; status wird als HTTP-Status zurückgegeben."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class DataServer:
+    """Hält die Sammlungen im Speicher und spielt Änderungen versionsgeprüft ein (jeder Batch ohne await, also am Stück)."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.collections = {}
+        self.by_id = {} # collection -> {id: record}
+        self.epoch = uuid.uuid4().hex # Change feed positions of an earlier server run are not valid here
+        self.sequence = 0
+        self.changelog = {} # collection -> OrderedDict id -> sequence of its last change, oldest first
+        self.connections = set() # Open client connections (their StreamWriters)
+        for collection in COLLECTIONS:
+            self.changelog[collection] = OrderedDict()
+            records = storage.load(collection)
+            self.collections[collection] = records
+            self.by_id[collection] = {record['id']: record for record in records}
+
+    def records(self, collection):
+        self._check_collection(collection)
+        return self.collections[collection]
+
+    def changes(self, collection, since=None, epoch=None):
+        """Datensätze, die seit since geändert oder gelöscht wurden; ohne gültiges since alle."""
+        self._check_collection(collection)
+        result = {"epoch": self.epoch, "sequence": self.sequence, "full": since is None or epoch != self.epoch}
+        if result["full"]:
+            result.update(records=self.collections[collection], deleted=[])
+            return result
+        changed, deleted = [], []
+        for record_id, sequence in reversed(self.changelog[collection].items()):
+            if sequence <= since:
+                break
+            record = self.by_id[collection].get(record_id)
+            if record is None:
+                deleted.append(record_id)
+            else:
+                changed.append(record)
+        changed.reverse()
+        result.update(records=changed, deleted=deleted)
+        return result
+
+    def replace(self, collection, records):
+        self._check_collection(collection)
+        if not isinstance(records, list) or not all(isinstance(record, dict) and 'id' in record for record in records):
+            raise RequestError(400, "Erwartet wird eine Liste von Datensätzen mit 'id'.")
+        # Keep the list object: JSON backends write the list they loaded
+        self.collections[collection][:] = records
+        removed = set(self.by_id[collection]).difference(record['id'] for record in records)
+        self.by_id[collection] = {record['id']: record for record in records}
+        for record_id in list(removed) + list(self.by_id[collection]):
+            self._log_change(collection, record_id)
+        self.storage.save_all(collection, self.collections[collection])
+
+    def apply_batch(self, ops):
+        if not isinstance(ops, list):
+            raise RequestError(400, "'ops' muss eine Liste sein.")
+        for op in ops: # Validate everything first so a batch is applied completely or not at all
+            if not isinstance(op, dict) or op.get("op") not in ("insert", "update", "delete") or "id" not in op:
+                raise RequestError(400, f"Ungültige Änderung: {op!r}")
+            self._check_collection(op.get("collection"))
+            if op["op"] != "delete" and (not isinstance(op.get("record"), dict) or op["record"].get('id') != op["id"]):
+                raise RequestError(400, f"Änderung {op['id']} ohne passenden Datensatz.")
+            if not isinstance(op.get("base_version"), (int, type(None))):
+                raise RequestError(400, f"Änderung {op['id']} mit ungültiger base_version.")
+        applied, conflicts = 0, []
+        for op in ops:
+            if op["op"] == "delete":
+                self._delete(op["collection"], op["id"]) # Local delete wins, like with shared files
+            elif not self._upsert(op["collection"], op["record"], "base_version" in op, op.get("base_version")):
+                conflicts.append({"collection": op["collection"], "id": op["id"]})
+                continue
+            applied += 1
+        return applied, conflicts
+
+    def _upsert(self, collection, record, checked=False, base_version=None):
+        """Speichert den Datensatz; mit checked nur, wenn er auf dem Server noch base_version hat."""
+        # insert and update both mean "this is the current state", so a repeated batch is harmless
+        existing = self.by_id[collection].get(record['id'])
+        if existing == record:
+            return True # Repeated batch whose response got lost
+        if checked and (record_version(existing) if existing is not None else None) != base_version:
+            return False # Changed (or deleted) by another client since the sender last saw it
+        if checked and existing is None and collection == "perpetrator_files" and self._name_taken(record):
+            return False # Created for the same name by another client; the sender takes that file over (AktenCore.sync)
+        self._log_change(collection, record['id'])
+        if existing is None:
+            self.collections[collection].append(record)
+            self.by_id[collection][record['id']] = record
+            self.storage.insert(collection, record)
+        else:
+            existing.clear() # Update in place, the record stays at its position in the list
+            existing.update(record)
+            self.storage.update(collection, existing)
+        return True
+
+    def _delete(self, collection, record_id):
+        record = self.by_id[collection].pop(record_id, None)
+        if record is None:
+            return # Already gone
+        self._log_change(collection, record_id)
+        self.collections[collection].remove(record)
+        self.storage.delete(collection, record_id)
+
+    def _name_taken(self, pf):
+        key = AktenRepository.name_key(pf.get('name'))
+        return any(AktenRepository.name_key(other.get('name')) == key for other in self.collections["perpetrator_files"])
+
+    def _log_change(self, collection, record_id):
+        self.sequence += 1
+        changelog = self.changelog[collection]
+        changelog.pop(record_id, None) # Only the latest change of a record matters
+        changelog[record_id] = self.sequence
+
+    def _check_collection(self, collection):
+        if collection not in self.collections:
+            raise RequestError(404, f"Unbekannte Sammlung: {collection}")
+
+    def close(self):
+        self.storage.close()
+
+
+async def read_request(reader):
+    """Liest eine HTTP-Anfrage. Gibt (Methode, Pfad, Header, Body) zurück oder None am Verbindungsende."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Ungültige Anfragezeile.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Anfrage zu groß.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def parse_body(body):
+    try:
+        return json.loads(body.decode("utf-8")) if body else None
+    except ValueError as e:
+        raise RequestError(400, f"Ungültiges JSON: {e}")
+
+
+# GET  /health                               -> {"status": "ok", "collections": {Name: Anzahl}}
+# GET  /collections/<Sammlung>               -> Liste aller Datensätze
+# PUT  /collections/<Sammlung>               Body: Liste, ersetzt die ganze Sammlung
+# GET  /changes/<Sammlung>?since=N&epoch=E   -> {"epoch", "sequence", "full", "records", "deleted"}, ohne since alles
+# POST /batch                                Body: {"ops": [{"op", "collection", "id", "base_version", "record"}]}
+#                                            -> {"applied": n, "conflicts": [{"collection", "id"}]}
+def handle(server, method, path, body):
+    """Beantwortet eine Anfrage und gibt das JSON-Ergebnis zurück."""
+    path, _, query = path.partition("?")
+    if path == "/health" and method == "GET":
+        return {"status": "ok", "collections": {name: len(records) for name, records in server.collections.items()}}
+    if path == "/batch":
+        if method != "POST":
+            raise RequestError(405, "Nur POST erlaubt.")
+        payload = parse_body(body)
+        if not isinstance(payload, dict):
+            raise RequestError(400, "Erwartet wird {\"ops\": [...]}.")
+        applied, conflicts = server.apply_batch(payload.get("ops"))
+        return {"applied": applied, "conflicts": conflicts}
+    if path.startswith("/changes/"):
+        if method != "GET":
+            raise RequestError(405, "Nur GET erlaubt.")
+        params = urllib.parse.parse_qs(query)
+        try:
+            since = int(params["since"][0]) if "since" in params else None
+        except ValueError:
+            raise RequestError(400, "'since' muss eine Zahl sein.")
+        return server.changes(path[len("/changes/"):], since, params.get("epoch", [None])[0])
+    if path.startswith("/collections/"):
+        collection = path[len("/collections/"):]
+        if method == "GET":
+            return server.records(collection)
+        if method == "PUT":
+            server.replace(collection, parse_body(body))
+            return {"saved": len(server.records(collection)), "epoch": server.epoch, "sequence": server.sequence}
+        raise RequestError(405, "Nur GET und PUT erlaubt.")
+    raise RequestError(404, f"Unbekannter Pfad: {path}")
+
+
+async def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+
+async def serve_connection(server, reader, writer):
+    """Beantwortet Anfragen auf einer Verbindung, bis der Client sie schließt (keep-alive)."""
+    server.connections.add(writer)
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = 200, handle(server, method, path, body)
+            except RequestError as e:
+                status, payload, keep_alive = e.status, {"error": str(e)}, False
+            except StorageError as e:
+                status, payload, keep_alive = 500, {"error": str(e)}, True
+            await write_response(writer, status, payload, keep_alive)
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass # Client went away mid-request
+    finally:
+        server.connections.discard(writer)
+        writer.close()
+
+
+async def start_server(server, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return await asyncio.start_server(lambda reader, writer: serve_connection(server, reader, writer), host, port)
+
+
+def run_in_thread(open_storage, host=DEFAULT_HOST, port=0):
+    """Startet einen Server in einem Hintergrund-Thread (port=0: freier Port). Gibt (URL, stop) zurück."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        try:
+            server = DataServer(open_storage()) # In this thread: a SQLite connection only works in the thread that opened it
+            try:
+                holder["server"] = loop.run_until_complete(start_server(server, host, port))
+            except BaseException:
+                server.close()
+                raise
+        except BaseException as e:
+            holder["error"] = e # Raised in the calling thread
+            loop.close()
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+        holder["server"].close()
+        for writer in list(server.connections): # Keep-alive connections still waiting for a request end with EOF
+            writer.close()
+        loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+        loop.run_until_complete(holder["server"].wait_closed())
+        loop.close()
+        server.close() # Same thread as open_storage()
+
+    thread = threading.Thread(target=run, name="pdakten-server", daemon=True)
+    thread.start()
+    started.wait()
+    if "error" in holder:
+        thread.join()
+        raise holder["error"]
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return f"http://{host}:{holder['server'].sockets[0].getsockname()[1]}", stop
+
+
+def main(argv=None):
+    from core import DATA_FILES, DATABASE_FILE, PERPETRATOR_FILES_DIR, SETTINGS_FILE, create_storage, load_settings
+
+    parser = argparse.ArgumentParser(description="Gemeinsamer Datenserver für PD-Akten-Helfer.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Adresse (Standard: 127.0.0.1, nur dieser Rechner)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-dir", help="Ordner mit den Datendateien (Standard: aktueller Ordner)")
+    parser.add_argument("--backend", choices=["json", "journal", "sqlite"], help="Speicher-Backend (Standard: aus settings.json)")
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        os.chdir(args.data_dir) # Paths are relative to the data directory, like in the app
+    os.makedirs(PERPETRATOR_FILES_DIR, exist_ok=True)
+
+    def print_error(message):
+        print(f"Fehler: {message}", file=sys.stderr)
+
+    settings = load_settings(SETTINGS_FILE, error_callback=print_error)
+    backend = args.backend or settings.get("storage_backend", "json")
+    if backend == "server":
+        backend = "json" # The server itself always works on local files
+    server = DataServer(create_storage(dict(settings, storage_backend=backend), DATA_FILES, DATABASE_FILE, error_callback=print_error))
+
+    async def serve():
+        tcp_server = await start_server(server, args.host, args.port)
+        print(f"PD-Akten-Server läuft auf http://{args.host}:{args.port} ({backend})")
+        async with tcp_server:
+            await tcp_server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close() # Flushes pending background saves
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1025 @@
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import uuid
+
+from lazy_records import LazyRecord, RecordFile
+
+# Collections managed by the storage backends (one JSON file or one SQLite table each)
+COLLECTIONS = ("notes", "reports", "perpetrator_files", "report_presets", "predefined_crimes")
+
+JOURNAL_SUFFIX = ".journal" # Append-only delta log next to each JSON snapshot
+COMPACTING_SUFFIX = ".journal.compacting" # Journal segment currently being folded into the snapshot
+LOCK_SUFFIX = ".lock" # Held by one app instance while it checks and replaces a shared JSON file
+LOCK_TIMEOUT = 10 # Seconds to wait for another instance's lock
+STALE_LOCK_AGE = 30 # A lock older than this was left behind by a crashed instance
+MERGE_COLLECTIONS = ("perpetrator_files",) # Read-modify-write records; a base copy allows a field-level three-way merge
+# Fields kept in memory per record when a collection is loaded lazily (lists, indexes, sync); the rest is read on demand
+LAZY_FIELDS = {"reports": ("version", "report_id", "perpetrator_name", "type", "linked_perpetrator_id")}
+TRANSIENT_HTTP_STATUS = (408, 429, 502, 503, 504) # Server busy or restarting: worth sending the changes again
+FLUSH_TIMEOUT = 15 # Seconds load/save/close wait for queued changes to reach the server
+
+
+class StorageError(Exception):
+    """Fehler beim Lesen oder Schreiben über ein Speicher-Backend."""
+
+
+class ServerRejectedError(StorageError):
+    """Der Server hat eine Anfrage mit einem HTTP-Fehlerstatus beantwortet; status ist der Statuscode."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def migrate_records(collection, records):
+    """Bringt Datensätze älterer Versionen auf das aktuelle Format. Gibt True zurück, wenn etwas geändert wurde."""
+    changed = False
+    if collection == "reports":
+        for record in records:
+            # Migrate old 'address' to 'birthplace' in perpetrator files if it exists
+            if 'address' in record and 'birthplace' not in record:
+                record['birthplace'] = record['address']
+                del record['address'] # Remove old field
+                changed = True
+
+            # Migrate crimes_committed from list of strings to list of dicts
+            if 'crimes_committed' in record and all(isinstance(c, str) for c in record['crimes_committed']):
+                if record['crimes_committed']:
+                    changed = True
+                record['crimes_committed'] = [{"name": c, "paragraph": "", "detention_units": 0, "fine": 0, "count": 1} for c in record['crimes_committed']]
+
+            # Ensure 'count' exists for all crime objects; drop catalogue ids/versions copied in by older versions
+            if 'crimes_committed' in record:
+                for crime_obj in record['crimes_committed']:
+                    if 'count' not in crime_obj:
+                        crime_obj['count'] = 1
+                        changed = True
+                    for catalogue_field in ('id', 'version'):
+                        if catalogue_field in crime_obj:
+                            del crime_obj[catalogue_field]
+                            changed = True
+
+    # Data migration for perpetrator_files (address to birthplace)
+    if collection == "perpetrator_files":
+        for pf_record in records:
+            if 'address' in pf_record and 'birthplace' not in pf_record:
+                pf_record['birthplace'] = pf_record['address']
+                del pf_record['address']
+                changed = True
+
+    # Row-level storage needs a stable key for every record (old presets and crimes have none)
+    for record in records:
+        if not record.get('id'):
+            record['id'] = str(uuid.uuid4())
+            changed = True
+    return changed
+
+
+def read_json_file(filename):
+    """Liest eine Liste von Datensätzen aus einer JSON-Datei (leere Liste, wenn sie fehlt)."""
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json_file(filename, data):
+    """Schreibt JSON-Daten atomar: erst in eine temporäre Datei, dann fsync und os.replace."""
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename) # A crash leaves either the old or the new file, never a half-written one
+
+
+def read_journal(journal_path):
+    """Liest die Änderungsdatensätze eines Journals (JSONL)."""
+    entries = []
+    if not os.path.exists(journal_path):
+        return entries
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break # Torn last line from a crash mid-append; nothing valid can follow it
+    return entries
+
+
+def apply_journal(records, entries):
+    """Spielt Journal-Einträge (insert/update/delete) auf eine Liste von Datensätzen ein."""
+    if not entries:
+        return records
+    # Dicts keep insertion order, so updated records stay where they were
+    by_id = {(record.get('id') or object()): record for record in records}
+    for entry in entries:
+        if entry.get('op') == "delete":
+            by_id.pop(entry.get('id'), None)
+        elif entry.get('op') in ("insert", "update"):
+            by_id[entry['id']] = entry['record']
+    return list(by_id.values())
+
+
+def remove_file(filename):
+    """Löscht eine Datei, falls sie existiert."""
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
+
+
+def file_stamp(filename):
+    """Kennung des aktuellen Dateistands (Änderungszeit, Größe, Inode) oder None, wenn die Datei fehlt."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class FileLock:
+    """Exklusive Sperrdatei neben einer Datendatei, damit Prüfen und Ersetzen nicht mit einer anderen Instanz überlappen."""
+
+    def __init__(self, filename, timeout=LOCK_TIMEOUT):
+        self.path = filename + LOCK_SUFFIX
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > STALE_LOCK_AGE:
+                        remove_file(self.path) # Left behind by a crashed instance
+                        continue
+                except FileNotFoundError:
+                    continue # Released meanwhile
+                if time.monotonic() > deadline:
+                    raise StorageError(f"{self.path} ist gesperrt (eine andere Instanz speichert gerade).")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc_info):
+        remove_file(self.path)
+
+
+def record_version(record):
+    """Versionsnummer eines Datensatzes; ältere Datensätze ohne Version zählen als 0."""
+    return record.get('version', 0)
+
+
+def merge_lists(base, ours, theirs):
+    """Dreiwege-Merge einer Liste: Einträge, die eine Seite hinzugefügt oder entfernt hat, bleiben hinzugefügt bzw. entfernt."""
+    merged = [item for item in theirs if item in ours or item not in base]
+    merged.extend(item for item in ours if item not in theirs and item not in base)
+    return merged
+
+
+def merge_record(base, ours, theirs):
+    """Dreiwege-Merge zweier seit base geänderter Stände: Zahlen als Zähler, Listen gemischt, sonst gewinnt der lokale Stand."""
+    merged = dict(theirs)
+    for key, our_value in ours.items():
+        their_value = theirs.get(key)
+        base_value = base.get(key) if base is not None else None
+        if key == 'version' or (base is not None and our_value == base_value):
+            continue # Only they changed it (or nobody did)
+        if base is not None and key in theirs and their_value == base_value:
+            merged[key] = our_value # Only we changed it
+        elif isinstance(our_value, (int, float)) and isinstance(their_value, (int, float)) and isinstance(base_value, (int, float)) \
+                and not isinstance(our_value, bool):
+            merged[key] = their_value + our_value - base_value
+        elif isinstance(our_value, list) and isinstance(their_value, list):
+            merged[key] = merge_lists(base_value if isinstance(base_value, list) else [], our_value, their_value)
+        elif our_value != their_value:
+            merged[key] = our_value
+    merged['version'] = record_version(theirs)
+    return merged
+
+
+def indent_record_text(text):
+    """Rückt den JSON-Text eines Datensatzes so ein, wie json.dump mit indent=4 ihn als Listeneintrag schreibt."""
+    return "    " + text.replace("\n", "\n    ")
+
+
+class PersistenceWorker:
+    """Hintergrund-Thread, der pro Schlüssel gesammelte Schreibaufträge nach coalesce_delay Sekunden einmal ausführt."""
+
+    def __init__(self, write_func, error_callback=None, coalesce_delay=0.25):
+        self.write_func = write_func
+        self.error_callback = error_callback
+        self.coalesce_delay = coalesce_delay
+        self._dirty = [] # Ordered, without duplicates
+        self._writing = False
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, key):
+        """Merkt einen Schlüssel zum Schreiben vor (kehrt sofort zurück)."""
+        with self._condition:
+            if key not in self._dirty:
+                self._dirty.append(key)
+            self._condition.notify_all()
+
+    def flush(self):
+        """Wartet, bis alle vorgemerkten Schreibvorgänge erledigt sind."""
+        with self._condition:
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._dirty and not self._writing)
+
+    def stop(self):
+        """Schreibt ausstehende Aufträge und beendet den Thread."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._dirty or self._stopping)
+                if not self._dirty:
+                    return # Stopping and nothing left to write
+                # Give further saves to the same files a moment to pile up
+                self._condition.wait_for(lambda: self._stopping, timeout=self.coalesce_delay)
+                keys, self._dirty = self._dirty, []
+                self._writing = True
+            for key in keys:
+                try:
+                    self.write_func(key)
+                except Exception as e:
+                    if self.error_callback:
+                        self.error_callback(e)
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class StorageBackend:
+    """Basisklasse für austauschbare Speicher-Backends; die Listen im Speicher der App sind maßgeblich."""
+
+    fallback = False # Used in place of the configured backend, which was not available (see core.create_storage)
+    lazy_collections = () # Collections loaded as LazyRecords, whose full records are read from disk on access
+
+    def load(self, collection):
+        """Lädt alle Datensätze einer Sammlung."""
+        raise NotImplementedError
+
+    def insert(self, collection, record):
+        """Speichert einen neuen Datensatz."""
+        raise NotImplementedError
+
+    def update(self, collection, record):
+        """Speichert einen geänderten Datensatz."""
+        raise NotImplementedError
+
+    def delete(self, collection, record_id):
+        """Entfernt einen Datensatz."""
+        raise NotImplementedError
+
+    def update_many(self, collection, records):
+        """Speichert mehrere geänderte Datensätze; Backends mit Ganz-Datei-Schreiben tun das in einem Durchgang."""
+        for record in records:
+            self.update(collection, record)
+
+    def save_all(self, collection, records):
+        """Ersetzt den kompletten Inhalt einer Sammlung."""
+        raise NotImplementedError
+
+    def sync(self, collection):
+        """Änderungen anderer Instanzen als Liste von (op, Datensatz) mit op insert, update, delete oder merge."""
+        return []
+
+    def commit_sync(self, collection):
+        """Schreibt nach sync() noch offene lokale Änderungen, nachdem der Aufrufer die fremden übernommen hat."""
+
+    def flush(self):
+        """Wartet, bis alle Änderungen geschrieben sind."""
+
+    def stale_collections(self):
+        """Sammlungen, die wegen fremder Änderungen noch nicht geschrieben werden konnten."""
+        return []
+
+    def close(self):
+        """Gibt offene Ressourcen frei."""
+
+
+class JsonStorage(StorageBackend):
+    """Eine JSON-Datei pro Sammlung, geschrieben per compare-and-swap, damit mehrere Instanzen sie teilen können."""
+
+    compare_and_swap = True
+
+    def __init__(self, files, background=False, error_callback=None, lazy_collections=()):
+        self.files = files # collection -> JSON file path
+        self.error_callback = error_callback
+        self.lazy_collections = lazy_collections # See LAZY_FIELDS
+        self._record_files = {} # collection -> RecordFile (offset index of the file; records of lazy collections)
+        self._collections = {}
+        self._stamps = {} # collection -> file_stamp of the file as last read or written by us
+        self._synced = {} # collection -> {id: version} as last read or written by us
+        self._bases = {} # collection -> {id: JSON text} for MERGE_COLLECTIONS, the common ancestor for merges
+        self._stale = set() # Collections whose write was refused because another instance changed the file
+        self._unsaved_after_sync = set() # Collections with local changes that sync() found still unwritten
+        self._generations = {} # collection -> counter, increased whenever the file as read from disk is adopted
+        self._sync_lock = threading.Lock()
+        self._snapshots = {} # collection -> latest snapshot waiting for the worker
+        self._snapshots_lock = threading.Lock()
+        self._worker = PersistenceWorker(self._write_snapshot, error_callback) if background else None
+
+    fold_journals_on_load = True # Plain JSON mode folds journals left over from the journal mode
+
+    def load(self, collection):
+        filename = self.files[collection]
+        stamp = file_stamp(filename) # Taken before reading, so a concurrent change is detected on the next write
+        if collection in self.lazy_collections:
+            records = self._load_lazy(collection, stamp)
+            if records is not None:
+                return records
+        try:
+            records = read_json_file(filename)
+            pending = read_journal(filename + COMPACTING_SUFFIX) + read_journal(filename + JOURNAL_SUFFIX)
+        except json.JSONDecodeError as e:
+            raise StorageError(f"Fehler beim Laden von {filename}: {e}") from e
+        records = apply_journal(records, pending)
+        with self._sync_lock:
+            self._remember_disk_state(collection, stamp, records)
+        if migrate_records(collection, records) or (pending and self.fold_journals_on_load):
+            self.save_all(collection, records)
+        self._collections[collection] = records
+        return records
+
+    def _load_lazy(self, collection, stamp):
+        """Lädt nur den Offset-Index und LAZY_FIELDS. None, wenn das nicht geht (Journal vorhanden, fremdes Format)."""
+        filename = self.files[collection]
+        if stamp is None or os.path.exists(filename + JOURNAL_SUFFIX) or os.path.exists(filename + COMPACTING_SUFFIX):
+            return None
+        record_file = RecordFile(filename, prepare=lambda record: migrate_records(collection, [record])) # Migrated when read
+        try:
+            records = record_file.load_records(LAZY_FIELDS[collection], {"version": 0}) # Records from before versioning, see record_version()
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Fehler beim Laden von {filename}: {e}") from e
+        if records is None:
+            return None
+        self._record_files[collection] = record_file
+        with self._sync_lock:
+            self._remember_disk_state(collection, stamp, records)
+        if migrate_records(collection, [record for record in records if not isinstance(record, LazyRecord)]):
+            self.save_all(collection, records)
+        self._collections[collection] = records
+        return records
+
+    def insert(self, collection, record):
+        self._write(collection)
+
+    def update(self, collection, record):
+        self._write(collection)
+
+    def update_many(self, collection, records):
+        self._write(collection) # One rewrite covers all of them
+
+    def delete(self, collection, record_id):
+        self._write(collection)
+
+    def save_all(self, collection, records):
+        self._collections[collection] = records
+        if self._worker:
+            self._worker.flush() # Don't let a queued write of the old list land after this one
+        self._write_now(collection, self._snapshot(collection, full=True)) # Records may have been migrated without a new version
+        remove_file(self.files[collection] + COMPACTING_SUFFIX)
+        remove_file(self.files[collection] + JOURNAL_SUFFIX)
+
+    def flush(self):
+        if self._worker:
+            self._worker.flush()
+
+    def sync(self, collection):
+        if not self.compare_and_swap or collection not in self._collections:
+            return []
+        filename = self.files[collection]
+        with self._sync_lock:
+            stamp = file_stamp(filename)
+            if stamp == self._stamps.get(collection) and collection not in self._stale:
+                return [] # Nobody else wrote the file: the common case costs one stat()
+            try:
+                disk_records = read_json_file(filename)
+            except (OSError, ValueError) as e:
+                raise StorageError(f"Fehler beim Abgleich mit {filename}: {e}") from e
+            changes, local_changes = self._diff(collection, disk_records)
+            self._remember_disk_state(collection, stamp, disk_records)
+            self._stale.discard(collection)
+            if local_changes or any(op == "merge" for op, _ in changes):
+                self._unsaved_after_sync.add(collection) # Written by commit_sync() once the changes are applied
+        return changes
+
+    def commit_sync(self, collection):
+        with self._sync_lock:
+            unsaved = collection in self._unsaved_after_sync
+            self._unsaved_after_sync.discard(collection)
+        if unsaved:
+            self._write(collection) # Our own changes still have to reach the file
+
+    def _diff(self, collection, disk_records):
+        """Vergleicht Datei, Speicher und letzten gemeinsamen Stand. Gibt (Änderungen für den Speicher, ob lokale Änderungen offen sind) zurück."""
+        synced = self._synced.get(collection, {})
+        bases = self._bases.get(collection)
+        ours_by_id = {record['id']: record for record in list(self._collections[collection])}
+        changes = []
+        local_changes = len(ours_by_id) != len(synced) or any(
+            record_id not in synced or record_version(record) != synced[record_id] for record_id, record in ours_by_id.items())
+        disk_ids = set()
+        for theirs in disk_records:
+            record_id = theirs.get('id')
+            disk_ids.add(record_id)
+            ours = ours_by_id.get(record_id)
+            if record_id not in synced:
+                if ours is None:
+                    changes.append(("insert", theirs)) # Added by another instance
+                elif ours != theirs:
+                    changes.append(("merge", merge_record(None, ours, theirs)))
+                continue
+            their_change = record_version(theirs) != synced[record_id]
+            if ours is None or not their_change:
+                continue # Deleted here (local delete wins) or unchanged there
+            if record_version(ours) == synced[record_id]:
+                changes.append(("update", theirs))
+            else:
+                base = json.loads(bases[record_id]) if bases and record_id in bases else None
+                changes.append(("merge", merge_record(base, ours, theirs)))
+        for record_id, ours in ours_by_id.items():
+            # Deleted by another instance; a record we changed meanwhile is kept and written back
+            if record_id in synced and record_id not in disk_ids and record_version(ours) == synced[record_id]:
+                changes.append(("delete", ours))
+        return changes, local_changes
+
+    def _remember_disk_state(self, collection, stamp, records):
+        self._stamps[collection] = stamp
+        self._synced[collection] = {record.get('id'): record_version(record) for record in records}
+        self._generations[collection] = self._generations.get(collection, 0) + 1 # Snapshots taken before no longer apply
+        if collection in MERGE_COLLECTIONS:
+            self._bases[collection] = {record.get('id'): json.dumps(record, ensure_ascii=False) for record in records}
+
+    def _write(self, collection):
+        snapshot = self._snapshot(collection) # Taken here, so the worker never reads records the caller is changing
+        if self._worker:
+            with self._snapshots_lock:
+                self._snapshots[collection] = snapshot # Only the latest one gets written
+            self._worker.mark_dirty(collection)
+        else:
+            self._write_now(collection, snapshot)
+
+    def _write_snapshot(self, collection):
+        with self._snapshots_lock:
+            snapshot = self._snapshots.pop(collection, None)
+        if snapshot is not None:
+            self._write_now(collection, snapshot)
+
+    def _snapshot(self, collection, full=False):
+        """Stand einer Sammlung als (Generation, [(id, Version, JSON-Text oder None, wenn unverändert)])."""
+        synced = self._synced.get(collection, {})
+        entries = []
+        for record in list(self._collections.get(collection, [])):
+            record_id = record.get('id')
+            version = record_version(record)
+            if (isinstance(record, LazyRecord) and not record.loaded) or (not full and record_id in synced and synced[record_id] == version):
+                entries.append((record_id, version, None))
+            else:
+                entries.append((record_id, version, indent_record_text(json.dumps(record, indent=4, ensure_ascii=False))))
+        return self._generations.get(collection, 0), entries
+
+    def _write_now(self, collection, snapshot):
+        filename = self.files[collection]
+        generation, entries = snapshot
+        try:
+            with self._sync_lock, FileLock(filename):
+                if generation != self._generations.get(collection, 0):
+                    return # sync() adopted a newer file meanwhile; commit_sync() writes our changes again
+                if file_stamp(filename) != self._stamps.get(collection):
+                    # Another instance wrote the file since we last read it: overwriting it would
+                    # drop their changes. sync() merges them in and writes again.
+                    self._stale.add(collection)
+                    return
+                record_file = self._record_files.get(collection)
+                if record_file is None:
+                    record_file = self._record_files[collection] = RecordFile(filename)
+                with record_file.lock:
+                    offsets, bases = self._write_records(collection, record_file, entries)
+                    record_file.replaced(offsets) # Offsets into the new file without scanning it again
+                self._stamps[collection] = file_stamp(filename)
+                self._synced[collection] = {record_id: version for record_id, version, _ in entries}
+                if collection in MERGE_COLLECTIONS:
+                    self._bases[collection] = bases
+        except OSError as e:
+            raise StorageError(f"Konnte Daten nicht speichern in {filename}: {e}") from e
+        except StorageError:
+            self._stale.add(collection) # Lock timeout: retried by the next sync()
+            raise
+
+    def _write_records(self, collection, record_file, entries):
+        """Schreibt die Datei atomar; unveränderte Datensätze werden byteweise aus der alten Datei übernommen."""
+        filename = self.files[collection]
+        old = spans = parsed = None
+        if any(text is None for _, _, text in entries):
+            spans = record_file.spans() or {} # Empty if the file is not in the app's own format
+            with open(filename, 'rb') as f:
+                old = memoryview(f.read())
+        old_bases = self._bases.get(collection, {})
+        offsets, bases = {}, {}
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            position = f.write(b"[\n" if entries else b"[]")
+            for index, (record_id, version, text) in enumerate(entries):
+                if index:
+                    position += f.write(b",\n")
+                if text is None and record_id in spans:
+                    start, end = spans[record_id]
+                    length = f.write(b"    ") + f.write(old[start:end])
+                    if collection in MERGE_COLLECTIONS:
+                        bases[record_id] = old_bases.get(record_id) or bytes(old[start:end]).decode('utf-8').replace("\n    ", "\n")
+                else:
+                    if text is None: # Not found by the offset scan: take it from the parsed file
+                        if parsed is None:
+                            parsed = {record.get('id'): record for record in json.loads(bytes(old))}
+                        if record_id not in parsed:
+                            raise StorageError(f"Datensatz {record_id} fehlt in {filename}.")
+                        text = indent_record_text(json.dumps(parsed[record_id], indent=4, ensure_ascii=False))
+                    length = f.write(text.encode('utf-8'))
+                    if collection in MERGE_COLLECTIONS:
+                        bases[record_id] = text[4:].replace("\n    ", "\n")
+                if record_id is not None:
+                    offsets[record_id] = (position + 4, position + length) # From the opening brace, like RecordFile
+                position += length
+            if entries:
+                f.write(b"\n]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename) # A crash leaves either the old or the new file, never a half-written one
+        return offsets, bases
+
+    def stale_collections(self):
+        with self._sync_lock:
+            return list(self._stale)
+
+    def close(self):
+        if self._worker:
+            self._worker.stop()
+
+
+class JournalJsonStorage(JsonStorage):
+    """JSON-Snapshot plus Änderungsjournal, das im Hintergrund in den Snapshot verdichtet wird."""
+
+    fold_journals_on_load = False
+    compare_and_swap = False # Deltas are appended, the snapshot is rewritten by the compaction thread
+
+    def __init__(self, files, compact_threshold=1024 * 1024, error_callback=None):
+        super().__init__(files, error_callback=error_callback)
+        self.compact_threshold = compact_threshold
+        self._journal_lock = threading.Lock() # Serializes appends and journal rotation
+        self._compact_lock = threading.Lock() # Only one snapshot writer at a time
+        self._compactors = {}
+
+    def load(self, collection):
+        records = super().load(collection)
+        journal_path = self.files[collection] + JOURNAL_SUFFIX
+        if os.path.exists(self.files[collection] + COMPACTING_SUFFIX) or \
+                (os.path.exists(journal_path) and os.path.getsize(journal_path) >= self.compact_threshold):
+            self.start_compaction(collection)
+        return records
+
+    def insert(self, collection, record):
+        self._append(collection, {"op": "insert", "collection": collection, "id": record['id'], "record": record})
+
+    def update(self, collection, record):
+        self._append(collection, {"op": "update", "collection": collection, "id": record['id'], "record": record})
+
+    def update_many(self, collection, records):
+        self._append(collection, *({"op": "update", "collection": collection, "id": record['id'], "record": record} for record in records))
+
+    def delete(self, collection, record_id):
+        self._append(collection, {"op": "delete", "collection": collection, "id": record_id})
+
+    def save_all(self, collection, records):
+        with self._compact_lock, self._journal_lock:
+            self._collections[collection] = records
+            try:
+                write_json_file(self.files[collection], records)
+            except OSError as e:
+                raise StorageError(f"Konnte Daten nicht speichern in {self.files[collection]}: {e}") from e
+            remove_file(self.files[collection] + COMPACTING_SUFFIX)
+            remove_file(self.files[collection] + JOURNAL_SUFFIX)
+
+    def _append(self, collection, *entries):
+        journal_path = self.files[collection] + JOURNAL_SUFFIX
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries) # One fsync for all of them
+        try:
+            with self._journal_lock:
+                with open(journal_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    journal_size = f.tell()
+        except OSError as e:
+            raise StorageError(f"Konnte Änderung nicht in {journal_path} schreiben: {e}") from e
+        if journal_size >= self.compact_threshold:
+            self.start_compaction(collection)
+
+    def start_compaction(self, collection):
+        """Startet die Verdichtung des Journals im Hintergrund (höchstens ein Thread pro Sammlung)."""
+        running = self._compactors.get(collection)
+        if running and running.is_alive():
+            return
+        thread = threading.Thread(target=self._compact, args=(collection,), name=f"compact-{collection}", daemon=True)
+        self._compactors[collection] = thread
+        thread.start()
+
+    def _compact(self, collection):
+        filename = self.files[collection]
+        compacting_path = filename + COMPACTING_SUFFIX
+        try:
+            with self._compact_lock:
+                with self._journal_lock:
+                    # Rotate the journal so new deltas go to a fresh file while we fold the old one.
+                    # A leftover segment from an interrupted compaction is folded first.
+                    if not os.path.exists(compacting_path):
+                        if not os.path.exists(filename + JOURNAL_SUFFIX):
+                            return
+                        os.replace(filename + JOURNAL_SUFFIX, compacting_path)
+                # Fold from disk, not from the live lists the UI thread is mutating
+                records = apply_journal(read_json_file(filename), read_journal(compacting_path))
+                write_json_file(filename, records)
+                remove_file(compacting_path)
+        except (OSError, ValueError) as e:
+            error = StorageError(f"Fehler beim Verdichten des Journals für {filename}: {e}")
+            if self.error_callback:
+                self.error_callback(error)
+
+    def close(self):
+        for thread in list(self._compactors.values()):
+            thread.join()
+        super().close()
+
+
+class SQLiteStorage(StorageBackend):
+    """Eingebettete SQLite-Datenbank mit einer Tabelle pro Sammlung und zeilenweisen Änderungen."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        try:
+            self.connection = sqlite3.connect(db_path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            with self.connection:
+                for collection in COLLECTIONS:
+                    # seq keeps the insertion order the lists in the app rely on
+                    self.connection.execute(
+                        f"CREATE TABLE IF NOT EXISTS {collection} ("
+                        "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "id TEXT NOT NULL UNIQUE, "
+                        "data TEXT NOT NULL)"
+                    )
+        except sqlite3.Error as e:
+            raise StorageError(f"Konnte Datenbank {db_path} nicht öffnen: {e}") from e
+
+    def is_empty(self):
+        """True, wenn noch keine Sammlung Datensätze enthält."""
+        for collection in COLLECTIONS:
+            if self.connection.execute(f"SELECT 1 FROM {collection} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def load(self, collection):
+        try:
+            rows = self.connection.execute(f"SELECT data FROM {collection} ORDER BY seq").fetchall()
+        except sqlite3.Error as e:
+            raise StorageError(f"Fehler beim Laden von {collection}: {e}") from e
+        records = [json.loads(row[0]) for row in rows]
+        if migrate_records(collection, records):
+            self.save_all(collection, records)
+        return records
+
+    def insert(self, collection, record):
+        self._execute(f"INSERT OR REPLACE INTO {collection} (id, data) VALUES (?, ?)",
+                      (record['id'], json.dumps(record, ensure_ascii=False)))
+
+    def update(self, collection, record):
+        self.update_many(collection, (record,))
+
+    def update_many(self, collection, records):
+        try:
+            with self.connection: # One transaction for all of them
+                for record in records:
+                    data = json.dumps(record, ensure_ascii=False)
+                    cursor = self.connection.execute(f"UPDATE {collection} SET data = ? WHERE id = ?", (data, record['id']))
+                    if cursor.rowcount == 0:
+                        self.connection.execute(f"INSERT INTO {collection} (id, data) VALUES (?, ?)", (record['id'], data))
+        except sqlite3.Error as e:
+            raise StorageError(f"Konnte Daten nicht speichern in {collection}: {e}") from e
+
+    def delete(self, collection, record_id):
+        self._execute(f"DELETE FROM {collection} WHERE id = ?", (record_id,))
+
+    def save_all(self, collection, records):
+        try:
+            with self.connection:
+                self.connection.execute(f"DELETE FROM {collection}")
+                self.connection.executemany(
+                    f"INSERT INTO {collection} (id, data) VALUES (?, ?)",
+                    [(record['id'], json.dumps(record, ensure_ascii=False)) for record in records]
+                )
+        except sqlite3.Error as e:
+            raise StorageError(f"Konnte Daten nicht speichern in {collection}: {e}") from e
+
+    def _execute(self, sql, params):
+        try:
+            with self.connection:
+                self.connection.execute(sql, params)
+        except sqlite3.Error as e:
+            raise StorageError(f"Konnte Daten nicht speichern: {e}") from e
+
+    def close(self):
+        self.connection.close()
+
+
+def import_json_to_sqlite(files, sqlite_storage):
+    """Einmaliger Import der bestehenden JSON-Dateien (inklusive Migration) in die SQLite-Datenbank."""
+    json_storage = JsonStorage(files) # Also folds pending journals from the journal mode
+    imported = {}
+    for collection in COLLECTIONS:
+        records = json_storage.load(collection)
+        sqlite_storage.save_all(collection, records)
+        imported[collection] = len(records)
+    return imported
+
+
+class RemoteStorage(StorageBackend):
+    """Gemeinsame Daten auf einem PD-Akten-Server (server.py); Änderungen gehen versionsgeprüft und gebündelt an /batch."""
+
+    def __init__(self, url, error_callback=None, batch_delay=0.05, timeout=10):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme != "http" or not parsed.hostname:
+            raise StorageError(f"Ungültige Server-Adresse: {url}")
+        self.url = url
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.error_callback = error_callback
+        self.batch_delay = batch_delay
+        self._connection = None
+        self._connection_lock = threading.Lock() # One request at a time on the shared connection
+        self._pending = {} # (collection, id) -> (op, serialized record, version), only the latest per record
+        self._sending = False
+        self._stopping = False
+        self._retrying = False # Batcher thread only: the current outage was already reported
+        self._condition = threading.Condition()
+        self._collections = {} # collection -> the list the app works on
+        self._synced = {} # collection -> {id: version} as last seen on the server
+        self._bases = {} # collection -> {id: JSON text} for MERGE_COLLECTIONS, the common state for merges
+        self._positions = {} # collection -> (epoch, sequence) of the server's change feed last synced
+        self._stale = set() # Collections with changes the server refused as outdated
+        self._resend = {} # collection -> ids of refused changes to send again after sync()
+        self._feed_failed = False # A failing change feed is reported once, not on every poll
+        self._sync_lock = threading.Lock() # Sending a batch and reading the change feed update the same bookkeeping
+        self._thread = threading.Thread(target=self._run, name="remote-storage-batcher", daemon=True)
+        self._thread.start()
+
+    def ping(self):
+        """Prüft, ob der Server erreichbar ist (löst sonst StorageError aus)."""
+        self._request("GET", "/health")
+
+    def load(self, collection):
+        self.flush()
+        result = self._request("GET", f"/changes/{collection}")
+        with self._sync_lock:
+            self._collections[collection] = result["records"]
+            self._remember(collection, result, full=True)
+        return result["records"]
+
+    def insert(self, collection, record):
+        self._enqueue("insert", collection, record['id'], record)
+
+    def update(self, collection, record):
+        self._enqueue("update", collection, record['id'], record)
+
+    def delete(self, collection, record_id):
+        self._enqueue("delete", collection, record_id, None)
+
+    def save_all(self, collection, records):
+        self.flush() # Queued row changes must not land after the full replacement
+        result = self._request("PUT", f"/collections/{collection}", records)
+        with self._sync_lock:
+            self._collections[collection] = records
+            self._remember(collection, dict(result, records=records), full=True)
+
+    def sync(self, collection):
+        if collection not in self._collections or self._retrying:
+            return [] # Not loaded, or the server is unreachable (the batcher reports that)
+        if not self._sync_lock.acquire(blocking=False):
+            return [] # A batch is being sent right now; the next sync() catches up
+        try:
+            epoch, sequence = self._positions[collection]
+            try:
+                result = self._request("GET", f"/changes/{collection}?since={sequence}&epoch={epoch}")
+            except StorageError:
+                if self._feed_failed:
+                    return []
+                self._feed_failed = True
+                raise
+            self._feed_failed = False
+            changes = self._diff(collection, result)
+            self._remember(collection, result, full=result.get("full"))
+            self._stale.discard(collection)
+            return changes
+        finally:
+            self._sync_lock.release()
+
+    def commit_sync(self, collection):
+        with self._sync_lock:
+            resend = self._resend.pop(collection, ())
+        if not resend:
+            return
+        by_id = {record['id']: record for record in self._collections[collection]}
+        with self._condition:
+            pending = set(self._pending)
+        for record_id in resend: # Merged records were queued again already by the caller
+            if record_id in by_id and (collection, record_id) not in pending:
+                self._enqueue("update", collection, record_id, by_id[record_id])
+
+    def stale_collections(self):
+        return list(self._stale)
+
+    def _diff(self, collection, result):
+        """Vergleicht die Änderungen vom Server mit dem Speicher, wie JsonStorage._diff mit der Datei."""
+        synced = self._synced[collection]
+        bases = self._bases.get(collection)
+        ours_by_id = {record['id']: record for record in list(self._collections[collection])}
+        changes = []
+        for theirs in result["records"]:
+            record_id = theirs.get('id')
+            ours = ours_by_id.get(record_id)
+            if ours == theirs:
+                continue # Our own change coming back
+            if record_id not in synced:
+                if ours is None:
+                    changes.append(("insert", theirs)) # Added by another client
+                else:
+                    changes.append(("merge", merge_record(None, ours, theirs)))
+            elif ours is None or record_version(theirs) == synced[record_id]:
+                continue # Deleted here (local delete wins) or unchanged there
+            elif record_version(ours) == synced[record_id]:
+                changes.append(("update", theirs))
+            else:
+                base = json.loads(bases[record_id]) if bases and record_id in bases else None
+                changes.append(("merge", merge_record(base, ours, theirs)))
+        if result.get("full"):
+            deleted = set(synced).difference(record.get('id') for record in result["records"])
+        else:
+            deleted = result.get("deleted", ())
+        for record_id in deleted:
+            ours = ours_by_id.get(record_id)
+            if ours is None or record_id not in synced:
+                continue
+            if record_version(ours) == synced[record_id]:
+                changes.append(("delete", ours)) # Deleted by another client
+            else:
+                self._resend.setdefault(collection, set()).add(record_id) # Changed here meanwhile: kept and sent again
+        return changes
+
+    def _remember(self, collection, result, full=False):
+        """Merkt sich den Stand des Servers nach load(), save_all() oder sync()."""
+        if full:
+            self._synced[collection] = {}
+            self._bases[collection] = {}
+        synced, bases = self._synced[collection], self._bases[collection]
+        for record in result["records"]:
+            synced[record.get('id')] = record_version(record)
+            if collection in MERGE_COLLECTIONS:
+                bases[record.get('id')] = json.dumps(record, ensure_ascii=False)
+        for record_id in result.get("deleted", ()):
+            synced.pop(record_id, None)
+            bases.pop(record_id, None)
+        self._positions[collection] = (result["epoch"], result["sequence"])
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Wartet, bis alle gesammelten Änderungen beim Server angekommen sind (sonst StorageError nach timeout Sekunden)."""
+        with self._condition:
+            self._condition.notify_all()
+            if not self._condition.wait_for(lambda: not self._pending and not self._sending, timeout=timeout):
+                raise StorageError(f"Server {self.url} nicht erreichbar: Änderungen konnten nicht innerhalb von {timeout} Sekunden gesendet werden.")
+
+    def close(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        with self._connection_lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def _enqueue(self, op, collection, record_id, record):
+        # Serialized right away: a snapshot of the record as it is now, nothing to copy later
+        entry = (op, json.dumps(record, ensure_ascii=False), record_version(record) if record is not None else None)
+        with self._condition:
+            self._pending[(collection, record_id)] = entry
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return # Stopping and nothing left to send
+                # Give further changes a moment to join the same request
+                self._condition.wait_for(lambda: self._stopping, timeout=self.batch_delay)
+                batch, self._pending = self._pending, {}
+                self._sending = True
+            try:
+                with self._sync_lock: # The change feed must not see our changes before they are acknowledged here
+                    result = self._request("POST", "/batch", raw_body=self._batch_body(batch))
+                    self._acknowledge(batch, result)
+                self._retrying = False
+            except StorageError as e:
+                # Unreachable or busy: keep the changes and send them again. Rejected: sending the same batch
+                # again would fail the same way, so it is dropped. Either way every failure is reported once.
+                retry = not self._stopping and (not isinstance(e, ServerRejectedError) or e.status in TRANSIENT_HTTP_STATUS)
+                if retry:
+                    with self._condition:
+                        for key, entry in batch.items(): # Keep failed changes unless a newer one replaced them
+                            self._pending.setdefault(key, entry)
+                    message = f"{e}. Die Änderungen werden erneut gesendet, sobald der Server wieder erreichbar ist."
+                else:
+                    message = f"{e}. {len(batch)} Änderung(en) wurden nicht gespeichert."
+                if not (retry and self._retrying):
+                    if self.error_callback:
+                        self.error_callback(StorageError(message))
+                self._retrying = retry
+                if retry:
+                    with self._condition:
+                        self._condition.wait_for(lambda: self._stopping, timeout=2) # Back off before retrying
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+
+    def _batch_body(self, batch):
+        ops = []
+        for (collection, record_id), (op, record_text, _version) in batch.items():
+            # The version last seen on the server; it refuses the change if the record changed since
+            base_version = self._synced.get(collection, {}).get(record_id)
+            ops.append(f'{{"op": {json.dumps(op)}, "collection": {json.dumps(collection)}, "id": {json.dumps(record_id, ensure_ascii=False)}, '
+                       f'"base_version": {json.dumps(base_version)}, "record": {record_text}}}')
+        return '{"ops": [' + ", ".join(ops) + ']}'
+
+    def _acknowledge(self, batch, result):
+        conflicts = {(entry.get("collection"), entry.get("id")) for entry in (result or {}).get("conflicts", ())}
+        for key, (op, record_text, version) in batch.items():
+            collection, record_id = key
+            synced = self._synced.setdefault(collection, {})
+            bases = self._bases.setdefault(collection, {})
+            if key in conflicts: # Merged by the next sync() and sent again
+                self._stale.add(collection)
+                self._resend.setdefault(collection, set()).add(record_id)
+            elif op == "delete":
+                synced.pop(record_id, None)
+                bases.pop(record_id, None)
+            else:
+                synced[record_id] = version
+                if collection in MERGE_COLLECTIONS:
+                    bases[record_id] = record_text
+
+    def _request(self, method, path, payload=None, raw_body=None):
+        body = raw_body if raw_body is not None else (json.dumps(payload, ensure_ascii=False) if payload is not None else None)
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        with self._connection_lock:
+            for attempt in range(2): # A keep-alive connection may have been closed by the server meanwhile
+                try:
+                    if self._connection is None:
+                        self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                    self._connection.request(method, path, body=body.encode("utf-8") if body is not None else None, headers=headers)
+                    response = self._connection.getresponse()
+                    data = response.read()
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    if self._connection:
+                        self._connection.close()
+                    self._connection = None
+                    if attempt:
+                        raise StorageError(f"Server {self.url} nicht erreichbar: {e}") from e
+        try:
+            result = json.loads(data) if data else None
+        except ValueError as e:
+            raise StorageError(f"Ungültige Antwort vom Server {self.url}: {e}") from e
+        if response.status != 200:
+            message = result.get("error") if isinstance(result, dict) else response.reason
+            raise ServerRejectedError(f"Server {self.url} meldet Fehler {response.status}: {message}", response.status)
+        return result
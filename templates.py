@@ -0,0 +1,85 @@
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r'\[(.*?)\]') # Same pattern as PoliceRPApp.extract_placeholders
+
+
+class CompiledTemplate:
+    """Eine einmal in Text und Platzhalter zerlegte Berichtsvorlage; render() setzt sie mit einem join zusammen."""
+
+    def __init__(self, template_string):
+        self.template_string = template_string
+        self.parts = [] # Literal text, None for placeholder slots
+        self.slot_names = {} # Index in parts -> placeholder name
+        self.slots_by_name = {} # Placeholder name -> indexes in parts, in order of first appearance
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(template_string):
+            if match.start() > position:
+                self.parts.append(template_string[position:match.start()])
+            self.slot_names[len(self.parts)] = match.group(1)
+            self.slots_by_name.setdefault(match.group(1), []).append(len(self.parts))
+            self.parts.append(None)
+            position = match.end()
+        if position < len(template_string):
+            self.parts.append(template_string[position:])
+
+    @property
+    def placeholders(self):
+        """Die Platzhalternamen ohne Duplikate, in der Reihenfolge ihres ersten Auftretens."""
+        return list(self.slots_by_name)
+
+    def render(self, values):
+        """Setzt den Bericht zusammen; values bildet Platzhalternamen auf Text ab."""
+        parts = self.parts.copy()
+        for index, name in self.slot_names.items():
+            parts[index] = values.get(name, "")
+        return "".join(parts)
+
+
+class TemplateCache:
+    """Zwischenspeicher für kompilierte Vorlagen nach Preset-ID; bearbeitete Vorlagen werden neu kompiliert."""
+
+    def __init__(self):
+        self.compiled = {} # preset id -> (hash of template_string, CompiledTemplate)
+
+    def get(self, preset):
+        template_string = preset['template_string']
+        content_hash = hash(template_string) # Cached on the str object, so repeated lookups are O(1)
+        cached = self.compiled.get(preset.get('id'))
+        if cached and cached[0] == content_hash and cached[1].template_string == template_string:
+            return cached[1]
+        compiled = CompiledTemplate(template_string)
+        self.compiled[preset.get('id')] = (content_hash, compiled)
+        return compiled
+
+    def discard(self, preset_id):
+        self.compiled.pop(preset_id, None)
+
+
+class LiveRender:
+    """Gerenderter Bericht für die Live-Vorschau, der sich pro Platzhalter aktualisieren lässt."""
+
+    def __init__(self, compiled, values):
+        self.compiled = compiled
+        self.values = {name: values.get(name, "") for name in compiled.slots_by_name}
+        parts = [part if part is not None else self.values[compiled.slot_names[index]] for index, part in enumerate(compiled.parts)]
+        self.lengths = [len(part) for part in parts] # Current length of every part in the rendered text
+        self.text = "".join(parts)
+
+    def update(self, name, value):
+        """Setzt einen Platzhalterwert. Gibt die Änderungen als [(Offset, alte Länge, neuer Text)] von hinten nach vorne zurück."""
+        slots = self.compiled.slots_by_name.get(name)
+        if not slots or self.values[name] == value:
+            return []
+        self.values[name] = value
+        edits = []
+        offset = 0
+        next_slot = 0
+        for index, length in enumerate(self.lengths[:slots[-1] + 1]):
+            if index == slots[next_slot]:
+                edits.append((offset, length, value))
+                next_slot += 1
+            offset += length
+        for index in slots:
+            self.lengths[index] = len(value)
+        edits.reverse()
+        return edits
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import DATA_FILES # noqa: E402
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    """Die Datendateien der App, aber in einem eigenen Ordner pro Test."""
+    return {collection: str(tmp_path / os.path.basename(filename)) for collection, filename in DATA_FILES.items()}
+
+
+@pytest.fixture
+def errors():
+    return []
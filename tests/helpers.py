@@ -0,0 +1,10 @@
+from core import AktenCore
+
+
+def crimes(detention_units, fine=0, count=1):
+    """Eine Straftatenliste, wie sie eine Anzeige speichert."""
+    return [{"name": "Diebstahl", "paragraph": "§ 1", "detention_units": detention_units, "fine": fine, "count": count}]
+
+
+def open_core(storage, errors):
+    return AktenCore(storage, error_callback=errors.append)
@@ -0,0 +1,45 @@
+from helpers import crimes, open_core
+from lazy_records import LazyRecord
+from storage import LAZY_FIELDS, JsonStorage
+
+
+def lazy_storage(data_files):
+    return JsonStorage(data_files, lazy_collections=tuple(LAZY_FIELDS))
+
+
+def write_reports(data_files, errors, count):
+    core = open_core(JsonStorage(data_files), errors)
+    for number in range(count):
+        core.add_report(f"A-{number}", "Max", "Anzeige", crimes(1, 10), f"Beschreibung {number}")
+    core.close()
+
+
+def test_lazy_reports_read_fields_on_demand(data_files, errors):
+    write_reports(data_files, errors, 3)
+    core = open_core(lazy_storage(data_files), errors)
+    report = core.reports[1]
+    assert isinstance(report, LazyRecord) and not report.loaded
+    assert report['description'] == "Beschreibung 1" # Read from the file
+    assert not report.loaded
+    assert report == dict(report.items())
+    assert core.check_totals() == []
+    core.close()
+    assert errors == []
+
+
+def test_lazy_report_edit_and_delete_are_saved(data_files, errors):
+    write_reports(data_files, errors, 3)
+    core = open_core(lazy_storage(data_files), errors)
+    first, second = core.reports[0], core.reports[1]
+    core.update_report(second, "A-1b", "Erika", "Anzeige", crimes(4, 40), "Geändert")
+    assert second.loaded
+    core.delete_report(first)
+    core.close()
+
+    core = open_core(JsonStorage(data_files), errors)
+    assert [(r['report_id'], r['perpetrator_name'], r['description']) for r in core.reports] == \
+        [("A-1b", "Erika", "Geändert"), ("A-2", "Max", "Beschreibung 2")]
+    assert {pf['name']: (pf['total_detention_units'], pf['total_fine']) for pf in core.perpetrator_files} == {"Max": (1, 10), "Erika": (4, 40)}
+    assert core.check_totals() == []
+    core.close()
+    assert errors == []
@@ -0,0 +1,52 @@
+from repository import AktenRepository
+
+
+def make_repository():
+    files = [{"id": "p1", "name": "Max Muster", "linked_report_ids": ["r1", "r2"]},
+             {"id": "p2", "name": "max muster ", "linked_report_ids": []},
+             {"id": "p3", "name": "Erika", "linked_report_ids": ["r3"]}]
+    reports = [{"id": "r1", "perpetrator_name": "Max Muster", "linked_perpetrator_id": "p1"},
+               {"id": "r2", "perpetrator_name": "Max Muster", "linked_perpetrator_id": "p1"},
+               {"id": "r3", "perpetrator_name": "Erika", "linked_perpetrator_id": "p3"}]
+    return AktenRepository(reports, files)
+
+
+def test_lookups_by_id_name_and_link():
+    repository = make_repository()
+    assert repository.get_report("r3")['perpetrator_name'] == "Erika"
+    assert repository.get_perpetrator_by_name(" MAX MUSTER")['id'] == "p1" # First of the duplicates, case-insensitive
+    assert [r['id'] for r in repository.reports_for_perpetrator("p1")] == ["r1", "r2"]
+    assert [r['id'] for r in repository.linked_reports(repository.get_perpetrator("p3"))] == ["r3"]
+    assert repository.report_counts_by_name == {"Max Muster": 2, "Erika": 1}
+
+
+def test_rename_moves_reports_and_keeps_name_owner():
+    repository = make_repository()
+    erika = repository.get_perpetrator("p3")
+    renamed = repository.rename_perpetrator(erika, "Max Muster")
+    assert [r['id'] for r in renamed] == ["r3"]
+    assert repository.get_report("r3")['perpetrator_name'] == "Max Muster"
+    assert repository.get_perpetrator_by_name("Max Muster")['id'] == "p1" # The file that already had the name keeps it
+    assert repository.get_perpetrator_by_name("Erika") is None
+    assert repository.report_counts_by_name == {"Max Muster": 3}
+
+
+def test_removing_name_owner_lets_duplicate_take_over():
+    repository = make_repository()
+    unlinked = repository.remove_perpetrator(repository.get_perpetrator("p1"))
+    assert [r['id'] for r in unlinked] == ["r1", "r2"]
+    assert all(r['linked_perpetrator_id'] is None for r in unlinked)
+    assert repository.get_perpetrator_by_name("Max Muster")['id'] == "p2"
+    assert repository.reports_for_perpetrator("p1") == []
+
+
+def test_replace_data_reindexes_changed_name():
+    repository = make_repository()
+    erika = repository.get_perpetrator("p3")
+    repository.replace_perpetrator_data(erika, dict(erika, name="Erika Neu"))
+    assert repository.get_perpetrator_by_name("Erika Neu") is erika
+    assert repository.get_perpetrator_by_name("Erika") is None
+    report = repository.get_report("r3")
+    repository.replace_report_data(report, dict(report, linked_perpetrator_id="p1"))
+    assert [r['id'] for r in repository.reports_for_perpetrator("p1")] == ["r1", "r2", "r3"]
+    assert repository.reports_for_perpetrator("p3") == []
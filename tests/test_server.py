@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import server
+from helpers import crimes, open_core
+from storage import JsonStorage, RemoteStorage, read_json_file
+
+
+@pytest.fixture
+def server_url(data_files):
+    url, stop = server.run_in_thread(lambda: JsonStorage(data_files))
+    yield url
+    stop()
+
+
+def remote_core(url, errors):
+    return open_core(RemoteStorage(url, error_callback=errors.append), errors)
+
+
+def test_batch_refuses_stale_updates(data_files):
+    data_server = server.DataServer(JsonStorage(data_files))
+    record = {"id": "n1", "version": 1, "title": "Alt", "content": ""}
+    assert data_server.apply_batch([{"op": "insert", "collection": "notes", "id": "n1", "base_version": None, "record": record}]) == (1, [])
+    newer = dict(record, version=2, title="Neu")
+    stale = dict(record, version=2, title="Veraltet")
+    ops = [{"op": "update", "collection": "notes", "id": "n1", "base_version": 1, "record": newer}]
+    assert data_server.apply_batch(ops) == (1, [])
+    assert data_server.apply_batch(ops) == (1, []) # Repeated after a lost response
+    stale_ops = [{"op": "update", "collection": "notes", "id": "n1", "base_version": 1, "record": stale}]
+    assert data_server.apply_batch(stale_ops) == (0, [{"collection": "notes", "id": "n1"}])
+    assert read_json_file(data_files["notes"])[0]['title'] == "Neu"
+    data_server.close()
+
+
+def test_change_feed_lists_changes_since_a_sequence(data_files):
+    data_server = server.DataServer(JsonStorage(data_files))
+    data_server.apply_batch([{"op": "insert", "collection": "notes", "id": n, "record": {"id": n}} for n in ("a", "b")])
+    start = data_server.changes("notes")
+    assert start["full"] and [r['id'] for r in start["records"]] == ["a", "b"]
+    data_server.apply_batch([{"op": "delete", "collection": "notes", "id": "a"},
+                             {"op": "update", "collection": "notes", "id": "b", "record": {"id": "b", "title": "x"}}])
+    changes = data_server.changes("notes", start["sequence"], start["epoch"])
+    assert not changes["full"] and changes["records"] == [{"id": "b", "title": "x"}] and changes["deleted"] == ["a"]
+    assert data_server.changes("notes", start["sequence"], "anderer Server")["full"] # Restarted server: everything again
+    data_server.close()
+
+
+def test_remote_writes_reach_the_server_files(server_url, data_files, errors):
+    core = remote_core(server_url, errors)
+    report, _, _ = core.add_report("A-1", "Max", "Anzeige", crimes(5, 100))
+    core.add_report("A-2", "Max", "Anzeige", crimes(1))
+    core.delete_report(report)
+    core.close()
+    assert [r['report_id'] for r in read_json_file(data_files["reports"])] == ["A-2"]
+    [pf] = read_json_file(data_files["perpetrator_files"])
+    assert (pf['total_detention_units'], pf['total_fine'], len(pf['linked_report_ids'])) == (1, 0, 1)
+    assert errors == []
+
+
+def test_concurrent_clients_keep_totals_and_share_one_file_per_name(server_url, errors):
+    first, second = remote_core(server_url, errors), remote_core(server_url, errors)
+    first.add_report("A-1", "Max", "Anzeige", crimes(5))
+    second.add_report("A-2", "Max", "Anzeige", crimes(5)) # Max of the first client may not have arrived yet
+    first.add_report("A-3", "Max", "Anzeige", crimes(10))
+
+    def add_reports(core, prefix):
+        for number in range(15):
+            core.add_report(f"{prefix}-{number}", "Moritz", "Anzeige", crimes(1, 10))
+    threads = [threading.Thread(target=add_reports, args=(core, prefix)) for core, prefix in ((first, "X"), (second, "Y"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    first.close()
+    second.close()
+
+    core = remote_core(server_url, errors)
+    totals = {pf['name']: (pf['total_detention_units'], pf['total_fine'], len(pf['linked_report_ids'])) for pf in core.perpetrator_files}
+    assert len(core.perpetrator_files) == 2
+    assert totals == {"Max": (20, 0, 3), "Moritz": (30, 300, 30)}
+    assert len(core.reports) == 33
+    assert core.check_totals() == []
+    core.close()
+    assert errors == []
@@ -0,0 +1,97 @@
+import os
+
+from core import create_storage
+from helpers import crimes, open_core
+from storage import COMPACTING_SUFFIX, JOURNAL_SUFFIX, JournalJsonStorage, JsonStorage, SQLiteStorage, merge_record, read_json_file
+
+
+def test_sqlite_round_trip(tmp_path, errors):
+    core = open_core(SQLiteStorage(str(tmp_path / "pdakten.db")), errors)
+    report, pf, created = core.add_report("A-1", "Max Muster", "Anzeige", crimes(5, 100))
+    core.add_report("A-2", "Max Muster", "Anzeige", crimes(3))
+    core.delete_report(report)
+    core.close()
+
+    core = open_core(SQLiteStorage(str(tmp_path / "pdakten.db")), errors)
+    assert [r['report_id'] for r in core.reports] == ["A-2"]
+    [pf] = core.perpetrator_files
+    assert (pf['name'], pf['total_detention_units'], pf['total_fine']) == ("Max Muster", 3, 0)
+    assert pf['linked_report_ids'] == [core.reports[0]['id']]
+    assert core.predefined_crimes and core.report_presets # Defaults were saved once
+    core.close()
+    assert errors == []
+
+
+def test_sqlite_imports_existing_json_files(tmp_path, data_files, errors):
+    core = open_core(JsonStorage(data_files), errors)
+    core.add_report("A-1", "Erika", "Anzeige", crimes(2, 50))
+    core.close()
+
+    core = open_core(create_storage({"storage_backend": "sqlite"}, data_files, str(tmp_path / "pdakten.db")), errors)
+    assert [r['report_id'] for r in core.reports] == ["A-1"]
+    assert core.perpetrator_files[0]['total_fine'] == 50
+    core.close()
+    assert errors == []
+
+
+def test_journal_round_trip_and_compaction(data_files, errors):
+    core = open_core(JournalJsonStorage(data_files, compact_threshold=1), errors) # Every append starts a compaction
+    first, _, _ = core.add_report("A-1", "Max", "Anzeige", crimes(5))
+    core.add_report("A-2", "Max", "Anzeige", crimes(7, 20))
+    core.delete_report(first)
+    core.close() # Waits for the compaction threads
+
+    assert not os.path.exists(data_files["reports"] + COMPACTING_SUFFIX)
+    assert read_json_file(data_files["reports"]) # Compacted at least once; deltas after that stay in the journal
+    core = open_core(JournalJsonStorage(data_files), errors)
+    [pf] = core.perpetrator_files
+    assert (pf['total_detention_units'], pf['total_fine'], len(pf['linked_report_ids'])) == (7, 20, 1)
+    core.close()
+    assert errors == []
+
+
+def test_journal_replays_deltas_on_load(data_files, errors):
+    core = open_core(JournalJsonStorage(data_files), errors) # Default threshold: nothing is compacted
+    report, _, _ = core.add_report("A-1", "Max", "Anzeige", crimes(5))
+    core.update_report(report, "A-1b", "Moritz", "Anzeige", crimes(1), "")
+    core.close()
+
+    assert os.path.getsize(data_files["reports"] + JOURNAL_SUFFIX) > 0
+    core = open_core(JournalJsonStorage(data_files), errors)
+    assert [(r['report_id'], r['perpetrator_name']) for r in core.reports] == [("A-1b", "Moritz")]
+    assert {pf['name']: pf['total_detention_units'] for pf in core.perpetrator_files} == {"Max": 0, "Moritz": 1}
+    core.close()
+    assert errors == []
+
+
+def test_json_instances_merge_concurrent_changes(data_files, errors):
+    first = open_core(JsonStorage(data_files), errors)
+    first.add_report("A-1", "Max", "Anzeige", crimes(1))
+    second = open_core(JsonStorage(data_files), errors)
+
+    first.add_report("A-2", "Max", "Anzeige", crimes(5, 100))
+    max_file = second.repository.get_perpetrator_by_name("Max") # Outdated copy: edited here, merged on save
+    max_file['description'] = "Bekannt"
+    max_file['total_fine'] += 1000
+    second.persist("perpetrator_files", "update", max_file)
+    assert (max_file['description'], max_file['total_detention_units'], max_file['total_fine']) == ("Bekannt", 6, 1100)
+    max_file['total_fine'] -= 1000
+    second.persist("perpetrator_files", "update", max_file)
+    second.add_report("A-3", "Max", "Anzeige", crimes(3, 10))
+    first.add_report("A-4", "Erika", "Anzeige", crimes(2))
+    for core in (first, second):
+        core.sync_all()
+        [max_file] = [pf for pf in core.perpetrator_files if pf['name'] == "Max"]
+        assert (max_file['total_detention_units'], max_file['total_fine'], len(max_file['linked_report_ids'])) == (9, 110, 3)
+        assert sorted(r['report_id'] for r in core.reports) == ["A-1", "A-2", "A-3", "A-4"]
+        assert core.check_totals() == []
+    first.close()
+    second.close()
+    assert errors == []
+
+
+def test_merge_record_adds_counters_and_merges_lists():
+    base = {"id": "p", "version": 1, "name": "Max", "total_fine": 10, "linked_report_ids": ["a"]}
+    ours = dict(base, version=2, total_fine=15, linked_report_ids=["a", "b"])
+    theirs = dict(base, version=2, name="Max M.", total_fine=30, linked_report_ids=["c"])
+    assert merge_record(base, ours, theirs) == {"id": "p", "version": 2, "name": "Max M.", "total_fine": 35, "linked_report_ids": ["c", "b"]}
@@ -0,0 +1,35 @@
+from templates import CompiledTemplate, LiveRender, TemplateCache
+
+
+def test_render_fills_repeated_and_missing_placeholders():
+    template = CompiledTemplate("[Name] wurde am [Datum] festgenommen. [Name] schweigt.[Notiz]")
+    assert template.placeholders == ["Name", "Datum", "Notiz"]
+    assert template.render({"Name": "Max", "Datum": "01.02."}) == "Max wurde am 01.02. festgenommen. Max schweigt."
+
+
+def test_render_without_placeholders():
+    assert CompiledTemplate("Nur Text").render({"Name": "Max"}) == "Nur Text"
+    assert CompiledTemplate("").render({}) == ""
+
+
+def test_cache_recompiles_edited_template():
+    cache = TemplateCache()
+    preset = {"id": "p1", "template_string": "Hallo [Name]"}
+    compiled = cache.get(preset)
+    assert cache.get(dict(preset)) is compiled
+    preset['template_string'] = "Tschüss [Name]"
+    assert cache.get(preset).render({"Name": "Max"}) == "Tschüss Max"
+    cache.discard("p1")
+    assert cache.compiled == {}
+
+
+def test_live_render_edits_match_full_render():
+    template = CompiledTemplate("[A] und [B], wieder [A].")
+    live = LiveRender(template, {"A": "x"})
+    assert live.text == "x und , wieder x."
+    text = live.text
+    for name, value in (("A", "langer Wert"), ("B", "b"), ("A", ""), ("B", "b")):
+        for offset, length, new_text in live.update(name, value):
+            text = text[:offset] + new_text + text[offset + length:]
+        assert text == template.render(live.values)
+    assert live.update("Unbekannt", "x") == []
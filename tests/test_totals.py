@@ -0,0 +1,27 @@
+from helpers import crimes, open_core
+from storage import JsonStorage
+
+
+def test_check_and_repair_totals(data_files, errors):
+    core = open_core(JsonStorage(data_files), errors)
+    core.add_report("A-1", "Max", "Anzeige", crimes(5, 100, count=2))
+    core.add_report("A-2", "Max", "Anzeige", crimes(1, 10))
+    _, erika, _ = core.add_report("A-3", "Erika", "Anzeige", crimes(4))
+    max_file = core.repository.get_perpetrator_by_name("Max")
+    assert (max_file['total_detention_units'], max_file['total_fine']) == (11, 210)
+    assert core.check_totals() == []
+
+    max_file['total_detention_units'] = 0 # E.g. edited by hand or a crash between two saves
+    erika['total_fine'] = 999
+    drift = core.check_totals()
+    assert sorted((pf['name'], units, fine) for pf, units, fine in drift) == [("Erika", 4, 0), ("Max", 11, 210)]
+
+    erika['total_fine'] = 0 # Fixed meanwhile: skipped when repairing the old result
+    assert core.repair_totals(drift) == 1
+    assert core.check_totals() == []
+    core.close()
+
+    core = open_core(JsonStorage(data_files), errors)
+    assert core.check_totals() == [] # The repair was saved
+    core.close()
+    assert errors == []